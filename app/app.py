@@ -1,21 +1,31 @@
 import sys
 import os
 import json
-import pandas as pd
-import plotly.express as px
-from datetime import datetime
+import uuid
+import threading
+from datetime import datetime, timedelta, timezone
 
 # This adds the parent directory (your project root) to Python's search path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # --- Imports ---
 import streamlit as st
-from transformers import pipeline
 
 # IMPORTANT: These imports will now connect to your REAL db.py file
-from models.classifier import get_risk_assessment
-from models.NER import get_entities
-from db import save_log, load_logs_by_role, delete_log, delete_all_logs, load_all_logs 
+from models.loader import NER_MODEL, CLASSIFIER_MODEL, DEFAULT_BACKEND
+from models.runner import run_analysis, run_ner, ModelProcessPool, LimitedPipeline
+from models.streaming import analyze_stream, needs_streaming, unique_entities, STREAMING_THRESHOLD_TOKENS
+from models.rules import get_rule_engine
+from models.prefilter import get_cascade
+from models.classifier import split_sentences
+from models.metrics import (REGISTRY, METRICS_PORT, PROFILE_DIR, stage, trace, profiled, record_size,
+                            export_metrics, serve_metrics)
+from db import (save_log, load_history, count_logs, load_log_text, delete_log, delete_all_logs, load_dashboard_stats,
+                search_logs, log_writer_stats)
+from cache import ResultCache, make_cache_key, rules_version
+from dedup import NearDuplicateIndex, minhash
+from startup import start_warmup
+from jobs import JobStore, JobQueue, FINISHED
 
 # --- CONFIGURATION ---
 ENTITY_COLORS = {
@@ -26,6 +36,43 @@ ENTITY_COLORS = {
     "DEFAULT": "#696969"
 }
 
+# Risk assessment mode: "full", "segmented" or "auto" (segmented only for inputs longer than the model window)
+RISK_MODE = os.getenv("PRESTO_RISK_MODE", "auto")
+RISK_AGGREGATION = os.getenv("PRESTO_RISK_AGGREGATION", "max")
+
+# How NER and risk classification run: "sequential", "threads" (concurrent) or "processes" (one worker per model)
+EXECUTION_MODE = os.getenv("PRESTO_EXECUTION_MODE", "threads")
+
+# Optional inference service (app/server.py); when set, compute_analysis calls it instead of loading models
+INFERENCE_URL = os.getenv("PRESTO_INFERENCE_URL")
+INFERENCE_TIMEOUT = float(os.getenv("PRESTO_INFERENCE_TIMEOUT", "120"))
+
+# Analysis result cache: in-memory LRU size and optional SQLite file that survives restarts
+RESULT_CACHE_SIZE = int(os.getenv("PRESTO_CACHE_SIZE", "128"))
+RESULT_CACHE_PATH = os.getenv("PRESTO_CACHE_PATH")
+
+# Near-duplicate reuse: texts at least this similar (estimated Jaccard over word shingles) to an
+# earlier analysis get its result instead of a new model run; 0 disables. DEDUP_SIZE bounds the index
+DEDUP_THRESHOLD = float(os.getenv("PRESTO_DEDUP_THRESHOLD", "0.8"))
+DEDUP_SIZE = int(os.getenv("PRESTO_DEDUP_SIZE", "10000"))
+
+# Background jobs: uploads are queued in PRESTO_JOB_DB and analyzed by worker threads while the
+# page polls for progress; PRESTO_JOBS=0 analyzes inline in the script run instead
+JOBS_ENABLED = os.getenv("PRESTO_JOBS", "1") != "0"
+JOB_DB_PATH = os.getenv("PRESTO_JOB_DB", "presto_jobs.db")
+JOB_WORKERS = int(os.getenv("PRESTO_JOB_WORKERS", "2"))
+# Calls allowed into each model at once across all jobs (more workers still overlap NER with classification)
+JOB_MODEL_CONCURRENCY = int(os.getenv("PRESTO_JOB_MODEL_CONCURRENCY", "1"))
+# Seconds a queued job waits to gain one priority level, so low-clearance uploads are not starved
+JOB_AGING_SECONDS = float(os.getenv("PRESTO_JOB_AGING_SECONDS", "30"))
+JOB_POLL_SECONDS = float(os.getenv("PRESTO_JOB_POLL_SECONDS", "1.0"))
+
+# History search (Operative sidebar): time windows in days and the result cap
+SEARCH_WINDOWS = {"Any time": None, "Last 24 hours": 1, "Last 7 days": 7, "Last 30 days": 30}
+SEARCH_LIMIT = 50
+# Logs per page of the Operative history sidebar
+HISTORY_PAGE_SIZE = 5
+
 # --- RBAC CONFIGURATION ---
 ROLES = {
     "Observer": { "level": 1, "description": "Lowest clearance - Risk level only", "color": "#FF6B6B" },
@@ -104,14 +151,38 @@ def render_entities_by_role(entities: list, role: str):
 
 # --- MODEL LOADING ---
 @st.cache_resource(show_spinner=False)
+def start_model_warmup():
+    """Starts loading and warming up the models in the background, unless app/serve.py already did."""
+    return start_warmup()
+
 def load_models():
     with st.spinner("Loading AI models..."):
-        ner_pipeline = pipeline("ner", model="Davlan/distilbert-base-multilingual-cased-ner-hrl", aggregation_strategy="simple")
-        classifier_pipeline = pipeline("zero-shot-classification", model="valhalla/distilbart-mnli-12-1")
-    return ner_pipeline, classifier_pipeline
+        return start_model_warmup().wait()
 
-# --- CORE APP LOGIC ---
-def analyze_text(text: str) -> dict:
+@st.cache_resource(show_spinner=False)
+def load_process_pool():
+    """Worker processes that each load one model; shared by all sessions."""
+    return ModelProcessPool()
+
+@st.cache_resource(show_spinner=False)
+def load_result_cache():
+    """Analysis results keyed by content hash; shared by all sessions."""
+    cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_PATH)
+    REGISTRY.register("presto_result_cache_hits_total", lambda: cache.stats["hits"], kind="counter")
+    REGISTRY.register("presto_result_cache_misses_total", lambda: cache.stats["misses"], kind="counter")
+    return cache
+
+@st.cache_resource(show_spinner=False)
+def load_dedup_index():
+    """LSH index of analyzed documents for near-duplicate reuse; shared by all sessions."""
+    return NearDuplicateIndex(DEDUP_THRESHOLD, DEDUP_SIZE)
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    """Prometheus endpoint at :PRESTO_METRICS_PORT/metrics, once per process."""
+    return serve_metrics(METRICS_PORT)
+
+def get_models() -> tuple:
     # Use cached models from session state if available
     if not st.session_state.models_loaded:
         ner_model, classifier_model = load_models()
@@ -121,12 +192,189 @@ def analyze_text(text: str) -> dict:
     else:
         ner_model = st.session_state.ner_model
         classifier_model = st.session_state.classifier_model
-    
-    # Process both tasks sequentially for now (can be optimized later)
-    risk_level, risk_details, evidence = get_risk_assessment(text, classifier_model)
-    entities = get_entities(text, ner_model)
-    
-    return {"risk_level": risk_level, "risk_details": risk_details, "evidence": evidence, "entities": entities}
+    return ner_model, classifier_model
+
+# --- CORE APP LOGIC ---
+def compute_analysis(text: str, get_pipelines, process_pool=None, report=None) -> dict:
+    """
+    Runs the analysis without touching the page, so it works both in the script run
+    and on a job worker. get_pipelines() returns (ner, classifier); report(progress,
+    partial) receives the results so far of a chunked analysis. The results carry
+    the model "timings" and the stage "trace" for the Operative captions and debug panel.
+    """
+    with trace() as analysis_trace, profiled("analysis"):
+        record_size("chars", len(text))
+        record_size("sentences", len(split_sentences(text)))
+        with stage("analyze"):
+            results, timings = _run_models(text, get_pipelines, process_pool, report)
+    results["timings"] = timings
+    results["trace"] = {"stages": analysis_trace.breakdown(), "sizes": dict(analysis_trace.sizes),
+                        "profile": analysis_trace.profile}
+    export_metrics()
+    return results
+
+def _run_models(text: str, get_pipelines, process_pool, report) -> tuple:
+    if INFERENCE_URL:
+        return analyze_remote(text), None
+
+    timings = {}
+    # cProfile follows only the calling thread, so profiling runs both models on it
+    execution_mode = "sequential" if PROFILE_DIR else EXECUTION_MODE
+    # Models in worker processes leave no tokenizer here; needs_streaming then counts words
+    pipelines = None if execution_mode == "processes" else get_pipelines()
+    # Very long documents are analyzed window by window, with progress after each window
+    if needs_streaming(text, pipelines[1] if pipelines else None):
+        ner_model, classifier_model = pipelines or get_pipelines()
+        return analyze_chunks(text, ner_model, classifier_model, report), None
+
+    if execution_mode == "processes":
+        # Models live in the worker processes; nothing to load here
+        results = run_analysis(text, mode="processes", process_pool=process_pool, timings=timings,
+                               risk_mode=RISK_MODE, risk_aggregation=RISK_AGGREGATION)
+    else:
+        ner_model, classifier_model = pipelines
+        results = run_analysis(text, ner_model, classifier_model, mode=execution_mode, timings=timings,
+                               risk_mode=RISK_MODE, risk_aggregation=RISK_AGGREGATION)
+    return results, timings
+
+def analyze_text(text: str) -> dict:
+    """Analyzes text in the script run (PRESTO_JOBS=0), showing window progress for long documents."""
+    progress = st.empty()
+    show_entities = ROLES[st.session_state.role]["level"] >= 2
+    report = lambda fraction, partial: progress.progress(fraction, text=progress_text(partial, show_entities))
+    process_pool = load_process_pool() if EXECUTION_MODE == "processes" else None
+    with st.spinner('Analyzing text...'):
+        results = compute_analysis(text, get_models, process_pool, report)
+    progress.empty()
+    return results
+
+def analyze_remote(text: str) -> dict:
+    """
+    Client mode: runs the analysis on the inference service at PRESTO_INFERENCE_URL
+    with this app's risk settings. The service streams long documents itself.
+    """
+    import requests
+    payload = {"text": text, "risk_mode": RISK_MODE, "aggregation": RISK_AGGREGATION}
+    response = requests.post(f"{INFERENCE_URL.rstrip('/')}/analyze", json=payload, timeout=INFERENCE_TIMEOUT)
+    response.raise_for_status()
+    result = response.json()
+    result["entities"] = [tuple(entity) for entity in result["entities"]]
+    return result
+
+def extract_entities(text: str) -> list:
+    """
+    NER alone, wherever the models run. A reused near-duplicate result gets the
+    entities of the document actually shown and logged, not of the earlier one.
+    """
+    if INFERENCE_URL:
+        import requests
+        response = requests.post(f"{INFERENCE_URL.rstrip('/')}/ner", json={"text": text}, timeout=INFERENCE_TIMEOUT)
+        response.raise_for_status()
+        return [tuple(entity) for entity in response.json()["entities"]]
+    if EXECUTION_MODE == "processes":
+        return run_ner(text, process_pool=load_process_pool())
+    return run_ner(text, get_models()[0])
+
+def analyze_chunks(text: str, ner_model, classifier_model, report=None) -> dict:
+    """Analyzes text chunk by chunk, reporting the risk so far after each chunk."""
+    update = {"risk_level": "Benign", "risk_details": "Low threat potential", "evidence": "No evidence available"}
+    entity_spans = []
+    for update in analyze_stream(text, ner_model, classifier_model, risk_mode=RISK_MODE, risk_aggregation=RISK_AGGREGATION):
+        entity_spans.extend(update["entities"])
+        if report is not None:
+            report(update["progress"], {"chunk": update["chunk"], "risk_level": update["risk_level"],
+                                        "entity_count": len(entity_spans)})
+    entities = unique_entities(entity_spans)
+    return {"risk_level": update["risk_level"], "risk_details": update["risk_details"], "evidence": update["evidence"], "entities": entities}
+
+def progress_text(partial: dict | None, show_entities: bool = True) -> str:
+    if not partial:
+        return "Analyzing text..."
+    text = f"Analyzed chunk {partial['chunk'] + 1} | Risk so far: {partial['risk_level']}"
+    return text + (f" | Entities found: {partial['entity_count']}" if show_entities else "")
+
+def keep_diagnostics(results: dict):
+    """Moves the run's timings and stage breakdown from the results into the session."""
+    st.session_state.last_timings = results.pop("timings", None)
+    run_trace = results.pop("trace", None)
+    if run_trace:
+        st.session_state.last_trace = run_trace
+
+# --- BACKGROUND JOBS ---
+@st.cache_resource(show_spinner=False)
+def load_job_queue():
+    """Persistent job queue and its worker threads; shared by all sessions."""
+    process_pool = load_process_pool() if EXECUTION_MODE == "processes" and not INFERENCE_URL else None
+    pipelines, lock = [], threading.Lock()
+
+    def get_pipelines():
+        # One limiter per model, however many workers share it. Also reached in processes
+        # mode, where long documents stream through in-process models loaded on first use
+        with lock:
+            if not pipelines:
+                ner_model, classifier_model = start_warmup().wait()
+                pipelines.extend([LimitedPipeline(ner_model, JOB_MODEL_CONCURRENCY, "ner"),
+                                  LimitedPipeline(classifier_model, JOB_MODEL_CONCURRENCY, "classifier")])
+        return tuple(pipelines)
+
+    store = JobStore(JOB_DB_PATH, aging_seconds=JOB_AGING_SECONDS)
+    return JobQueue(store, lambda text, report: compute_analysis(text, get_pipelines, process_pool, report),
+                    workers=JOB_WORKERS, poll_interval=JOB_POLL_SECONDS)
+
+def await_job(text: str, cache_key: str) -> dict:
+    """
+    Submits the upload as a background job (once per session and document) and
+    returns its results once done; until then shows its progress and ends the script run.
+    """
+    job_queue = load_job_queue()
+    job_ids = st.session_state.setdefault("job_ids", {})
+    # Sessions sharing a job register separately, so one analyst's cancel doesn't stop another's analysis
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    # None: this session cancelled its interest, though others may still run the job
+    cancelled = cache_key in job_ids and job_ids[cache_key] is None
+    job = job_queue.store.get(job_ids[cache_key]) if job_ids.get(cache_key) else None
+    if job is None and not cancelled:
+        role = st.session_state.role
+        job_ids[cache_key] = job_queue.submit(text, priority=ROLES[role]["level"], role=role, cache_key=cache_key,
+                                              submitter=session_id)
+        job = job_queue.store.get(job_ids[cache_key])
+    if job is not None and job["status"] == "done":
+        results = job["result"]
+        results["entities"] = [tuple(entity) for entity in results["entities"]]
+        if job["submitter"] != session_id:
+            # Timings and stage trace describe the run another session asked for
+            results.pop("timings", None)
+            results.pop("trace", None)
+        return results
+    if cancelled or job["status"] in FINISHED:
+        if job is not None and job["status"] == "failed":
+            st.error(f"Analysis failed: {job['error']}")
+        else:
+            st.info("Analysis cancelled.")
+        if st.button("Analyze again"):
+            del job_ids[cache_key]
+            st.rerun()
+    else:
+        render_job_progress(job["id"], cache_key)
+    st.stop()
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_job_progress(job_id: str, cache_key: str):
+    """Polls a queued or running job; reruns the whole page once it has finished."""
+    job_queue = load_job_queue()
+    job = job_queue.store.get(job_id)
+    if job is None or job["status"] in FINISHED:
+        st.rerun()
+    if job["status"] == "queued":
+        ahead = job_queue.store.position(job_id) or 0
+        st.info(f"Queued for analysis ({ahead} job(s) ahead of yours)." if ahead else "Queued for analysis, next in line.")
+    else:
+        show_entities = ROLES[st.session_state.role]["level"] >= 2
+        st.progress(job["progress"], text=progress_text(job["partial"], show_entities))
+    if st.button("Cancel analysis", key=f"cancel_{job_id}"):
+        job_queue.cancel(job_id, submitter=st.session_state.session_id)
+        st.session_state.job_ids[cache_key] = None
+        st.rerun()
 
 def get_risk_styling(risk_level: str) -> dict:
     risk_level_lower = risk_level.lower()
@@ -137,28 +385,61 @@ def get_risk_styling(risk_level: str) -> dict:
     else:
         return {"color": "green", "text": "Low Threat Potential", "delta_color": "normal"}
 
+def render_debug_panel():
+    """Hidden Operative panel (open the app with ?debug=1): where the last analysis spent its time."""
+    last = st.session_state.get("last_trace")
+    with st.expander("🛠 Debug: last analysis breakdown"):
+        if not last:
+            st.caption("No model run in this session yet; cached and near-duplicate results skip the models.")
+            return
+        total = next((seconds for name, _, seconds in last["stages"] if name == "analyze"), 0.0)
+        rows = ["| Stage | Calls | ms | % of analysis |", "|---|---:|---:|---:|"]
+        for name, calls, seconds in last["stages"]:
+            share = f"{seconds / total:.0%}" if total else ""
+            rows.append(f"| {name} | {calls} | {seconds * 1000:.1f} | {share} |")
+        st.markdown("\n".join(rows))
+        st.caption("Nested stages overlap (e.g. risk includes risk.classify and risk.evidence); "
+                   "in threads mode risk and NER run concurrently. Sizes: "
+                   + ", ".join(f"{kind} {value}" for kind, value in last["sizes"].items()))
+        if last.get("profile"):
+            st.caption(f"Profile written to {last['profile']['path']}")
+            st.code(last["profile"]["summary"])
+
+# --- HISTORY SIDEBAR ---
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_full_text(log_id):
+    return load_log_text(log_id)
+
+def render_history_pager(logs: list):
+    """Newer/Older buttons; pages are keyed by the (created_at, id) of the last row shown."""
+    cursors = st.session_state.history_cursors
+    newer_col, older_col = st.columns(2)
+    with newer_col:
+        if st.button("‹ Newer", disabled=not cursors, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with older_col:
+        if st.button("Older ›", disabled=len(logs) < HISTORY_PAGE_SIZE, use_container_width=True):
+            cursors.append((logs[-1]["created_at"], logs[-1]["id"]))
+            st.rerun()
+
 # --- DASHBOARD RENDERING FUNCTION ---
 def render_dashboard():
+    import pandas as pd
+    import plotly.express as px
+
     st.markdown(f"### {svg_icon('dashboard', 20)} System-Wide Statistics", unsafe_allow_html=True)
-    logs = load_all_logs()
-    if not logs:
+    # Counts are aggregated by the database; only a handful of numbers come back
+    stats = load_dashboard_stats()
+    if not stats["total"]:
         st.warning("No analysis data found in the database. The dashboard will be empty.")
         return
-    df = pd.DataFrame(logs)
-    if 'created_at' not in df.columns or df['created_at'].isnull().all():
+    if not stats["latest"]:
         st.warning("Dashboard requires a 'created_at' column with valid data.")
         return
-    df['created_at'] = pd.to_datetime(df['created_at'])
-    df['analysis_date'] = df['created_at'].dt.date
-    def parse_entities(entities_str):
-        try:
-            return json.loads(entities_str) if isinstance(entities_str, str) else entities_str
-        except (json.JSONDecodeError, TypeError):
-            return []
-    df['entities_list'] = df['entities'].apply(parse_entities)
-    total_analyses = len(df)
-    critical_analyses = len(df[df['analysis'] == 'Critical'])
-    most_recent_analysis_time = df['created_at'].max().strftime("%Y-%m-%d %H:%M:%S")
+    total_analyses = stats["total"]
+    critical_analyses = stats["by_risk"].get("Critical", 0)
+    most_recent_analysis_time = pd.to_datetime(stats["latest"]).strftime("%Y-%m-%d %H:%M:%S")
     m1, m2, m3 = st.columns(3)
     m1.metric(label="Total Analyses Conducted", value=total_analyses)
     m2.metric(label="Critical Risk Detections", value=critical_analyses)
@@ -167,7 +448,7 @@ def render_dashboard():
     c1, c2 = st.columns(2, gap="large")
     with c1:
         st.markdown("**Risk Level Distribution**")
-        risk_counts = df['analysis'].value_counts()
+        risk_counts = pd.Series(stats["by_risk"], dtype="int64")
         if not risk_counts.empty:
             RISK_COLOR_MAP = {"Critical": "#FF4B4B", "Suspicious": "#FFD700", "Benign": "#2E8B57"}
             risk_df = risk_counts.reset_index()
@@ -182,9 +463,8 @@ def render_dashboard():
             st.info("No risk data to display.")
     with c2:
         st.markdown("**Detected Entity Types**")
-        all_entities = [entity[1] for sublist in df['entities_list'].dropna() for entity in sublist]
-        if all_entities:
-            entity_counts = pd.Series(all_entities).value_counts()
+        if stats["entity_types"]:
+            entity_counts = pd.Series(stats["entity_types"]).sort_values(ascending=False)
             fig = px.pie(entity_counts, values=entity_counts.values, names=entity_counts.index, hole=.3, color_discrete_map=ENTITY_COLORS)
             fig.update_layout(showlegend=False)
             st.plotly_chart(fig, use_container_width=True)
@@ -194,6 +474,15 @@ def render_dashboard():
 # --- MAIN APP ---
 st.set_page_config(page_title="Presto", page_icon="🚨")
 
+# Begin loading models in the background while the user picks a role
+if not INFERENCE_URL and EXECUTION_MODE != "processes":
+    start_model_warmup()
+if METRICS_PORT:
+    start_metrics_server()
+# Workers pick up jobs queued before a restart on the first script run, without waiting for an upload
+if JOBS_ENABLED:
+    load_job_queue()
+
 # Initialize session state for models
 if "models_loaded" not in st.session_state:
     st.session_state.models_loaded = False
@@ -239,7 +528,21 @@ with st.sidebar:
     st.markdown(f"### {svg_icon('file-text', 18)}Past Analyses", unsafe_allow_html=True)
     if st.session_state.role:
         if st.session_state.role == "Operative":
-            logs = load_logs_by_role(st.session_state.role, limit=5)
+            with st.expander("🔎 Search history"):
+                search_query = st.text_input("Text contains", key="search_query")
+                search_entity = st.text_input("Entity", key="search_entity", help="Matches any capitalization or spacing, e.g. viper")
+                labels = sorted({*ENTITY_COLORS, *filter(None, get_rule_engine().terms.values())} - {"DEFAULT"})
+                search_label = st.selectbox("Entity type", ["Any", *labels], key="search_label")
+                search_days = SEARCH_WINDOWS[st.selectbox("Logged", list(SEARCH_WINDOWS), key="search_window")]
+            searching = bool(search_query.strip() or search_entity.strip() or search_label != "Any" or search_days)
+            if searching:
+                since = (datetime.now(timezone.utc) - timedelta(days=search_days)).isoformat(timespec="milliseconds") if search_days else None
+                logs = search_logs(query=search_query, entity=search_entity, label=None if search_label == "Any" else search_label,
+                                   since=since, limit=SEARCH_LIMIT)
+                st.caption(f"{len(logs)} matching log(s)" + (" (showing the most recent)" if len(logs) == SEARCH_LIMIT else ""))
+            else:
+                cursors = st.session_state.setdefault("history_cursors", [])
+                logs = load_history(limit=HISTORY_PAGE_SIZE, before=cursors[-1] if cursors else None)
             if logs:
                 for log in logs:
                     first_entity = "No Entities"
@@ -249,34 +552,44 @@ with st.sidebar:
                             if entities_list: first_entity = entities_list[0][0]
                         except Exception:
                             first_entity = "Error"
-                    expander_label = f"{first_entity} | {log.get('analysis', '')}"
+                    expander_label = f"#{log['id']} | {first_entity} | {log.get('analysis', '')}"
                     with st.expander(expander_label):
                         st.markdown(f"""
                         <div style="padding:4px 0;">
-                            <div><strong>Content:</strong> {(log.get("text","")[:200] + "...")}</div>
+                            <div><strong>Content:</strong> {log.get("preview") or ""}{"..." if log.get("truncated") else ""}</div>
                             <div style="margin-top:4px;"><strong>Entities:</strong> {log.get("entities","[]")}</div>
                         </div>
                         """, unsafe_allow_html=True)
+                        # The full text is only fetched once asked for
+                        if log.get("truncated") and st.toggle("Show full text", key=f"full_text_{log['id']}"):
+                            with st.container(height=200, border=True):
+                                st.text(load_full_text(log["id"]) or "")
                         _, btn_col = st.columns([3, 1])
                         with btn_col:
                             if st.button("🗑️", key=f"delete_{log['id']}", help="Delete this log entry", use_container_width=True):
                                 delete_log(log['id'])
                                 st.rerun()
+                if not searching:
+                    render_history_pager(logs)
                 st.divider()
                 if st.button("🗑️ Delete All History", type="secondary", use_container_width=True):
                     if st.session_state.get('confirm_delete_all', False):
                         delete_all_logs()
                         st.session_state.confirm_delete_all = False
+                        st.session_state.history_cursors = []
                         st.rerun()
                     else:
                         st.session_state.confirm_delete_all = True
                         st.warning("Click again to confirm deletion of ALL history")
-            else:
-                st.info("No logs yet. Upload a file to see results here.")
+            elif not searching:
+                if st.session_state.history_cursors:
+                    render_history_pager(logs)
+                else:
+                    st.info("No logs yet. Upload a file to see results here.")
         else:
-            logs = load_logs_by_role(st.session_state.role, limit=3)
-            if logs:
-                st.info(f"Recent Analysis Count: {len(logs)}")
+            log_count = count_logs()
+            if log_count:
+                st.info(f"Logged Analyses: {log_count}")
                 st.info("Full analysis history requires Operative clearance level.")
             else:
                 st.info("Access to analysis history requires Operative clearance level.")
@@ -290,12 +603,61 @@ with st.container(border=True):
     uploaded_file = st.file_uploader("", type=["txt"], help="Only .txt files are supported.")
 if uploaded_file is not None:
     text = uploaded_file.read().decode("utf-8")
-    with st.spinner('Analyzing text...'):
-        analysis_results = analyze_text(text)
-    if st.session_state.role == "Operative":
-        save_log(text=text, analysis=analysis_results["risk_level"], entities=analysis_results["entities"])
+    # Reruns (widget clicks, tab switches) hit the cache instead of the models
+    result_cache = load_result_cache()
+    model_names, rules = [NER_MODEL, CLASSIFIER_MODEL, DEFAULT_BACKEND], rules_version()
+    cascade = get_cascade()
+    settings = (RISK_MODE, RISK_AGGREGATION, STREAMING_THRESHOLD_TOKENS, cascade.version if cascade else "")
+    cache_key = make_cache_key(text, model_names, rules, *settings)
+    # "Re-analyze" on a near-duplicate result bypasses both caches once
+    force_analysis = st.session_state.pop("force_analysis_key", None) == cache_key
+    analysis_results = None if force_analysis else result_cache.get(cache_key)
+    if analysis_results is None:
+        # Near-duplicates are only matched against results from the same models, rules and settings
+        dedup_index, dedup_scope = load_dedup_index(), make_cache_key("", model_names, rules, *settings)
+        # A job already submitted for this document (e.g. after "Re-analyze") is waited for, not replaced
+        job_pending = cache_key in st.session_state.get("job_ids", {})
+        with stage("dedup"):
+            signature = minhash(text) if DEDUP_THRESHOLD > 0 else None
+            match = dedup_index.find(text, dedup_scope, signature) if signature and not (force_analysis or job_pending) else None
+        if match is not None:
+            REGISTRY.inc("presto_near_duplicate_hits_total")
+            score, earlier = match
+            # The risk verdict is reused; the entities are this document's own
+            with st.spinner("Extracting entities..."):
+                entities = extract_entities(text)
+            analysis_results = dict(earlier["result"], entities=entities, near_duplicate={
+                "similarity": score, "log_id": earlier["log_id"], "analyzed_at": earlier["analyzed_at"]})
+            st.session_state.last_timings = None
+        else:
+            analysis_results = await_job(text, cache_key) if JOBS_ENABLED else analyze_text(text)
+            keep_diagnostics(analysis_results)
+            if signature:
+                dedup_index.add(cache_key, text, analysis_results, dedup_scope, signature)
+        result_cache.put(cache_key, analysis_results)
+    else:
+        st.session_state.last_timings = None
+    # Log each uploaded document once per session, not on every rerun
+    if st.session_state.role == "Operative" and st.session_state.get("last_saved_key") != cache_key:
+        # Later near-duplicates of this document cite its log entry
+        save_log(text=text, analysis=analysis_results["risk_level"], entities=analysis_results["entities"],
+                 on_saved=lambda log_id, key=cache_key: load_dedup_index().set_log_id(key, log_id))
+        st.session_state.last_saved_key = cache_key
     st.divider()
     render_role_badge(st.session_state.role)
+    near_duplicate = analysis_results.get("near_duplicate")
+    if near_duplicate:
+        info_col, button_col = st.columns([4, 1])
+        with info_col:
+            analyzed_at = datetime.fromtimestamp(near_duplicate["analyzed_at"]).strftime("%Y-%m-%d %H:%M")
+            log_id = near_duplicate.get("log_id")
+            earlier_ref = f"log #{log_id}" if log_id is not None else "an earlier intercept"
+            st.info(f"Near-duplicate ({near_duplicate['similarity']:.0%} similar) of {earlier_ref} "
+                    f"analyzed at {analyzed_at}; its risk assessment is shown, entities are from this document.")
+        with button_col:
+            if st.button("Re-analyze", use_container_width=True, help="Run the models on this document instead"):
+                st.session_state.force_analysis_key = cache_key
+                st.rerun()
     filtered_output = filter_output_by_role(st.session_state.role, text, analysis_results["entities"], analysis_results["risk_details"])
     analysis_tab, dashboard_tab = st.tabs(["🔍 Analysis Results", "📊 Dashboard"])
     with analysis_tab:
@@ -320,6 +682,27 @@ if uploaded_file is not None:
             st.divider()
             st.markdown(f"### {svg_icon('tags', 18)}Detected Entities", unsafe_allow_html=True)
             render_entities_by_role(analysis_results["entities"], st.session_state.role)
+            timings = st.session_state.get("last_timings")
+            if st.session_state.role == "Operative" and timings:
+                st.caption(f"Model timing ({timings['mode']}): {timings['wall']:.2f}s wall clock vs {timings['sum']:.2f}s "
+                           f"summed (risk {timings['risk']:.2f}s, NER {timings['ner']:.2f}s)")
+            if st.session_state.role == "Operative":
+                cache_stats = load_result_cache().stats
+                st.caption(f"Result cache: {cache_stats['hits']} hits ({cache_stats['disk_hits']} from disk), {cache_stats['misses']} misses")
+                writer_stats = log_writer_stats()
+                if writer_stats:
+                    st.caption(f"Log writer: {writer_stats['queue_depth']} queued, {writer_stats['written']} written in {writer_stats['flushes']} "
+                               f"flushes (avg {writer_stats['avg_flush_ms']:.1f} ms), {writer_stats['retries']} retries, "
+                               f"{writer_stats['spilled']} spilled, {writer_stats['dropped']} dropped")
+                # In processes mode the cascade runs in the worker, so this process has no decisions to show
+                prefilter_stats = cascade.summary() if cascade else None
+                if prefilter_stats and prefilter_stats["documents"]:
+                    agreement = f"{prefilter_stats['agreement']:.0%}" if prefilter_stats["agreement"] is not None else "n/a"
+                    st.caption(f"Pre-filter: {prefilter_stats['skipped']}/{prefilter_stats['documents']} skipped the transformer, "
+                               f"escalated {prefilter_stats['rule_hit']} on rules, {prefilter_stats['uncertain']} uncertain, "
+                               f"{prefilter_stats['risky']} risky; {prefilter_stats['audited']} audited, agreement {agreement}")
+                if st.query_params.get("debug") == "1":
+                    render_debug_panel()
     with dashboard_tab:
         render_dashboard()
 else:
@@ -0,0 +1,290 @@
+"""
+Headless batch analysis of intercepts.
+
+Examples:
+    python app/batch.py reports/ -o results.jsonl --workers 4
+    python app/batch.py "reports/**/*.txt" -o results.parquet
+    python app/batch.py requests.jsonl --text-field body --id-field request_id -o results.jsonl
+    python app/batch.py reports/ -o results.jsonl --log-to sqlite --sqlite-path presto.db
+
+Re-running with the same output resumes from its checkpoint file and skips
+documents that already finished. Failed documents are not checkpointed and go to
+<output>.errors instead of the output, so a resumed run retries them without
+leaving duplicate error records behind; the errors file lists the latest run's
+failures only.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+
+# This adds the parent directory (your project root) to Python's search path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.classifier import get_risk_assessment
+from models.NER import get_entities
+from models.loader import load_ner_pipeline, load_classifier_pipeline
+from models.runner import set_torch_threads, split_threads
+from models.streaming import analyze_chunked, needs_streaming, STREAMING_THRESHOLD_TOKENS
+from storage import WriteBehindQueue, create_store
+
+# --- INPUT ---
+def iter_documents(source: str, text_field: str = "text", id_field: str = "id"):
+    """
+    Yields (doc_id, text) from a directory of .txt files, a glob pattern, or a JSONL
+    file ("-" reads JSONL from stdin). JSONL records fall back to "body" for the
+    text and "request_id" or the line number for the id.
+    """
+    if source == "-" or source.endswith(".jsonl"):
+        stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+        with stream:
+            for line_no, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                text = record.get(text_field, record.get("body"))
+                doc_id = record.get(id_field, record.get("request_id", f"line-{line_no}"))
+                if text is not None:
+                    yield str(doc_id), text
+        return
+
+    if os.path.isdir(source):
+        paths = glob.iglob(os.path.join(source, "**", "*.txt"), recursive=True)
+    else:
+        paths = glob.iglob(source, recursive=True)
+    for path in sorted(paths):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            yield path, f.read()
+
+# --- WORKERS ---
+# Each worker process loads both models once, in the pool initializer
+_NER = None
+_CLASSIFIER = None
+_OPTIONS = {}
+
+def _init_worker(options: dict):
+    global _NER, _CLASSIFIER, _OPTIONS
+    set_torch_threads(options["threads_per_worker"])
+    _NER = load_ner_pipeline()
+    _CLASSIFIER = load_classifier_pipeline()
+    _OPTIONS = options
+
+def _analyze(doc_id: str, text: str) -> dict:
+    start = time.perf_counter()
+    try:
+        if needs_streaming(text, _CLASSIFIER, _OPTIONS["stream_threshold"]):
+            result = analyze_chunked(text, _NER, _CLASSIFIER, risk_mode=_OPTIONS["risk_mode"],
+                                     risk_aggregation=_OPTIONS["aggregation"])
+            result.pop("entity_spans", None)
+        else:
+            risk_level, risk_details, evidence = get_risk_assessment(
+                text, _CLASSIFIER, mode=_OPTIONS["risk_mode"], aggregation=_OPTIONS["aggregation"])
+            entities = get_entities(text, _NER)
+            result = {"risk_level": risk_level, "risk_details": risk_details, "evidence": evidence, "entities": entities}
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    result["id"] = doc_id
+    result["chars"] = len(text)
+    result["latency"] = time.perf_counter() - start
+    return result
+
+# --- OUTPUT ---
+# write() and close() return the ids of records that are now safely on disk, which
+# are the only ones the checkpoint may mark as done
+class JsonlWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict) -> list:
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        return [record["id"]]
+
+    def close(self) -> list:
+        self.file.close()
+        return []
+
+class ParquetWriter:
+    """
+    Buffers records into row groups. Parquet files can't be appended, so a resumed run
+    writes a new part file. The footer is written last and a file without one can't be
+    read, so no record counts as written until close().
+    """
+
+    def __init__(self, path: str, row_group_size: int = 256):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa, self.pq = pa, pq
+        # Declared up front: inferring it from a row group of only failures (all-null
+        # risk columns) or only successes (null error) would not match the next group
+        self.schema = pa.schema([
+            ("id", pa.string()),
+            ("risk_level", pa.string()),
+            ("risk_details", pa.string()),
+            ("evidence", pa.string()),
+            ("entities", pa.string()),
+            ("error", pa.string()),
+            ("chars", pa.int64()),
+            ("latency", pa.float64()),
+        ])
+        base, ext = os.path.splitext(path)
+        part = 0
+        while os.path.exists(path):
+            part += 1
+            path = f"{base}.part{part}{ext}"
+        self.path = path
+        self.row_group_size = row_group_size
+        self.buffer = []
+        self.writer = None
+        self.written = []
+
+    def write(self, record: dict) -> list:
+        record = dict(record, entities=json.dumps(record.get("entities", []), ensure_ascii=False))
+        self.buffer.append(record)
+        self.written.append(record["id"])
+        if len(self.buffer) >= self.row_group_size:
+            self._flush()
+        return []
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        table = self.pa.table({c: [r.get(c) for r in self.buffer] for c in self.schema.names}, schema=self.schema)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table)
+        self.buffer = []
+
+    def close(self) -> list:
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+        return self.written
+
+def open_writer(path: str, fmt: str | None):
+    fmt = fmt or ("parquet" if path.endswith(".parquet") else "jsonl")
+    return ParquetWriter(path) if fmt == "parquet" else JsonlWriter(path)
+
+# --- CHECKPOINT ---
+def load_checkpoint(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+# --- REPORT ---
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def throughput_report(latencies: list, elapsed: float, skipped: int, failed: int) -> str:
+    done = len(latencies)
+    return (
+        f"Processed {done} documents in {elapsed:.1f}s ({done / elapsed if elapsed else 0.0:.2f} docs/sec), "
+        f"{skipped} skipped from checkpoint, {failed} failed\n"
+        f"Latency per document: p50 {percentile(latencies, 50):.3f}s, p95 {percentile(latencies, 95):.3f}s"
+    )
+
+# --- MAIN ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of .txt files, glob pattern, .jsonl file, or - for JSONL on stdin")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.jsonl or .parquet)")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], help="Output format (default: from the extension)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads-per-worker", type=int, default=None, help="torch intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--errors", help="JSONL file of this run's failed documents (default: <output>.errors)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--risk-mode", default="auto", choices=["full", "segmented", "auto"])
+    parser.add_argument("--aggregation", default="max", choices=["max", "mean", "attention"])
+    parser.add_argument("--stream-threshold", type=int, default=STREAMING_THRESHOLD_TOKENS,
+                        help="Classifier tokens above which documents are analyzed in windows")
+    parser.add_argument("--log-to", choices=["sqlite", "supabase"], help="Also record each analysis in the intelligence log (bulk inserts)")
+    parser.add_argument("--sqlite-path", default=os.getenv("PRESTO_SQLITE_PATH", "presto.db"))
+    parser.add_argument("--spill-path", default="presto_log_spill.jsonl", help="Where log records go while the database is unreachable")
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+    errors_path = args.errors or args.output + ".errors"
+    finished = load_checkpoint(checkpoint_path)
+    options = {
+        "threads_per_worker": args.threads_per_worker or split_threads(args.workers),
+        "risk_mode": args.risk_mode,
+        "aggregation": args.aggregation,
+        "stream_threshold": args.stream_threshold,
+    }
+
+    writer = open_writer(args.output, args.format)
+    log_writer = None
+    if args.log_to:
+        store = create_store(args.log_to, url=os.getenv("SUPABASE_URL"), key=os.getenv("SUPABASE_KEY"), path=args.sqlite_path)
+        log_writer = WriteBehindQueue(store, spill_path=args.spill_path)
+    latencies, skipped, failed = [], 0, 0
+    start = time.perf_counter()
+    # Bound the number of queued documents so large inputs are never fully in memory
+    max_in_flight = args.workers * 4
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(options,)) as pool, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            open(errors_path, "w", encoding="utf-8") as errors:
+        pending = set()
+        # Texts of in-flight documents, kept only when logging (results don't carry the text)
+        texts = {}
+
+        def commit(written_ids):
+            for doc_id in written_ids:
+                checkpoint.write(doc_id + "\n")
+            checkpoint.flush()
+
+        def drain(return_when):
+            nonlocal pending, failed
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                record = future.result()
+                text = texts.pop(future, "")
+                if "error" in record:
+                    # Kept out of the output and the checkpoint, so a resumed run retries it
+                    failed += 1
+                    errors.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    errors.flush()
+                    print(f"Failed {record['id']}: {record['error']}", file=sys.stderr)
+                    continue
+                latencies.append(record["latency"])
+                if log_writer is not None:
+                    log_writer.put(text, record["risk_level"], record["entities"])
+                commit(writer.write(record))
+
+        try:
+            for doc_id, text in iter_documents(args.source, args.text_field, args.id_field):
+                if doc_id in finished:
+                    skipped += 1
+                    continue
+                future = pool.submit(_analyze, doc_id, text)
+                pending.add(future)
+                if log_writer is not None:
+                    texts[future] = text
+                if len(pending) >= max_in_flight:
+                    drain(FIRST_COMPLETED)
+            if pending:
+                drain(ALL_COMPLETED)
+        finally:
+            # Also on errors and Ctrl-C, so a Parquet file gets its footer and what it holds is checkpointed
+            commit(writer.close())
+
+    print(throughput_report(latencies, time.perf_counter() - start, skipped, failed))
+    if log_writer is not None:
+        log_writer.close(timeout=None)
+        stats = log_writer.stats()
+        print(f"Logged {stats['written']} analyses in {stats['flushes']} bulk inserts (avg {stats['avg_flush_ms']:.1f} ms), "
+              f"{stats['spilled']} spilled to {args.spill_path}, {stats['dropped']} dropped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from models.rules import get_rule_engine
+
+def rules_version() -> str:
+    """Short hash of the rules file; changes whenever a rule does."""
+    return get_rule_engine().version
+
+def make_cache_key(text: str, model_names: list, rules: str, *settings) -> str:
+    """Cache key for an analysis: hash of the text, the models, the rule tables and any extra settings."""
+    digest = hashlib.sha256()
+    for part in [*model_names, rules, *map(str, settings)]:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    LRU cache of analysis results with an optional SQLite file behind it, so
+    results survive restarts. Thread-safe: Streamlit sessions share one instance.
+    """
+
+    def __init__(self, max_entries: int = 128, db_path: str | None = None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+            self.conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self.entries[key]
+            if self.conn is not None:
+                row = self.conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+                if row:
+                    result = self._decode(row[0])
+                    self._remember(key, result)
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                    return result
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, result: dict):
+        with self.lock:
+            self._remember(key, result)
+            if self.conn is not None:
+                self.conn.execute("INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)", (key, json.dumps(result)))
+                self.conn.commit()
+
+    def _remember(self, key: str, result: dict):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def _decode(raw: str) -> dict:
+        result = json.loads(raw)
+        # JSON turns entity tuples into lists; restore them
+        result["entities"] = [tuple(entity) for entity in result.get("entities", [])]
+        return result
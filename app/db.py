@@ -1,72 +1,182 @@
 import os
-import json
+import atexit
+import threading
 import streamlit as st
-from supabase import create_client, Client
 
-# Prefer Streamlit secrets, fallback to environment variables for local dev
+from storage import LogStore, WriteBehindQueue, create_store
+from models.metrics import REGISTRY, timed
+
+# Prefer Streamlit secrets, fallback to environment variables for local dev.
+# Only the supabase backend asks, and only when the store is first used, so SQLite
+# deployments run without a secrets.toml
 def _get_secret(name: str, default: str | None = None) -> str | None:
-    # Try flat keys in st.secrets first
-    if name in st.secrets:
-        return st.secrets[name]
-    # Try nested structure like st.secrets["supabase"]["url"|"key"]
-    if "supabase" in st.secrets:
-        nested = st.secrets["supabase"]
-        mapped_key = {"SUPABASE_URL": "url", "SUPABASE_KEY": "key"}.get(name)
-        if mapped_key and mapped_key in nested:
-            return nested[mapped_key]
+    try:
+        # Try flat keys in st.secrets first
+        if name in st.secrets:
+            return st.secrets[name]
+        # Try nested structure like st.secrets["supabase"]["url"|"key"]
+        if "supabase" in st.secrets:
+            nested = st.secrets["supabase"]
+            mapped_key = {"SUPABASE_URL": "url", "SUPABASE_KEY": "key"}.get(name)
+            if mapped_key and mapped_key in nested:
+                return nested[mapped_key]
+    except Exception:
+        # No secrets file (Streamlit raises on first access); the environment may still have it
+        pass
     # Fallback to environment variable
     return os.getenv(name, default)
 
-SUPABASE_URL = _get_secret("SUPABASE_URL")
-SUPABASE_KEY = _get_secret("SUPABASE_KEY")
+# Storage backend: "supabase" or "sqlite" (embedded file at PRESTO_SQLITE_PATH)
+SQLITE_PATH = os.getenv("PRESTO_SQLITE_PATH", "presto.db")
+STORAGE_BACKEND = os.getenv("PRESTO_STORAGE", "sqlite" if os.getenv("PRESTO_SQLITE_PATH") else "supabase")
+
+# Write-behind logging: saves are queued and flushed in bulk off the request path.
+# PRESTO_LOG_WRITE_BEHIND=0 writes synchronously instead
+LOG_WRITE_BEHIND = os.getenv("PRESTO_LOG_WRITE_BEHIND", "1") != "0"
+LOG_BATCH_SIZE = int(os.getenv("PRESTO_LOG_BATCH_SIZE", "100"))
+LOG_FLUSH_INTERVAL = float(os.getenv("PRESTO_LOG_FLUSH_INTERVAL", "1.0"))
+# Records that can't be written after retries go here and are re-sent once the database is back
+LOG_SPILL_PATH = os.getenv("PRESTO_LOG_SPILL_PATH", "presto_log_spill.jsonl")
+
+_store = None
+_writer = None
+_store_lock = threading.Lock()
+
+def get_store() -> LogStore:
+    """Creates the configured log store on first use, so importing db stays cheap."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if STORAGE_BACKEND == "supabase":
+                _store = create_store("supabase", url=_get_secret("SUPABASE_URL"), key=_get_secret("SUPABASE_KEY"))
+            else:
+                _store = create_store(STORAGE_BACKEND, path=SQLITE_PATH)
+    return _store
+
+def get_log_writer() -> WriteBehindQueue:
+    """Starts the write-behind queue on first use; it is flushed when the process exits."""
+    global _writer
+    store = get_store()
+    with _store_lock:
+        if _writer is None:
+            _writer = WriteBehindQueue(store, max_batch=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL, spill_path=LOG_SPILL_PATH)
+            atexit.register(_writer.close)
+            _register_writer_metrics(_writer)
+    return _writer
+
+def _register_writer_metrics(writer: WriteBehindQueue):
+    REGISTRY.register("presto_log_queue_depth", lambda: writer.stats()["queue_depth"])
+    REGISTRY.register("presto_log_last_flush_ms", lambda: writer.stats()["last_flush_ms"])
+    for name in ("written", "flushes", "retries", "spilled", "dropped"):
+        REGISTRY.register(f"presto_log_{name}_total", lambda name=name: writer.stats()[name], kind="counter")
 
-try:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-except Exception as e:
-    st.error("Could not connect to Supabase. Please check your .env file and Supabase credentials.")
-    st.stop()
+def log_writer_stats() -> dict | None:
+    """Counters of the write-behind queue (None until the first save)."""
+    return _writer.stats() if _writer is not None else None
 
-def save_log(text, analysis, entities):
-    """Save a new log entry. Relies on Supabase's default created_at column."""
+@timed("db.save_log")
+def save_log(text, analysis, entities, on_saved=None):
+    """
+    Save a new log entry. The store assigns id and created_at; on_saved(log_id) is
+    called once the entry is written (later, on the writer thread, with write-behind).
+    """
     try:
-        supabase.table("logs").insert({
-            "text": text,
-            "analysis": analysis,
-            "entities": json.dumps(entities)
-        }).execute()
+        if LOG_WRITE_BEHIND:
+            if not get_log_writer().put(text, analysis, entities, on_saved):
+                st.warning("Log queue is full; this analysis was not saved.")
+        else:
+            log_id = get_store().save_log(text, analysis, entities)
+            if on_saved is not None:
+                on_saved(log_id)
     except Exception as e:
         st.error(f"DB Error: Could not save log. {e}")
 
+def _flush_pending_logs():
+    if _writer is not None:
+        _writer.flush()
+
+@timed("db.load_logs_by_role")
 def load_logs_by_role(role: str, limit: int = 5):
     """Fetches logs from the database, respecting RBAC."""
     try:
         # Full data for Operative, limited for others (app logic decides what to show)
-        query = supabase.table('logs').select('*').order('created_at', desc=True).limit(limit)
-        response = query.execute()
-        return response.data
+        return get_store().load_logs(limit)
     except Exception as e:
         st.error(f"DB Error: Could not load role-based logs. {e}")
         return []
 
+@timed("db.load_history")
+def load_history(limit: int = 5, before: tuple | None = None):
+    """One page of the history sidebar (previews, no full texts); before is the (created_at, id) cursor."""
+    try:
+        return get_store().load_history(limit=limit, before=before)
+    except Exception as e:
+        st.error(f"DB Error: Could not load history. {e}")
+        return []
+
+@timed("db.count_logs")
+def count_logs() -> int:
+    try:
+        return get_store().count_logs()
+    except Exception as e:
+        st.error(f"DB Error: Could not count logs. {e}")
+        return 0
+
+@timed("db.load_log_text")
+def load_log_text(log_id):
+    """Full text of one log, fetched when an Operative asks for it."""
+    try:
+        return get_store().load_log_text(log_id)
+    except Exception as e:
+        st.error(f"DB Error: Could not load log text. {e}")
+        return None
+
+@timed("db.load_all_logs")
 def load_all_logs():
-    """Fetches all log records for the dashboard."""
+    """Fetches all log records (prefer load_dashboard_stats for the dashboard)."""
     try:
-        response = supabase.table('logs').select('*').order('created_at', desc=True).execute()
-        return response.data
+        return get_store().load_all_logs()
     except Exception as e:
         st.error(f"DB Error: Could not load all logs for dashboard. {e}")
         return []
 
+@timed("db.delete_log")
 def delete_log(log_id):
     """Delete a specific log entry by ID."""
     try:
-        supabase.table("logs").delete().eq("id", log_id).execute()
+        get_store().delete_log(log_id)
     except Exception as e:
         st.error(f"DB Error: Could not delete log. {e}")
 
+@timed("db.delete_all_logs")
 def delete_all_logs():
     """Delete all log entries."""
     try:
-        supabase.table("logs").delete().neq("id", 0).execute() # Deletes all rows
+        # Otherwise queued saves would land after the delete
+        _flush_pending_logs()
+        get_store().delete_all_logs()
+    except Exception as e:
+        st.error(f"DB Error: Could not delete all logs. {e}")
+
+@timed("db.load_dashboard_stats")
+def load_dashboard_stats():
+    """
+    Dashboard numbers computed by the database: {"total", "latest", "by_risk": {level: count},
+    "entity_types": {label: count}}. Supabase needs sql/001_dashboard_stats.sql applied.
+    """
+    empty = {"total": 0, "latest": None, "by_risk": {}, "entity_types": {}}
+    try:
+        return get_store().dashboard_stats() or empty
+    except Exception as e:
+        st.error(f"DB Error: Could not load dashboard statistics. {e}")
+        return empty
+
+@timed("db.search_logs")
+def search_logs(query: str | None = None, entity: str | None = None, label: str | None = None,
+                since: str | None = None, limit: int = 50):
+    """Searches the log by full text, entity, entity label and start time (Operative history search)."""
+    try:
+        return get_store().search_logs(query=query, entity=entity, label=label, since=since, limit=limit)
     except Exception as e:
-        st.error(f"DB Error: Could not delete all logs. {e}")
\ No newline at end of file
+        st.error(f"DB Error: Could not search logs. {e}")
+        return []
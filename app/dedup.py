@@ -0,0 +1,130 @@
+"""
+Near-duplicate detection for incoming intercepts. Each analyzed text gets a
+MinHash signature over its word shingles; an LSH index over the signatures
+finds earlier documents that are nearly the same text (a forwarded report with
+a new header, a re-sent message with small edits) without comparing against
+every document.
+
+A near-duplicate is only reused when the rule engine sees the same thing in
+both texts (the Critical keyword override and the custom entities), so an
+appended "bomb" is never hidden behind an earlier Benign result.
+"""
+import re
+import time
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+
+from models.rules import get_rule_engine
+
+# Words per shingle
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+# LSH bands of NUM_PERM // BANDS rows: pairs above ~0.5 Jaccard become candidates,
+# which are then checked against the real threshold
+BANDS = 16
+_PRIME = (1 << 61) - 1
+# Fixed seed so signatures stay comparable across processes and restarts
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Overlapping runs of size words, case- and punctuation-insensitive."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash(text: str) -> tuple:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles(text)]
+    if not hashes:
+        return tuple([_PRIME] * NUM_PERM)
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def rule_hits(text: str) -> tuple:
+    """(is_critical, sorted (term, label) custom entities): the rule engine's view of text."""
+    rules = get_rule_engine()
+    entities = {(" ".join(word.lower().split()), label) for word, label, _, _ in rules.custom_entities(text)}
+    return (rules.is_critical(text), tuple(sorted(entities)))
+
+def similarity(signature_a: tuple, signature_b: tuple) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(a == b for a, b in zip(signature_a, signature_b)) / NUM_PERM
+
+class NearDuplicateIndex:
+    """
+    LSH index of analyzed documents and their results, bounded to max_entries
+    (least recently matched first out). scope keeps results from different
+    models, rules or settings apart. Thread-safe: Streamlit sessions share one instance.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 10000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "rule_mismatches": 0, "lookup_ms_total": 0.0}
+
+    @staticmethod
+    def _bands(signature: tuple, scope: str):
+        rows = NUM_PERM // BANDS
+        for band in range(BANDS):
+            yield (scope, band, signature[band * rows:(band + 1) * rows])
+
+    def find(self, text: str, scope: str = "", signature: tuple | None = None) -> tuple | None:
+        """
+        Most similar earlier document at or above the threshold with the same rule
+        hits, as (similarity, entry) where entry has key, result, analyzed_at and
+        log_id (None until set_log_id); None if there is none.
+        """
+        start = time.perf_counter()
+        signature = signature or minhash(text)
+        hits = rule_hits(text)
+        best = None
+        with self.lock:
+            candidates = set()
+            for band in self._bands(signature, scope):
+                candidates |= self.buckets.get(band, set())
+            for key in candidates:
+                score = similarity(signature, self.entries[key]["signature"])
+                if score < self.threshold or (best is not None and score <= best[0]):
+                    continue
+                if self.entries[key]["rule_hits"] != hits:
+                    self.stats["rule_mismatches"] += 1
+                    continue
+                best = (score, self.entries[key])
+            if best is not None:
+                self.entries.move_to_end(best[1]["key"])
+                self.stats["hits"] += 1
+            self.stats["lookups"] += 1
+            self.stats["lookup_ms_total"] += (time.perf_counter() - start) * 1000
+        return best
+
+    def add(self, key: str, text: str, result: dict, scope: str = "", signature: tuple | None = None):
+        signature = signature or minhash(text)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = {"key": key, "scope": scope, "signature": signature, "rule_hits": rule_hits(text),
+                                 "result": result, "analyzed_at": time.time(), "log_id": None}
+            for band in self._bands(signature, scope):
+                self.buckets.setdefault(band, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def set_log_id(self, key: str, log_id):
+        """Records the intelligence log entry of the document added under key, if still indexed."""
+        with self.lock:
+            if key in self.entries:
+                self.entries[key]["log_id"] = log_id
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key)
+        for band in self._bands(entry["signature"], entry["scope"]):
+            keys = self.buckets.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.buckets[band]
@@ -0,0 +1,272 @@
+"""
+Background analysis jobs. Uploads are queued in an SQLite table and analyzed
+by a small pool of worker threads, so a long document no longer holds up the
+Streamlit script run and concurrent analysts queue instead of all hitting the
+models at once. The page polls the job and renders its progress.
+
+Jobs run highest priority first (the uploader's clearance level). A job gains
+one priority level per aging_seconds it waits, so low-clearance work is never
+starved. Identical uploads share one job; each session that submitted it is
+recorded, a higher-clearance submitter raises a queued job's priority, and a
+cancel only withdraws that submitter until none is left. Queued jobs are then
+cancelled at once; running jobs stop at their next progress report (between
+windows of a long document), or their result is discarded if they finish first.
+Jobs left running by a crashed process are re-queued on start, so use one job
+database per app process.
+"""
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+from models.metrics import REGISTRY
+
+FINISHED = ("done", "failed", "cancelled")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,              -- queued | running | done | failed | cancelled
+    priority INTEGER NOT NULL,
+    role TEXT,
+    cache_key TEXT,
+    text TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    progress REAL NOT NULL DEFAULT 0,
+    partial TEXT,                      -- JSON snapshot of the results so far
+    result TEXT,                       -- JSON results once done
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    submitter TEXT                     -- who created the job; later identical uploads only join it
+);
+CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, priority, submitted_at);
+CREATE INDEX IF NOT EXISTS jobs_cache_key_idx ON jobs (cache_key);
+CREATE INDEX IF NOT EXISTS jobs_finished_at_idx ON jobs (finished_at);
+CREATE TABLE IF NOT EXISTS job_submitters (
+    job_id TEXT NOT NULL,
+    submitter TEXT NOT NULL,           -- e.g. a Streamlit session id
+    PRIMARY KEY (job_id, submitter)
+);
+"""
+
+class JobCancelled(Exception):
+    """Raised from a progress report when the job has been cancelled."""
+
+class JobStore:
+    """Persistent job table. Claims are atomic, so several workers (or processes) can share it."""
+
+    def __init__(self, path: str, aging_seconds: float = 30.0, retention_seconds: float = 86400.0):
+        if aging_seconds < 0:
+            raise ValueError("aging_seconds must be >= 0 (0 disables aging)")
+        self.path = path
+        self.aging_seconds = aging_seconds
+        self.retention_seconds = retention_seconds
+        self.local = threading.local()
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        if "submitter" not in {row["name"] for row in self._query("PRAGMA table_info(jobs)")}:
+            # Job databases from before the creating submitter was recorded
+            conn.execute("ALTER TABLE jobs ADD COLUMN submitter TEXT")
+        with conn:
+            # Jobs a previous process was running when it died
+            conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL, progress = 0, partial = NULL "
+                         "WHERE status = 'running'")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        return [dict(row) for row in self._connection().execute(sql, params).fetchall()]
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        return self._connection().execute(sql, params).rowcount
+
+    def _score_sql(self) -> str:
+        """
+        Effective priority, higher runs first. priority + waited / aging_seconds grows at the
+        same rate for every queued job, so ordering by priority - submitted_at / aging_seconds
+        gives the same order without depending on the current time. aging_seconds=0 disables aging.
+        """
+        if not self.aging_seconds:
+            return "priority"
+        return f"(priority - submitted_at / {float(self.aging_seconds)})"
+
+    def submit(self, text: str, priority: int = 0, role: str | None = None, cache_key: str | None = None,
+               submitter: str | None = None) -> str:
+        """
+        Queues a job and returns its id. A queued, running or finished job for the
+        same cache_key is reused, so identical uploads share one analysis; a queued
+        one takes the higher of the two priorities. The job's "submitter" stays the
+        one that created it.
+        """
+        now = time.time()
+        self._execute("DELETE FROM jobs WHERE finished_at < ?", (now - self.retention_seconds,))
+        self._execute("DELETE FROM job_submitters WHERE job_id NOT IN (SELECT id FROM jobs)")
+        rows = []
+        if cache_key:
+            rows = self._query("SELECT id FROM jobs WHERE cache_key = ? AND status IN ('queued', 'running', 'done') "
+                               "ORDER BY submitted_at DESC LIMIT 1", (cache_key,))
+        if rows:
+            job_id = rows[0]["id"]
+            # SET expressions all see the old priority, so role follows the priority that wins
+            self._execute("UPDATE jobs SET role = CASE WHEN ? > priority THEN ? ELSE role END, priority = MAX(priority, ?) "
+                          "WHERE id = ? AND status = 'queued'", (priority, role, priority, job_id))
+        else:
+            job_id = uuid.uuid4().hex
+            self._execute("INSERT INTO jobs (id, status, priority, role, cache_key, text, submitted_at, submitter) "
+                          "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)", (job_id, priority, role, cache_key, text, now, submitter))
+        if submitter:
+            self._execute("INSERT OR IGNORE INTO job_submitters (job_id, submitter) VALUES (?, ?)", (job_id, submitter))
+        return job_id
+
+    def claim(self) -> dict | None:
+        """Marks the next job by effective priority as running and returns it; None if nothing is queued."""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(f"SELECT * FROM jobs WHERE status = 'queued' ORDER BY {self._score_sql()} DESC, "
+                                "submitted_at LIMIT 1").fetchall()
+            if not rows:
+                conn.execute("COMMIT")
+                return None
+            job = dict(rows[0])
+            conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (now, job["id"]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        job.update(status="running", started_at=now)
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        """The job without its text; partial and result are decoded."""
+        rows = self._query("SELECT id, status, priority, role, cache_key, submitted_at, started_at, finished_at, "
+                           "progress, partial, result, error, cancel_requested, submitter FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = rows[0]
+        for key in ("partial", "result"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def position(self, job_id: str) -> int | None:
+        """Queued jobs that will run before this one (None unless it is queued)."""
+        score = self._score_sql()
+        mine = self._query(f"SELECT {score} AS score, submitted_at FROM jobs WHERE id = ? AND status = 'queued'", (job_id,))
+        if not mine:
+            return None
+        rows = self._query(f"SELECT COUNT(*) AS n FROM jobs WHERE status = 'queued' AND id != ? "
+                           f"AND ({score} > ? OR ({score} = ? AND submitted_at < ?))",
+                           (job_id, mine[0]["score"], mine[0]["score"], mine[0]["submitted_at"]))
+        return rows[0]["n"]
+
+    def report(self, job_id: str, progress: float, partial: dict | None = None):
+        """Stores progress and a snapshot of the results so far; raises JobCancelled if cancellation was requested."""
+        self._execute("UPDATE jobs SET progress = ?, partial = ? WHERE id = ?",
+                      (progress, json.dumps(partial) if partial is not None else None, job_id))
+        if self.cancel_requested(job_id):
+            raise JobCancelled(job_id)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        rows = self._query("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,))
+        return bool(rows and rows[0]["cancel_requested"])
+
+    def cancel(self, job_id: str, submitter: str | None = None) -> bool:
+        """
+        Withdraws submitter from the job, then cancels it if no submitter is left (at once
+        when queued, at its next report when running). Without a submitter the job is
+        cancelled outright. True if the job was cancelled or asked to stop.
+        """
+        if submitter:
+            self._execute("DELETE FROM job_submitters WHERE job_id = ? AND submitter = ?", (job_id, submitter))
+            if self._query("SELECT 1 FROM job_submitters WHERE job_id = ? LIMIT 1", (job_id,)):
+                return False
+        if self._execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                         (time.time(), job_id)):
+            return True
+        return bool(self._execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,)))
+
+    def finish(self, job_id: str, status: str, result: dict | None = None, error: str | None = None):
+        self._execute("UPDATE jobs SET status = ?, result = ?, error = ?, progress = 1, finished_at = ? WHERE id = ?",
+                      (status, json.dumps(result) if result is not None else None, error, time.time(), job_id))
+
+    def counts(self) -> dict:
+        """Jobs per status."""
+        return {row["status"]: row["n"] for row in self._query("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+
+class JobQueue:
+    """
+    Worker threads that claim jobs from a JobStore and run handler(text, report) on
+    them. report(progress, partial) records progress and raises JobCancelled once
+    the job is cancelled; the handler's return value (JSON-serializable) is the result.
+    """
+
+    def __init__(self, store: JobStore, handler, workers: int = 2, poll_interval: float = 1.0):
+        self.store = store
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self.wakeup = threading.Event()
+        self.closed = threading.Event()
+        self.threads = [threading.Thread(target=self._run, name=f"presto-job-{i}", daemon=True) for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+        REGISTRY.register("presto_jobs_queued", lambda: self.store.counts().get("queued", 0))
+        REGISTRY.register("presto_jobs_running", lambda: self.store.counts().get("running", 0))
+
+    def submit(self, text: str, priority: int = 0, role: str | None = None, cache_key: str | None = None,
+               submitter: str | None = None) -> str:
+        job_id = self.store.submit(text, priority, role, cache_key, submitter)
+        self.wakeup.set()
+        return job_id
+
+    def cancel(self, job_id: str, submitter: str | None = None) -> bool:
+        return self.store.cancel(job_id, submitter)
+
+    def close(self, timeout: float = 5.0):
+        self.closed.set()
+        self.wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self.closed.is_set():
+            job = self.store.claim()
+            if job is None:
+                # Other processes may queue jobs too, so poll as well as wait for submit()
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+                continue
+            self._process(job)
+
+    def _process(self, job: dict):
+        job_id = job["id"]
+        REGISTRY.observe("presto_job_wait_seconds", job["started_at"] - job["submitted_at"], priority=job["priority"])
+        start = time.perf_counter()
+        try:
+            if self.store.cancel_requested(job_id):
+                raise JobCancelled(job_id)
+            result = self.handler(job["text"], lambda progress, partial=None: self.store.report(job_id, progress, partial))
+            # Finished before it noticed the cancellation: the caller no longer wants the result
+            if self.store.cancel_requested(job_id):
+                raise JobCancelled(job_id)
+            self.store.finish(job_id, "done", result)
+            status = "done"
+        except JobCancelled:
+            self.store.finish(job_id, "cancelled")
+            status = "cancelled"
+        except Exception as e:
+            self.store.finish(job_id, "failed", error=f"{type(e).__name__}: {e}")
+            status = "failed"
+        REGISTRY.observe("presto_job_run_seconds", time.perf_counter() - start, status=status)
+        REGISTRY.inc("presto_jobs_total", status=status)
@@ -0,0 +1,31 @@
+"""
+Rebuilds the entity and full-text search indexes from the rows already in the log.
+Run once after upgrading an existing database; new logs are indexed as they are saved.
+
+Examples:
+    python app/reindex.py --storage sqlite --sqlite-path presto.db
+    SUPABASE_URL=... SUPABASE_KEY=... python app/reindex.py --storage supabase
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from storage import create_store
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storage", default=os.getenv("PRESTO_STORAGE", "sqlite" if os.getenv("PRESTO_SQLITE_PATH") else "supabase"),
+                        choices=["sqlite", "supabase"])
+    parser.add_argument("--sqlite-path", default=os.getenv("PRESTO_SQLITE_PATH", "presto.db"))
+    args = parser.parse_args()
+
+    store = create_store(args.storage, url=os.getenv("SUPABASE_URL"), key=os.getenv("SUPABASE_KEY"), path=args.sqlite_path)
+    start = time.perf_counter()
+    indexed = store.backfill_index()
+    print(f"Indexed {indexed} entities in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
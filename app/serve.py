@@ -0,0 +1,27 @@
+"""
+Boot entrypoint for containers. Starts loading and warming up the models, then
+runs the Streamlit app in the same process, so PRESTO_READY_FILE is written
+without waiting for the first visitor and the first session finds the models warm.
+
+Usage (extra arguments go to `streamlit run`):
+    PRESTO_READY_FILE=/tmp/presto.ready python app/serve.py --server.port 8501
+"""
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(APP_DIR))
+sys.path.append(APP_DIR)
+
+from startup import start_warmup
+
+def main():
+    # Same condition as app.py: no in-process models with an inference service or worker processes
+    if not os.getenv("PRESTO_INFERENCE_URL") and os.getenv("PRESTO_EXECUTION_MODE", "threads") != "processes":
+        start_warmup()
+    from streamlit.web import cli as stcli
+    sys.argv = ["streamlit", "run", os.path.join(APP_DIR, "app.py"), *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Standalone inference service. Loads both models once and serves them over HTTP,
+gathering concurrent requests into micro-batches before they reach the pipelines.
+
+Run:
+    python app/server.py --port 8600 --max-batch-size 16 --max-wait-ms 10
+
+Endpoints (JSON body {"text": "..."}, optionally with "risk_mode" and "aggregation"):
+    POST /ner       -> {"entities": [[word, label], ...]}
+    POST /classify  -> {"risk_level": ..., "risk_details": ..., "evidence": ...}
+    POST /analyze   -> both of the above in one response
+    GET  /health
+    GET  /metrics   -> per-stage latency histograms in Prometheus text format
+
+Risk assessment follows PRESTO_RISK_MODE / PRESTO_RISK_AGGREGATION (or the request's
+own settings), and documents past PRESTO_STREAMING_THRESHOLD_TOKENS are analyzed
+window by window outside the micro-batches, as in the app.
+"""
+import os
+import sys
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# This adds the parent directory (your project root) to Python's search path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from models.classifier import get_risk_assessments, AGGREGATIONS
+from models.NER import get_entities_batch
+from models.loader import load_ner_pipeline, load_classifier_pipeline
+from models.metrics import REGISTRY
+from models.streaming import analyze_chunked, needs_streaming, STREAMING_THRESHOLD_TOKENS
+
+MAX_BATCH_SIZE = int(os.getenv("PRESTO_MAX_BATCH_SIZE", "16"))
+MAX_WAIT_MS = float(os.getenv("PRESTO_MAX_WAIT_MS", "10"))
+RISK_MODE = os.getenv("PRESTO_RISK_MODE", "auto")
+RISK_AGGREGATION = os.getenv("PRESTO_RISK_AGGREGATION", "max")
+
+# --- MICRO-BATCHING ---
+class MicroBatcher:
+    """
+    Collects items submitted by concurrent requests and hands them to process_batch
+    as one list, once max_batch_size items are waiting or max_wait_ms has passed
+    since the first one arrived. process_batch runs on a dedicated thread so the
+    event loop keeps accepting requests while a batch is in the model. If a batch
+    fails, its items are retried one by one so only the failing request errors.
+    """
+
+    def __init__(self, process_batch, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.stats = {"batches": 0, "items": 0, "fallbacks": 0}
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, items)
+            except Exception as e:
+                if len(batch) == 1:
+                    self._resolve(batch[0][1], error=e)
+                    continue
+                # One bad input should not fail every request batched with it
+                self.stats["fallbacks"] += 1
+                for item, future in batch:
+                    try:
+                        result = (await loop.run_in_executor(self.executor, self.process_batch, [item]))[0]
+                    except Exception as item_error:
+                        self._resolve(future, error=item_error)
+                    else:
+                        self._resolve(future, result)
+                continue
+            self.stats["batches"] += 1
+            self.stats["items"] += len(items)
+            for (_, future), result in zip(batch, results):
+                self._resolve(future, result)
+
+    @staticmethod
+    def _resolve(future, result=None, error: Exception | None = None):
+        # The request may have been cancelled (client went away) while it waited
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+# --- APP ---
+class TextRequest(BaseModel):
+    text: str
+    risk_mode: str | None = None
+    aggregation: str | None = None
+
+def classify_batch(items: list, classifier_pipeline, batch_size: int) -> list:
+    """
+    Risk assessments for (text, risk mode, aggregation) items; items sharing
+    settings go through get_risk_assessments together.
+    """
+    groups = {}
+    for index, (_, risk_mode, aggregation) in enumerate(items):
+        groups.setdefault((risk_mode, aggregation), []).append(index)
+    assessments = [None] * len(items)
+    for (risk_mode, aggregation), indices in groups.items():
+        texts = [items[i][0] for i in indices]
+        results = get_risk_assessments(texts, classifier_pipeline, batch_size=batch_size, mode=risk_mode, aggregation=aggregation)
+        for index, assessment in zip(indices, results):
+            assessments[index] = assessment
+    return assessments
+
+def create_app(max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS, risk_mode: str = RISK_MODE,
+               risk_aggregation: str = RISK_AGGREGATION, stream_threshold: int = STREAMING_THRESHOLD_TOKENS) -> FastAPI:
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        ner_pipeline = load_ner_pipeline()
+        classifier_pipeline = load_classifier_pipeline()
+        state["pipelines"] = (ner_pipeline, classifier_pipeline)
+        # Long documents bypass the batchers and are analyzed window by window, one at a time
+        state["long"] = ThreadPoolExecutor(max_workers=1)
+        state["ner"] = MicroBatcher(lambda texts: get_entities_batch(texts, ner_pipeline, batch_size=max_batch_size),
+                                    max_batch_size, max_wait_ms)
+        state["classify"] = MicroBatcher(lambda items: classify_batch(items, classifier_pipeline, max_batch_size),
+                                         max_batch_size, max_wait_ms)
+        state["ner"].start()
+        state["classify"].start()
+        yield
+        await state["ner"].stop()
+        await state["classify"].stop()
+        state["long"].shutdown(wait=False)
+
+    app = FastAPI(title="Presto inference service", lifespan=lifespan)
+
+    def settings(request: TextRequest) -> tuple:
+        mode = request.risk_mode or risk_mode
+        aggregation = request.aggregation or risk_aggregation
+        if mode not in ("full", "segmented", "auto") or aggregation not in AGGREGATIONS:
+            raise HTTPException(status_code=422, detail=f"Unknown risk mode or aggregation: {mode}, {aggregation}")
+        return mode, aggregation
+
+    async def analyze_long(request: TextRequest) -> dict | None:
+        """Chunked analysis of a document past the streaming threshold (None for shorter ones)."""
+        mode, aggregation = settings(request)
+        if len(request.text) <= stream_threshold:
+            # Short enough to decide without the tokenizer (see needs_streaming)
+            return None
+        ner_pipeline, classifier_pipeline = state["pipelines"]
+
+        def run():
+            # Tokenizing a long text would stall the event loop, so it is counted here too
+            if not needs_streaming(request.text, classifier_pipeline, stream_threshold):
+                return None
+            result = analyze_chunked(request.text, ner_pipeline, classifier_pipeline,
+                                     risk_mode=mode, risk_aggregation=aggregation)
+            result.pop("entity_spans", None)
+            return result
+
+        return await asyncio.get_running_loop().run_in_executor(state["long"], run)
+
+    async def classify(request: TextRequest) -> dict:
+        mode, aggregation = settings(request)
+        risk_level, risk_details, evidence = await state["classify"].submit((request.text, mode, aggregation))
+        return {"risk_level": risk_level, "risk_details": risk_details, "evidence": evidence}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "batches": {name: state[name].stats for name in ("ner", "classify")}}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        return REGISTRY.render()
+
+    @app.post("/ner")
+    async def ner(request: TextRequest):
+        return {"entities": await state["ner"].submit(request.text)}
+
+    @app.post("/classify")
+    async def classify_endpoint(request: TextRequest):
+        result = await analyze_long(request)
+        if result is not None:
+            return {key: result[key] for key in ("risk_level", "risk_details", "evidence")}
+        return await classify(request)
+
+    @app.post("/analyze")
+    async def analyze(request: TextRequest):
+        result = await analyze_long(request)
+        if result is not None:
+            return result
+        # Both models work on the request at the same time, each within its own batch
+        risk, entities = await asyncio.gather(classify(request), state["ner"].submit(request.text))
+        return {**risk, "entities": entities}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--risk-mode", default=RISK_MODE, choices=["full", "segmented", "auto"])
+    parser.add_argument("--aggregation", default=RISK_AGGREGATION, choices=list(AGGREGATIONS))
+    parser.add_argument("--stream-threshold", type=int, default=STREAMING_THRESHOLD_TOKENS,
+                        help="Classifier tokens above which documents are analyzed in windows")
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(args.max_batch_size, args.max_wait_ms, args.risk_mode, args.aggregation, args.stream_threshold)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+-- Dashboard aggregation pushed down to Postgres (Supabase).
+-- Apply once in the Supabase SQL editor or with psql; the app calls it via rpc("dashboard_stats").
+
+create index if not exists logs_created_at_idx on logs (created_at desc);
+create index if not exists logs_analysis_idx on logs (analysis);
+
+create or replace function dashboard_stats()
+returns json
+language sql
+stable
+as $$
+  select json_build_object(
+    'total', (select count(*) from logs),
+    'latest', (select max(created_at) from logs),
+    'by_risk', coalesce((
+      select json_object_agg(analysis, n)
+      from (select analysis, count(*) as n from logs where analysis is not null group by analysis) r
+    ), '{}'::json),
+    'entity_types', coalesce((
+      select json_object_agg(label, n)
+      from (
+        select e ->> 1 as label, count(*) as n
+        from logs
+        -- entities is JSON text written by save_log; a jsonb column holds it as a JSON string
+        cross join lateral (select coalesce(nullif(entities::text, ''), '[]')::jsonb as raw) as stored
+        cross join lateral (
+          select case when jsonb_typeof(stored.raw) = 'string' then (stored.raw #>> '{}')::jsonb else stored.raw end as doc
+        ) as parsed
+        cross join lateral jsonb_array_elements(
+          case when jsonb_typeof(parsed.doc) = 'array' then parsed.doc else '[]'::jsonb end
+        ) as e
+        where jsonb_typeof(e) = 'array' and e ->> 1 is not null
+        group by 1
+      ) t
+    ), '{}'::json)
+  );
+$$;
@@ -0,0 +1,104 @@
+-- Normalized entity index and full-text search for the logs table (Supabase).
+-- Apply once after 001_dashboard_stats.sql; then index existing rows with
+--   python app/reindex.py --storage supabase
+-- The app calls search_logs() and backfill_log_entities() via rpc.
+
+create table if not exists log_entities (
+  log_id bigint not null references logs (id) on delete cascade,
+  surface text not null,
+  form text not null,
+  label text not null
+);
+create index if not exists log_entities_form_idx on log_entities (form, label, log_id);
+create index if not exists log_entities_label_idx on log_entities (label, log_id);
+create index if not exists log_entities_log_idx on log_entities (log_id);
+
+-- Full-text index over the text ('simple' config: intercepts are multilingual, so no stemming)
+alter table logs add column if not exists text_tsv tsvector
+  generated always as (to_tsvector('simple', coalesce(text, ''))) stored;
+create index if not exists logs_text_tsv_idx on logs using gin (text_tsv);
+
+-- Same normalization as storage.base.normalize_entity
+create or replace function normalize_entity(word text)
+returns text
+language sql
+immutable
+as $$
+  select lower(regexp_replace(btrim(word), '\s+', ' ', 'g'));
+$$;
+
+-- (surface, label) pairs from a logs.entities value (JSON text, or a jsonb column holding it as a JSON string)
+create or replace function entity_pairs(raw text)
+returns table (surface text, label text)
+language sql
+immutable
+as $$
+  select e ->> 0, e ->> 1
+  from (select coalesce(nullif(raw, ''), '[]')::jsonb as doc) as stored
+  cross join lateral (
+    select case when jsonb_typeof(stored.doc) = 'string' then (stored.doc #>> '{}')::jsonb else stored.doc end as doc
+  ) as parsed
+  cross join lateral jsonb_array_elements(
+    case when jsonb_typeof(parsed.doc) = 'array' then parsed.doc else '[]'::jsonb end
+  ) as e
+  where jsonb_typeof(e) = 'array' and e ->> 0 is not null and e ->> 1 is not null;
+$$;
+
+create or replace function index_log_entities()
+returns trigger
+language plpgsql
+as $$
+begin
+  delete from log_entities where log_id = new.id;
+  insert into log_entities (log_id, surface, form, label)
+  select new.id, p.surface, normalize_entity(p.surface), p.label
+  from entity_pairs(new.entities::text) as p;
+  return new;
+end;
+$$;
+
+drop trigger if exists logs_index_entities on logs;
+create trigger logs_index_entities
+  after insert or update of entities on logs
+  for each row execute function index_log_entities();
+
+create or replace function search_logs(
+  query text default null,
+  entity text default null,
+  entity_label text default null,
+  since timestamptz default null,
+  max_rows integer default 50
+)
+returns table (id bigint, created_at timestamptz, text text, analysis text, entities text)
+language sql
+stable
+as $$
+  select l.id, l.created_at, l.text, l.analysis, l.entities::text
+  from logs l
+  where (nullif(btrim(query), '') is null or l.text_tsv @@ websearch_to_tsquery('simple', query))
+    and (nullif(btrim(entity), '') is null or l.id in (
+      select e.log_id from log_entities e
+      where e.form = normalize_entity(entity) and (entity_label is null or e.label = entity_label)))
+    and (nullif(btrim(entity), '') is not null or entity_label is null or l.id in (
+      select e.log_id from log_entities e where e.label = entity_label))
+    and (since is null or l.created_at >= since)
+  order by l.created_at desc
+  limit max_rows;
+$$;
+
+create or replace function backfill_log_entities()
+returns integer
+language plpgsql
+as $$
+declare
+  indexed integer;
+begin
+  truncate log_entities;
+  insert into log_entities (log_id, surface, form, label)
+  select l.id, p.surface, normalize_entity(p.surface), p.label
+  from logs l
+  cross join lateral entity_pairs(l.entities::text) as p;
+  get diagnostics indexed = row_count;
+  return indexed;
+end;
+$$;
@@ -0,0 +1,49 @@
+-- History sidebar: keyset-paginated pages with a server-side preview instead of full texts.
+-- Apply once after 002_entity_search.sql; the app calls log_history() and search_logs() via rpc.
+
+-- (created_at, id) is the history sort and pagination key
+create index if not exists logs_created_at_id_idx on logs (created_at desc, id desc);
+
+create or replace function log_history(
+  before_created_at timestamptz default null,
+  before_id bigint default null,
+  max_rows integer default 5,
+  preview_chars integer default 200
+)
+returns table (id bigint, created_at timestamptz, preview text, truncated boolean, analysis text, entities text)
+language sql
+stable
+as $$
+  select l.id, l.created_at, left(l.text, preview_chars), length(l.text) > preview_chars, l.analysis, l.entities::text
+  from logs l
+  where before_created_at is null or (l.created_at, l.id) < (before_created_at, before_id)
+  order by l.created_at desc, l.id desc
+  limit max_rows;
+$$;
+
+-- search_logs now returns history rows (preview instead of the full text)
+drop function if exists search_logs(text, text, text, timestamptz, integer);
+create or replace function search_logs(
+  query text default null,
+  entity text default null,
+  entity_label text default null,
+  since timestamptz default null,
+  max_rows integer default 50,
+  preview_chars integer default 200
+)
+returns table (id bigint, created_at timestamptz, preview text, truncated boolean, analysis text, entities text)
+language sql
+stable
+as $$
+  select l.id, l.created_at, left(l.text, preview_chars), length(l.text) > preview_chars, l.analysis, l.entities::text
+  from logs l
+  where (nullif(btrim(query), '') is null or l.text_tsv @@ websearch_to_tsquery('simple', query))
+    and (nullif(btrim(entity), '') is null or l.id in (
+      select e.log_id from log_entities e
+      where e.form = normalize_entity(entity) and (entity_label is null or e.label = entity_label)))
+    and (nullif(btrim(entity), '') is not null or entity_label is null or l.id in (
+      select e.log_id from log_entities e where e.label = entity_label))
+    and (since is null or l.created_at >= since)
+  order by l.created_at desc
+  limit max_rows;
+$$;
@@ -0,0 +1,39 @@
+-- Schema for the embedded SQLite log store (PRESTO_STORAGE=sqlite).
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    text TEXT,
+    analysis TEXT,
+    entities TEXT
+);
+-- (created_at, id) is the history sort and pagination key
+DROP INDEX IF EXISTS logs_created_at_idx;
+CREATE INDEX IF NOT EXISTS logs_created_at_id_idx ON logs (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS logs_analysis_idx ON logs (analysis);
+
+-- Normalized entity index: one row per (log, entity) written alongside the log
+CREATE TABLE IF NOT EXISTS log_entities (
+    log_id INTEGER NOT NULL,
+    surface TEXT NOT NULL,
+    form TEXT NOT NULL,
+    label TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS log_entities_form_idx ON log_entities (form, log_id);
+CREATE INDEX IF NOT EXISTS log_entities_label_idx ON log_entities (label, log_id);
+CREATE INDEX IF NOT EXISTS log_entities_log_idx ON log_entities (log_id);
+CREATE TRIGGER IF NOT EXISTS logs_entities_ad AFTER DELETE ON logs BEGIN
+    DELETE FROM log_entities WHERE log_id = old.id;
+END;
+
+-- Full-text index over logs.text, kept in sync by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5 (text, content='logs', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS logs_fts_ai AFTER INSERT ON logs BEGIN
+    INSERT INTO logs_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS logs_fts_ad AFTER DELETE ON logs BEGIN
+    INSERT INTO logs_fts (logs_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS logs_fts_au AFTER UPDATE OF text ON logs BEGIN
+    INSERT INTO logs_fts (logs_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO logs_fts (rowid, text) VALUES (new.id, new.text);
+END;
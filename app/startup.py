@@ -0,0 +1,132 @@
+"""
+Startup subsystem: background model loading with warm-up, a readiness file for
+container probes, and import/startup time reporting.
+
+Streamlit runs the app script only when a browser session connects, so the
+warm-up starts at boot only under app/serve.py, which starts it before handing
+the process to Streamlit.
+
+Import-time report for the heavy modules (each imported in a fresh interpreter):
+    python app/startup.py --json startup_report.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+
+# Written once the models are loaded and warmed up (point a readiness probe at it)
+READY_FILE = os.getenv("PRESTO_READY_FILE")
+# Where the app writes its startup timings when models become ready
+STARTUP_REPORT = os.getenv("PRESTO_STARTUP_REPORT")
+
+# Modules the app needs only after a role is selected or a file is uploaded
+HEAVY_MODULES = ["streamlit", "transformers", "torch", "pandas", "plotly.express", "supabase"]
+
+WARMUP_TEXT = "Warm-up message. The convoy reached the checkpoint near the market on schedule."
+
+class ModelWarmup:
+    """
+    Loads models on a background thread as soon as the app boots and runs one
+    warm-up inference, so the first analysis does not pay for either.
+    """
+
+    def __init__(self, load_models, warmup=None):
+        self.started = time.perf_counter()
+        self.ready = threading.Event()
+        self.models = None
+        self.error = None
+        self.timings = {}
+        self._load_models = load_models
+        self._warmup = warmup
+        self.thread = threading.Thread(target=self._run, name="presto-model-warmup", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            self.models = self._load_models()
+            self.timings["model_load"] = time.perf_counter() - start
+            if self._warmup is not None:
+                start = time.perf_counter()
+                self._warmup(*self.models)
+                self.timings["warmup"] = time.perf_counter() - start
+            self.timings["boot_to_ready"] = time.perf_counter() - self.started
+            mark_ready(self.timings)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def wait(self, timeout: float | None = None):
+        """Blocks until the models are ready and returns them; re-raises a loading failure."""
+        self.ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.models
+
+def load_models() -> tuple:
+    from models.loader import load_ner_pipeline, load_classifier_pipeline
+    return load_ner_pipeline(), load_classifier_pipeline()
+
+def warm_up_models(ner_pipeline, classifier_pipeline):
+    """One throwaway analysis so lazy weight init and kernel selection happen before the first user."""
+    from models.runner import run_analysis
+    run_analysis(WARMUP_TEXT, ner_pipeline, classifier_pipeline, mode="sequential",
+                 risk_mode=os.getenv("PRESTO_RISK_MODE", "auto"), risk_aggregation=os.getenv("PRESTO_RISK_AGGREGATION", "max"))
+
+_warmup = None
+_warmup_lock = threading.Lock()
+
+def start_warmup() -> ModelWarmup:
+    """
+    The process-wide ModelWarmup, started by the first caller: app/serve.py at boot,
+    otherwise the app's first script run.
+    """
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = ModelWarmup(load_models, warmup=warm_up_models)
+    return _warmup
+
+def mark_ready(timings: dict):
+    """Touches READY_FILE and writes the startup report, if configured."""
+    if STARTUP_REPORT:
+        with open(STARTUP_REPORT, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.time(), **timings}, f, indent=2)
+    if READY_FILE:
+        with open(READY_FILE, "w", encoding="utf-8") as f:
+            f.write("ready\n")
+
+# --- IMPORT-TIME REPORT ---
+def measure_import(module: str) -> float | None:
+    """Seconds to import module in a fresh interpreter (None if it is not installed)."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    return float(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = {"imports": {module: measure_import(module) for module in HEAVY_MODULES}}
+    if STARTUP_REPORT and os.path.exists(STARTUP_REPORT):
+        with open(STARTUP_REPORT, encoding="utf-8") as f:
+            report["last_startup"] = json.load(f)
+
+    for module, seconds in report["imports"].items():
+        print(f"{module:>16}: {'not installed' if seconds is None else f'{seconds:.2f}s'}")
+    for key, seconds in report.get("last_startup", {}).items():
+        if key != "timestamp":
+            print(f"{key:>16}: {seconds:.2f}s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
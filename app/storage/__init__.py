@@ -0,0 +1,16 @@
+"""
+Storage backends for the intelligence log. db.py talks to a LogStore; pick one
+with PRESTO_STORAGE ("supabase" or "sqlite").
+"""
+from storage.base import LogStore
+from storage.write_behind import WriteBehindQueue
+
+def create_store(backend: str, **options) -> LogStore:
+    """Builds the LogStore for backend ("supabase" needs url/key, "sqlite" needs path)."""
+    if backend == "sqlite":
+        from storage.sqlite_store import SQLiteStore
+        return SQLiteStore(options["path"])
+    if backend == "supabase":
+        from storage.supabase_store import SupabaseStore
+        return SupabaseStore(options["url"], options["key"])
+    raise ValueError(f"Unknown storage backend: {backend}")
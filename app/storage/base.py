@@ -0,0 +1,80 @@
+import json
+
+def normalize_entity(word: str) -> str:
+    """Form entities are indexed and searched by: lowercased, whitespace collapsed."""
+    return " ".join(str(word).lower().split())
+
+def parse_entities(raw) -> list:
+    """(word, label) pairs from a logs.entities value (JSON text, a JSON-encoded string, or a list)."""
+    try:
+        while isinstance(raw, str):
+            raw = json.loads(raw) if raw else []
+    except ValueError:
+        return []
+    if not isinstance(raw, list):
+        return []
+    return [(str(e[0]), str(e[1])) for e in raw if isinstance(e, (list, tuple)) and len(e) >= 2]
+
+class LogStore:
+    """
+    Interface every storage backend implements. Log rows are dicts with id,
+    created_at, text, analysis and entities (a JSON string). Methods raise on
+    failure; db.py turns errors into UI messages.
+    """
+
+    def save_log(self, text: str, analysis: str, entities: list):
+        """Inserts one log; returns its id."""
+        raise NotImplementedError
+
+    def save_logs(self, records: list) -> list:
+        """
+        Bulk insert of {"text", "analysis", "entities"} dicts; returns the new ids in
+        order. Backends override this with one round trip.
+        """
+        return [self.save_log(record["text"], record["analysis"], record["entities"]) for record in records]
+
+    def load_logs(self, limit: int = 5) -> list:
+        """Most recent logs first."""
+        raise NotImplementedError
+
+    def load_history(self, limit: int = 5, before: tuple | None = None, preview_chars: int = 200) -> list:
+        """
+        One page of history, most recent first, without full texts: dicts with id,
+        created_at, preview (the first preview_chars characters), truncated,
+        analysis and entities. before is the (created_at, id) of the last row of
+        the previous page (keyset pagination).
+        """
+        raise NotImplementedError
+
+    def count_logs(self) -> int:
+        raise NotImplementedError
+
+    def load_log_text(self, log_id) -> str | None:
+        """Full text of one log (None if it no longer exists)."""
+        raise NotImplementedError
+
+    def load_all_logs(self) -> list:
+        raise NotImplementedError
+
+    def delete_log(self, log_id):
+        raise NotImplementedError
+
+    def delete_all_logs(self):
+        raise NotImplementedError
+
+    def dashboard_stats(self) -> dict:
+        """{"total", "latest", "by_risk": {level: count}, "entity_types": {label: count}}"""
+        raise NotImplementedError
+
+    def search_logs(self, query: str | None = None, entity: str | None = None, label: str | None = None,
+                    since: str | None = None, limit: int = 50, preview_chars: int = 200) -> list:
+        """
+        Logs matching every given filter, most recent first: full-text query over
+        the text, an entity (matched on its normalized form), an entity label, and
+        an ISO timestamp lower bound on created_at. Rows have the load_history shape.
+        """
+        raise NotImplementedError
+
+    def backfill_index(self) -> int:
+        """Rebuilds the entity and full-text indexes from existing rows; returns the number of entities indexed."""
+        raise NotImplementedError
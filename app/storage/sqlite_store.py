@@ -0,0 +1,163 @@
+import os
+import json
+import sqlite3
+import threading
+
+from storage.base import LogStore, normalize_entity, parse_entities
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql")
+# Columns of a history row: everything but the full text
+HISTORY_COLUMNS = "logs.id, logs.created_at, substr(logs.text, 1, {n}) AS preview, length(logs.text) > {n} AS truncated, logs.analysis, logs.entities"
+# Rows read per batch when rebuilding the entity index
+BACKFILL_BATCH_SIZE = 5000
+
+def _fts_query(query: str) -> str:
+    """Quotes each word so user input is matched literally, never parsed as FTS5 syntax."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+class SQLiteStore(LogStore):
+    """
+    Embedded SQLite log store for air-gapped deployments. Runs in WAL mode so
+    readers never wait on the writer; each thread gets its own connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        with open(os.path.join(SQL_DIR, "sqlite_schema.sql"), encoding="utf-8") as f:
+            self._connection().executescript(f.read())
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        return [dict(row) for row in self._connection().execute(sql, params).fetchall()]
+
+    def _execute(self, sql: str, params: tuple = ()):
+        conn = self._connection()
+        with conn:
+            conn.execute(sql, params)
+
+    def save_log(self, text, analysis, entities):
+        return self.save_logs([{"text": text, "analysis": analysis, "entities": entities}])[0]
+
+    def save_logs(self, records):
+        conn = self._connection()
+        ids = []
+        with conn:
+            for record in records:
+                cursor = conn.execute("INSERT INTO logs (text, analysis, entities) VALUES (?, ?, ?)",
+                                      (record["text"], record["analysis"], json.dumps(record["entities"])))
+                self._index_entities(conn, cursor.lastrowid, parse_entities(record["entities"]))
+                ids.append(cursor.lastrowid)
+        return ids
+
+    @staticmethod
+    def _index_entities(conn, log_id: int, entities: list):
+        conn.executemany("INSERT INTO log_entities (log_id, surface, form, label) VALUES (?, ?, ?, ?)",
+                         [(log_id, word, normalize_entity(word), label) for word, label in entities])
+
+    def load_logs(self, limit=5):
+        return self._query("SELECT * FROM logs ORDER BY created_at DESC LIMIT ?", (limit,))
+
+    def load_history(self, limit=5, before=None, preview_chars=200):
+        columns = HISTORY_COLUMNS.format(n=int(preview_chars))
+        if before is None:
+            return self._query(f"SELECT {columns} FROM logs ORDER BY created_at DESC, id DESC LIMIT ?", (limit,))
+        return self._query(f"SELECT {columns} FROM logs WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+                           (*before, limit))
+
+    def count_logs(self):
+        return self._query("SELECT COUNT(*) AS n FROM logs")[0]["n"]
+
+    def load_log_text(self, log_id):
+        rows = self._query("SELECT text FROM logs WHERE id = ?", (log_id,))
+        return rows[0]["text"] if rows else None
+
+    def load_all_logs(self):
+        return self._query("SELECT * FROM logs ORDER BY created_at DESC")
+
+    def delete_log(self, log_id):
+        self._execute("DELETE FROM logs WHERE id = ?", (log_id,))
+
+    def delete_all_logs(self):
+        self._execute("DELETE FROM logs")
+
+    def dashboard_stats(self):
+        totals = self._query("SELECT COUNT(*) AS total, MAX(created_at) AS latest FROM logs")[0]
+        by_risk = self._query("SELECT analysis, COUNT(*) AS n FROM logs WHERE analysis IS NOT NULL GROUP BY analysis")
+        entity_types = self._query(
+            "SELECT json_extract(e.value, '$[1]') AS label, COUNT(*) AS n "
+            "FROM logs, json_each(CASE WHEN json_valid(logs.entities) AND json_type(logs.entities) = 'array' "
+            "THEN logs.entities ELSE '[]' END) AS e "
+            "WHERE e.type = 'array' AND label IS NOT NULL GROUP BY label"
+        )
+        return {
+            "total": totals["total"],
+            "latest": totals["latest"],
+            "by_risk": {row["analysis"]: row["n"] for row in by_risk},
+            "entity_types": {row["label"]: row["n"] for row in entity_types},
+        }
+
+    def search_logs(self, query=None, entity=None, label=None, since=None, limit=50, preview_chars=200):
+        # Ids grow with created_at, so newest-first is a backwards walk over an index
+        # ending in log_id that stops after `limit` rows. The full-text index drives
+        # the walk when there is a query, otherwise the entity index does.
+        columns = HISTORY_COLUMNS.format(n=int(preview_chars))
+        query = _fts_query(query) if query and query.strip() else None
+        form = normalize_entity(entity) if entity and entity.strip() else None
+        min_id = 0
+        if since:
+            min_id = self._query("SELECT MIN(id) AS id FROM logs WHERE created_at >= ?", (since,))[0]["id"]
+            if min_id is None:
+                return []
+
+        entity_filters, entity_params = [], []
+        if form:
+            entity_filters.append("e.form = ?")
+            entity_params.append(form)
+        if label:
+            entity_filters.append("e.label = ?")
+            entity_params.append(label)
+
+        if query:
+            sql = f"SELECT {columns} FROM logs_fts JOIN logs ON logs.id = logs_fts.rowid WHERE logs_fts MATCH ? AND logs_fts.rowid >= ?"
+            params = [query, min_id]
+            if entity_filters:
+                sql += " AND EXISTS (SELECT 1 FROM log_entities e WHERE e.log_id = logs.id AND " + " AND ".join(entity_filters) + ")"
+                params += entity_params
+            sql += " ORDER BY logs_fts.rowid DESC LIMIT ?"
+        elif entity_filters:
+            sql = (f"SELECT {columns} FROM log_entities e JOIN logs ON logs.id = e.log_id WHERE " + " AND ".join(entity_filters) +
+                   " AND e.log_id >= ? GROUP BY e.log_id ORDER BY e.log_id DESC LIMIT ?")
+            params = [*entity_params, min_id]
+        else:
+            sql = f"SELECT {columns} FROM logs WHERE id >= ? ORDER BY id DESC LIMIT ?"
+            params = [min_id]
+        return self._query(sql, (*params, limit))
+
+    def backfill_index(self):
+        conn = self._connection()
+        indexed = 0
+        with conn:
+            conn.execute("DELETE FROM log_entities")
+            last_id = 0
+            while True:
+                rows = conn.execute("SELECT id, entities FROM logs WHERE id > ? ORDER BY id LIMIT ?",
+                                    (last_id, BACKFILL_BATCH_SIZE)).fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    entities = parse_entities(row["entities"])
+                    self._index_entities(conn, row["id"], entities)
+                    indexed += len(entities)
+                last_id = rows[-1]["id"]
+            conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+        return indexed
@@ -0,0 +1,78 @@
+import json
+
+from storage.base import LogStore
+
+# Explicit columns, so the text_tsv search column added by sql/002_entity_search.sql is never fetched
+LOG_COLUMNS = "id, created_at, text, analysis, entities"
+
+class SupabaseStore(LogStore):
+    """
+    Logs in the Supabase "logs" table. Dashboard stats need sql/001_dashboard_stats.sql
+    applied, search sql/002_entity_search.sql and history sql/003_history.sql.
+    """
+
+    def __init__(self, url: str, key: str):
+        from supabase import create_client
+        self.client = create_client(url, key)
+
+    def save_log(self, text, analysis, entities):
+        # Relies on Supabase's default created_at column
+        response = self.client.table("logs").insert({
+            "text": text,
+            "analysis": analysis,
+            "entities": json.dumps(entities)
+        }).execute()
+        return response.data[0]["id"]
+
+    def save_logs(self, records):
+        # Inserted rows come back in the order sent
+        response = self.client.table("logs").insert([{
+            "text": record["text"],
+            "analysis": record["analysis"],
+            "entities": json.dumps(record["entities"])
+        } for record in records]).execute()
+        return [row["id"] for row in response.data]
+
+    def load_logs(self, limit=5):
+        return self.client.table("logs").select(LOG_COLUMNS).order("created_at", desc=True).limit(limit).execute().data
+
+    def load_history(self, limit=5, before=None, preview_chars=200):
+        before_created_at, before_id = before or (None, None)
+        return self.client.rpc("log_history", {
+            "before_created_at": before_created_at,
+            "before_id": before_id,
+            "max_rows": limit,
+            "preview_chars": preview_chars
+        }).execute().data
+
+    def count_logs(self):
+        return self.client.table("logs").select("id", count="exact", head=True).execute().count
+
+    def load_log_text(self, log_id):
+        rows = self.client.table("logs").select("text").eq("id", log_id).limit(1).execute().data
+        return rows[0]["text"] if rows else None
+
+    def load_all_logs(self):
+        return self.client.table("logs").select(LOG_COLUMNS).order("created_at", desc=True).execute().data
+
+    def delete_log(self, log_id):
+        self.client.table("logs").delete().eq("id", log_id).execute()
+
+    def delete_all_logs(self):
+        self.client.table("logs").delete().neq("id", 0).execute() # Deletes all rows
+
+    def dashboard_stats(self):
+        return self.client.rpc("dashboard_stats").execute().data
+
+    def search_logs(self, query=None, entity=None, label=None, since=None, limit=50, preview_chars=200):
+        return self.client.rpc("search_logs", {
+            "query": query or None,
+            "entity": entity or None,
+            "entity_label": label or None,
+            "since": since,
+            "max_rows": limit,
+            "preview_chars": preview_chars
+        }).execute().data
+
+    def backfill_index(self):
+        return self.client.rpc("backfill_log_entities").execute().data
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import queue
+import threading
+
+class WriteBehindQueue:
+    """
+    Buffers log records and writes them to a LogStore in bulk on a background
+    thread, so callers never wait on the database.
+
+    A batch is flushed when it reaches max_batch records or flush_interval
+    seconds after its first record. Failed flushes are retried with exponential
+    backoff; a batch that still fails is appended to spill_path (JSONL) and
+    re-sent after the next successful flush. Without a spill file, or when the
+    queue is full, records are dropped and counted.
+
+    put() can take an on_saved callback, called on the writer thread with the
+    record's log id once it is written. Spilled records are sent later without it.
+    """
+
+    def __init__(self, store, max_batch: int = 100, flush_interval: float = 1.0, max_queue: int = 10000,
+                 spill_path: str | None = None, max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 10.0):
+        self.store = store
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.records = queue.Queue(maxsize=max_queue)
+        # id(record) -> on_saved callback, for records still queued
+        self.callbacks = {}
+        self.spill_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.counters = {"enqueued": 0, "written": 0, "flushes": 0, "retries": 0, "failed_flushes": 0,
+                         "spilled": 0, "replayed": 0, "dropped": 0, "flush_ms_total": 0.0, "last_flush_ms": 0.0}
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="presto-log-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, text: str, analysis: str, entities: list, on_saved=None) -> bool:
+        """Queues one log record; returns False if it had to be dropped."""
+        record = {"text": text, "analysis": analysis, "entities": [list(entity) for entity in entities]}
+        if self.closed.is_set():
+            self._count("dropped")
+            return False
+        if on_saved is not None:
+            # Registered first: the writer may take the record as soon as it is queued
+            self.callbacks[id(record)] = on_saved
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            self.callbacks.pop(id(record), None)
+            if self.spill_path:
+                self._spill([record])
+                return True
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Waits until every queued record has been written (or spilled); False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.records.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self.records.unfinished_tasks
+
+    def close(self, timeout: float | None = 30.0):
+        """Stops accepting records, flushes what is queued and waits for the writer thread."""
+        self.closed.set()
+        self.thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self.stats_lock:
+            stats = dict(self.counters)
+        stats["queue_depth"] = self.records.qsize()
+        stats["avg_flush_ms"] = stats["flush_ms_total"] / stats["flushes"] if stats["flushes"] else 0.0
+        return stats
+
+    def _count(self, name: str, amount=1):
+        with self.stats_lock:
+            self.counters[name] += amount
+
+    # --- WRITER THREAD ---
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                log_ids = self._flush(batch)
+                callbacks = [self.callbacks.pop(id(record), None) for record in batch]
+                if log_ids is not None:
+                    self._notify(callbacks, log_ids)
+                    self._replay_spill()
+                else:
+                    self._spill(batch)
+                for _ in batch:
+                    self.records.task_done()
+            elif self.closed.is_set() and self.records.empty():
+                return
+
+    def _next_batch(self) -> list:
+        """Blocks for the first record, then collects until max_batch or flush_interval."""
+        batch = []
+        try:
+            batch.append(self.records.get(timeout=0.1))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            try:
+                if self.closed.is_set():
+                    # Shutting down: take what is already queued without waiting
+                    batch.append(self.records.get_nowait())
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.append(self.records.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _notify(callbacks: list, log_ids: list):
+        for on_saved, log_id in zip(callbacks, log_ids):
+            if on_saved is None:
+                continue
+            try:
+                on_saved(log_id)
+            except Exception:
+                # A caller's bookkeeping must not stop the writer
+                pass
+
+    def _flush(self, batch: list) -> list | None:
+        """Writes batch with retries; returns the new log ids, or None if it failed."""
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                log_ids = self.store.save_logs(batch)
+            except Exception:
+                if attempt == self.max_retries:
+                    self._count("failed_flushes")
+                    return None
+                self._count("retries")
+                # Shutting down: retry straight away rather than hold up the exit
+                if not self.closed.wait(delay):
+                    delay = min(delay * 2, self.max_backoff)
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self.stats_lock:
+                self.counters["written"] += len(batch)
+                self.counters["flushes"] += 1
+                self.counters["flush_ms_total"] += elapsed_ms
+                self.counters["last_flush_ms"] = elapsed_ms
+            return log_ids or []
+        return None
+
+    # --- SPILL FILE ---
+    def _spill(self, batch: list):
+        if not self.spill_path:
+            self._count("dropped", len(batch))
+            return
+        with self.spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+            for record in batch:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._count("spilled", len(batch))
+
+    def _replay_spill(self):
+        """Re-sends spilled records once the store accepts writes again."""
+        if not self.spill_path:
+            return
+        # Move spilled records aside first, so new spills don't race the replay. A
+        # .replay file left by a crash mid-replay is picked up here too
+        replaying = self.spill_path + ".replay"
+        with self.spill_lock:
+            if os.path.exists(self.spill_path):
+                with open(self.spill_path, encoding="utf-8") as src, open(replaying, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(self.spill_path)
+        if not os.path.exists(replaying):
+            return
+        with open(replaying, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        for i in range(0, len(records), self.max_batch):
+            batch = records[i:i + self.max_batch]
+            if self._flush(batch) is None:
+                # The unsent rest stays in the .replay file for the next replay
+                return
+            self._count("replayed", len(batch))
+            # Drop what was written before the next batch, so a crash doesn't send it twice
+            self._write_records(replaying, records[i + self.max_batch:])
+        os.remove(replaying)
+
+    @staticmethod
+    def _write_records(path: str, records: list):
+        """Replaces path with records (JSONL) atomically."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
@@ -0,0 +1,137 @@
+"""
+Trains the risk pre-filter (models/prefilter.py) on the labeled log history and
+reports, on a held-out split, how many texts it would let skip the transformer,
+how often its labels agree with the stored (transformer) labels, and the
+throughput gain that buys.
+
+Labels are the stored risk levels: "Benign" is the positive class, Suspicious
+and Critical the negative. Train on logs analyzed with the cascade off, so the
+pre-filter does not learn from its own decisions.
+
+Examples:
+    python app/train_prefilter.py --storage sqlite --sqlite-path presto.db
+    python app/train_prefilter.py --jsonl labeled.jsonl --label-field risk_level --models
+    PRESTO_PREFILTER=1 streamlit run app/app.py
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from storage import create_store
+from models.prefilter import HashedLinearClassifier, Cascade, PREFILTER_PATH, PREFILTER_THRESHOLD
+
+THRESHOLDS = (0.8, 0.9, 0.95, 0.98, 0.99)
+
+def load_examples(args) -> list:
+    """(text, label) pairs from the log store or a JSONL file."""
+    if args.jsonl:
+        examples = []
+        with open(args.jsonl, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    examples.append((record.get(args.text_field), record.get(args.label_field)))
+    else:
+        store = create_store(args.storage, url=os.getenv("SUPABASE_URL"), key=os.getenv("SUPABASE_KEY"), path=args.sqlite_path)
+        examples = [(row.get("text"), row.get("analysis")) for row in store.load_all_logs()]
+    return [(text, label) for text, label in examples if text and label]
+
+def evaluate(model: HashedLinearClassifier, holdout: list, threshold: float) -> dict:
+    """
+    Cascade decisions on the held-out texts. Escalated texts keep their stored
+    label (the transformer produced it), so disagreements are the skipped texts
+    that are not Benign.
+    """
+    cascade = Cascade(model, threshold, audit_rate=0.0)
+    skipped = missed = 0
+    for text, label in holdout:
+        if cascade.decide(text)[0] == "skip":
+            skipped += 1
+            missed += label != "Benign"
+    risky = sum(label != "Benign" for _, label in holdout)
+    return {"threshold": threshold, "skip_rate": skipped / len(holdout), "agreement": 1 - missed / len(holdout),
+            "missed": missed, "missed_rate": missed / risky if risky else 0.0,
+            "decisions": cascade.summary()}
+
+def measure_model_ms(holdout: list, samples: int, cascade_model: HashedLinearClassifier, threshold: float) -> tuple:
+    """Transformer ms/text on a held-out sample and its live agreement with the cascade on the texts it would skip."""
+    from models.classifier import _model_risk_assessment
+    from models.loader import load_classifier_pipeline
+    classifier = load_classifier_pipeline()
+    texts = [text for text, _ in holdout[:samples]]
+    _model_risk_assessment(texts[0], classifier, "auto", "max")
+    cascade = Cascade(cascade_model, threshold, audit_rate=0.0)
+    skipped = agreed = 0
+    start = time.perf_counter()
+    for text in texts:
+        risk_level = _model_risk_assessment(text, classifier, "auto", "max")[0]
+        if cascade.decide(text)[0] == "skip":
+            skipped += 1
+            agreed += risk_level == "Benign"
+    model_ms = (time.perf_counter() - start) / len(texts) * 1000
+    return model_ms, (agreed / skipped if skipped else None)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storage", default=os.getenv("PRESTO_STORAGE", "sqlite" if os.getenv("PRESTO_SQLITE_PATH") else "supabase"),
+                        choices=["sqlite", "supabase"])
+    parser.add_argument("--sqlite-path", default=os.getenv("PRESTO_SQLITE_PATH", "presto.db"))
+    parser.add_argument("--jsonl", help="Train from a JSONL file instead of the log store")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--label-field", default="analysis")
+    parser.add_argument("--output", default=PREFILTER_PATH)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of the examples kept for the report")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--threshold", type=float, default=PREFILTER_THRESHOLD, help="Threshold whose live agreement --models measures")
+    parser.add_argument("--models", action="store_true", help="Measure the transformer on the held-out set")
+    parser.add_argument("--model-samples", type=int, default=100)
+    parser.add_argument("--analysis-ms", type=float, default=1000.0, help="Assumed transformer cost per text without --models")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    examples = load_examples(args)
+    labels = {label for _, label in examples}
+    if len(examples) < 20 or "Benign" not in labels or labels == {"Benign"}:
+        sys.exit(f"Need at least 20 labeled texts with Benign and non-Benign examples, found {len(examples)} ({sorted(labels)})")
+    random.Random(args.seed).shuffle(examples)
+    split = max(1, int(len(examples) * args.holdout))
+    holdout, train = examples[:split], examples[split:]
+
+    start = time.perf_counter()
+    model = HashedLinearClassifier(meta={"trained_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "examples": len(train)})
+    model.fit([text for text, _ in train], [label == "Benign" for _, label in train], epochs=args.epochs, seed=args.seed)
+    print(f"Trained on {len(train)} texts in {time.perf_counter() - start:.1f}s; {len(holdout)} held out "
+          f"({sum(label == 'Benign' for _, label in holdout)} Benign)")
+    model.save(args.output)
+    print(f"Model written to {args.output}")
+
+    timing_cascade = Cascade(model, args.threshold, audit_rate=0.0)
+    start = time.perf_counter()
+    for text, _ in holdout:
+        timing_cascade.decide(text)
+    prefilter_ms = (time.perf_counter() - start) / len(holdout) * 1000
+    analysis_ms, live_agreement = args.analysis_ms, None
+    if args.models:
+        analysis_ms, live_agreement = measure_model_ms(holdout, args.model_samples, model, args.threshold)
+
+    source = "measured" if args.models else "assumed"
+    print(f"Pre-filter {prefilter_ms:.2f} ms/text, transformer {analysis_ms:.0f} ms/text ({source})")
+    print(f"{'threshold':>9} {'skipped':>8} {'agreement':>10} {'missed risky':>13} {'throughput':>11}")
+    for threshold in THRESHOLDS:
+        report = evaluate(model, holdout, threshold)
+        per_text = prefilter_ms + (1 - report["skip_rate"]) * analysis_ms
+        print(f"{threshold:>9} {report['skip_rate']:>8.1%} {report['agreement']:>10.1%} "
+              f"{report['missed']:>5} ({report['missed_rate']:>5.1%}) {analysis_ms / per_text:>10.2f}x")
+    if live_agreement is not None:
+        print(f"Live agreement at {args.threshold}: {live_agreement:.1%} of the skipped sample texts were Benign for the transformer")
+    print("Enable with PRESTO_PREFILTER=1 (PRESTO_PREFILTER_PATH, PRESTO_PREFILTER_THRESHOLD)")
+
+if __name__ == "__main__":
+    main()
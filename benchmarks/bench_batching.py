@@ -0,0 +1,82 @@
+"""
+Tokens/sec of length-bucketed batching (models/batching.py) against naive
+fixed-size batching on mixed-length inputs: mostly one-line messages with some
+multi-paragraph reports, built from the sample intercepts (1.txt - 6.txt).
+
+Both strategies run the same inputs through the same pipeline; tokens/sec
+counts real (unpadded) tokens, and padding efficiency is real / padded tokens.
+
+Usage:
+    python benchmarks/bench_batching.py --task ner --inputs 512 --batch-size 16 --token-budget 8192
+    python benchmarks/bench_batching.py --task classify --inputs 256
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from models.batching import length_buckets, run_batched, token_lengths
+from models.classifier import CANDIDATE_LABELS
+from models.loader import load_ner_pipeline, load_classifier_pipeline
+from corpus import sample_sentences
+
+def mixed_inputs(count: int, rng: random.Random) -> list:
+    """70% single sentences, 25% short reports (3-10 sentences), 5% long reports (20-40 sentences)."""
+    pool = [s + "." for s in sample_sentences()]
+    inputs = []
+    for _ in range(count):
+        roll = rng.random()
+        n = 1 if roll < 0.7 else rng.randint(3, 10) if roll < 0.95 else rng.randint(20, 40)
+        inputs.append(" ".join(rng.choice(pool) for _ in range(n)))
+    return inputs
+
+def padded_tokens(lengths: list, batches: list, pairs_per_input: int) -> int:
+    return sum(len(batch) * pairs_per_input * max(lengths[i] for i in batch) for batch in batches)
+
+def time_run(fn, repeats: int) -> float:
+    fn()  # warm-up
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--task", default="ner", choices=["ner", "classify"])
+    parser.add_argument("--inputs", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=16, help="Items per batch for naive batching")
+    parser.add_argument("--token-budget", type=int, default=8192, help="Padded tokens per bucket for bucketed batching")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    pipeline = load_ner_pipeline() if args.task == "ner" else load_classifier_pipeline()
+    extra = (CANDIDATE_LABELS,) if args.task == "classify" else ()
+    pairs = len(CANDIDATE_LABELS) if args.task == "classify" else 1
+    # The zero-shot pipeline counts its batch in (text, label) pairs
+    naive_batch = args.batch_size * pairs
+
+    inputs = mixed_inputs(args.inputs, random.Random(args.seed))
+    lengths = token_lengths(inputs, pipeline)
+    real = sum(lengths) * pairs
+    naive_batches = [list(range(i, min(i + args.batch_size, len(inputs)))) for i in range(0, len(inputs), args.batch_size)]
+    bucketed_batches = length_buckets(lengths, args.token_budget, pairs)
+
+    naive = time_run(lambda: run_batched(pipeline, inputs, *extra, batch_size=naive_batch, token_budget=0), args.repeats)
+    bucketed = time_run(lambda: run_batched(pipeline, inputs, *extra, token_budget=args.token_budget, pairs_per_input=pairs), args.repeats)
+
+    print(f"{len(inputs)} inputs, {sum(lengths)} tokens (min {min(lengths)}, max {max(lengths)}), task {args.task}")
+    print(f"{'strategy':>10} {'batches':>8} {'time (s)':>9} {'tokens/s':>9} {'padding eff.':>13}")
+    for name, batches, seconds in (("naive", naive_batches, naive), ("bucketed", bucketed_batches, bucketed)):
+        efficiency = real / padded_tokens(lengths, batches, pairs)
+        print(f"{name:>10} {len(batches):>8} {seconds:>9.2f} {real / seconds:>9.0f} {efficiency:>13.1%}")
+    print(f"Speedup: {naive / bucketed:.2f}x")
+
+if __name__ == "__main__":
+    main()
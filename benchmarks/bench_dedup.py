@@ -0,0 +1,119 @@
+"""
+Hit rate and latency saved by near-duplicate reuse (app/dedup.py) on a synthetic
+intercept feed: unique reports plus copies forwarded with a new header and
+copies re-sent with small word edits.
+
+Documents are processed in feed order; a document whose near-duplicate was
+seen earlier reuses that result instead of running the models. "Saved" is the
+number of reused documents times the per-document analysis cost, measured on
+the real models with --models or taken from --analysis-ms otherwise.
+
+Usage:
+    python benchmarks/bench_dedup.py --docs 2000 --duplicate-rate 0.3 --threshold 0.8
+    python benchmarks/bench_dedup.py --docs 200 --models
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "app"))
+
+from dedup import NearDuplicateIndex, minhash
+from batch import percentile
+
+VOCABULARY = ("convoy package meet tomorrow asset shipment checkpoint border river bridge market north south "
+              "station courier signal contact route delay vehicle night morning cargo harbor warehouse unit team "
+              "confirm cancel move hold transfer payment account phone number address sector grid").split()
+NAMES = ["Viper", "Eagle", "Mishra", "Ghost", "Bravo Six", "Charminar", "Hyderabad", "Karachi", "Alpha One"]
+
+def synthetic_report(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(4, 12)):
+        words = rng.choices(VOCABULARY, k=rng.randint(6, 16))
+        words.insert(rng.randrange(len(words)), rng.choice(NAMES))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+def forwarded(text: str, rng: random.Random) -> str:
+    return f"FWD: relay {rng.randint(100, 999)}\nFrom: station {rng.choice(NAMES)}\nDate: day {rng.randint(1, 28)}\n\n{text}"
+
+def edited(text: str, rng: random.Random, rate: float = 0.03) -> str:
+    words = text.split()
+    for _ in range(max(1, int(len(words) * rate))):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+def synthetic_feed(docs: int, duplicate_rate: float, rng: random.Random) -> list:
+    """(text, base_id) pairs; copies share their original's base_id."""
+    feed, originals = [], []
+    for _ in range(docs):
+        if originals and rng.random() < duplicate_rate:
+            base_id, text = rng.choice(originals)
+            feed.append(((forwarded if rng.random() < 0.5 else edited)(text, rng), base_id))
+        else:
+            text = synthetic_report(rng)
+            originals.append((len(originals), text))
+            feed.append((text, originals[-1][0]))
+    return feed
+
+def measure_analysis_ms(feed: list, samples: int) -> float:
+    from models.classifier import get_risk_assessment
+    from models.NER import get_entities
+    from models.loader import load_ner_pipeline, load_classifier_pipeline
+    ner, classifier = load_ner_pipeline(), load_classifier_pipeline()
+    texts = [text for text, _ in feed[:samples]]
+    get_risk_assessment(texts[0], classifier)
+    start = time.perf_counter()
+    for text in texts:
+        get_risk_assessment(text, classifier)
+        get_entities(text, ner)
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.3, help="Fraction of the feed that are copies of earlier reports")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--models", action="store_true", help="Measure the analysis cost on the real models")
+    parser.add_argument("--analysis-ms", type=float, default=1000.0, help="Assumed analysis cost per document without --models")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    feed = synthetic_feed(args.docs, args.duplicate_rate, rng)
+    index = NearDuplicateIndex(args.threshold, max_entries=args.docs)
+    seen_bases, lookup_ms = set(), []
+    duplicates = hits = false_hits = 0
+    for position, (text, base_id) in enumerate(feed):
+        start = time.perf_counter()
+        signature = minhash(text)
+        match = index.find(text, signature=signature)
+        lookup_ms.append((time.perf_counter() - start) * 1000)
+        is_duplicate = base_id in seen_bases
+        duplicates += is_duplicate
+        if match is not None:
+            hits += 1
+            false_hits += match[1]["result"]["base_id"] != base_id
+        else:
+            # Stands in for a model run; the "result" remembers which report it came from
+            index.add(str(position), text, {"base_id": base_id}, signature=signature)
+        seen_bases.add(base_id)
+
+    analysis_ms = measure_analysis_ms(feed, min(20, len(feed))) if args.models else args.analysis_ms
+    true_hits = hits - false_hits
+    print(f"Feed: {len(feed)} documents, {duplicates} near-duplicates of earlier reports (threshold {args.threshold})")
+    print(f"Hit rate: {true_hits}/{duplicates} duplicates reused ({true_hits / duplicates if duplicates else 0.0:.1%}), "
+          f"{false_hits} false matches")
+    print(f"Fingerprint + lookup: p50 {percentile(lookup_ms, 50):.2f} ms, p95 {percentile(lookup_ms, 95):.2f} ms")
+    saved = hits * analysis_ms / 1000
+    overhead = sum(lookup_ms) / 1000
+    source = "measured" if args.models else "assumed"
+    print(f"Analysis cost {analysis_ms:.0f} ms/doc ({source}): saved {saved:.1f}s of model time for {overhead:.1f}s of "
+          f"fingerprinting ({saved / (len(feed) * analysis_ms / 1000):.1%} of the feed's total)")
+
+if __name__ == "__main__":
+    main()
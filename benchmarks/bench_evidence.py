@@ -0,0 +1,58 @@
+"""
+Compares per-document evidence latency: sequential find_evidence loop vs the
+batched evidence engine. The speedup column is loop vs batched; the 1-hyp column
+(single_hypothesis) is timing only, since it scores sentences differently and can
+pick other evidence than the loop.
+
+Usage:
+    python benchmarks/bench_evidence.py --sizes 10 100 1000 --batch-size 32
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from models.classifier import CANDIDATE_LABELS, find_evidence, find_evidence_batched
+from corpus import sample_sentences
+
+def build_document(n_sentences: int, pool: list) -> str:
+    """Builds a synthetic intercept with exactly n_sentences sentences."""
+    return " ".join(f"{pool[i % len(pool)]}." for i in range(n_sentences))
+
+def time_call(fn, repeats: int) -> float:
+    """Returns the best wall-clock time of fn() over the given repeats."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--label", default="critical threat")
+    parser.add_argument("--model", default="valhalla/distilbart-mnli-12-1")
+    args = parser.parse_args()
+
+    from transformers import pipeline
+    classifier = pipeline("zero-shot-classification", model=args.model)
+    pool = sample_sentences()
+
+    print(f"{'sentences':>10} {'loop (s)':>10} {'batched (s)':>12} {'1-hyp (s)':>10} {'speedup':>8}")
+    for size in args.sizes:
+        doc = build_document(size, pool)
+        loop = time_call(lambda: find_evidence(doc, args.label, classifier, CANDIDATE_LABELS), args.repeats)
+        batched = time_call(lambda: find_evidence_batched(doc, args.label, classifier, CANDIDATE_LABELS,
+                                                          batch_size=args.batch_size), args.repeats)
+        single = time_call(lambda: find_evidence_batched(doc, args.label, classifier, CANDIDATE_LABELS,
+                                                         batch_size=args.batch_size, single_hypothesis=True), args.repeats)
+        print(f"{size:>10} {loop:>10.3f} {batched:>12.3f} {single:>10.3f} {loop / batched:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
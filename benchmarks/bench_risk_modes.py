@@ -0,0 +1,46 @@
+"""
+Compares get_risk_assessment modes: the "full" double pass (document + sentences)
+against the "segmented" single batched pass with each aggregation.
+
+Usage:
+    python benchmarks/bench_risk_modes.py --sizes 1 10 100 500
+"""
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.classifier import get_risk_assessment, AGGREGATIONS
+from bench_evidence import sample_sentences, build_document, time_call
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--model", default="valhalla/distilbart-mnli-12-1")
+    args = parser.parse_args()
+
+    from transformers import pipeline
+    classifier = pipeline("zero-shot-classification", model=args.model)
+    pool = sample_sentences()
+
+    header = f"{'sentences':>10} {'full (s)':>10}" + "".join(f" {agg + ' (s)':>15}" for agg in AGGREGATIONS) + f" {'speedup':>8}"
+    print(header)
+    for size in args.sizes:
+        doc = build_document(size, pool)
+        full_result = get_risk_assessment(doc, classifier, mode="full")
+        full = time_call(lambda: get_risk_assessment(doc, classifier, mode="full"), args.repeats)
+        row = f"{size:>10} {full:>10.3f}"
+        fastest = float("inf")
+        agreement = []
+        for agg in AGGREGATIONS:
+            seg = time_call(lambda: get_risk_assessment(doc, classifier, mode="segmented", aggregation=agg), args.repeats)
+            fastest = min(fastest, seg)
+            row += f" {seg:>15.3f}"
+            agreement.append(get_risk_assessment(doc, classifier, mode="segmented", aggregation=agg)[0] == full_result[0])
+        row += f" {full / fastest:>7.1f}x"
+        print(row + "  label agrees: " + ", ".join(f"{agg}={ok}" for agg, ok in zip(AGGREGATIONS, agreement)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Rule-engine scaling with watchlist size: the compiled single-pass engine against
+the previous approach (substring any() over keywords, one re.finditer per label
+and a linear duplicate check per match).
+
+Usage:
+    python benchmarks/bench_rules.py --sizes 10 100 1000 10000 --doc-words 5000
+"""
+import os
+import re
+import sys
+import time
+import random
+import string
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.rules import RuleEngine
+
+def random_term(rng: random.Random) -> str:
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 2))]
+    return " ".join(words)
+
+def build_watchlist(size: int, rng: random.Random) -> dict:
+    terms = sorted({random_term(rng) for _ in range(size)})
+    keywords = terms[: len(terms) // 2]
+    entities = terms[len(terms) // 2:]
+    return {
+        "critical_keywords": keywords,
+        "custom_entities": {"WEAPON": entities[::2], "CALLSIGN": entities[1::2]},
+        "label_corrections": {},
+    }
+
+def build_document(config: dict, n_words: int, rng: random.Random) -> str:
+    """Mostly filler words with a sprinkling of watchlist terms."""
+    vocab = config["critical_keywords"] + [t for terms in config["custom_entities"].values() for t in terms]
+    words = []
+    for _ in range(n_words):
+        words.append(rng.choice(vocab) if rng.random() < 0.02 else random_term(rng))
+    return " ".join(words)
+
+def legacy_scan(config: dict, text: str) -> tuple:
+    """The pre-engine rules: substring keyword check, one regex per label, O(n*m) dedup."""
+    text_lower = text.lower()
+    is_critical = any(keyword in text_lower for keyword in config["critical_keywords"])
+    entities = []
+    for label, terms in config["custom_entities"].items():
+        pattern = r"\b(" + "|".join(re.escape(t) for t in terms) + r")\b"
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            if not any(match.group(0).lower() == e[0].lower() for e in entities):
+                entities.append([match.group(0), label])
+    return is_critical, entities
+
+def best_time(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--doc-words", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'watchlist':>10} {'compile (ms)':>13} {'engine (ms)':>12} {'legacy (ms)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        config = build_watchlist(size, rng)
+        text = build_document(config, args.doc_words, rng)
+        start = time.perf_counter()
+        engine = RuleEngine(config)
+        compile_time = time.perf_counter() - start
+        # Bypass the per-text result cache so every repeat really scans
+        engine_time = best_time(lambda: engine._scan(text), args.repeats)
+        legacy_time = best_time(lambda: legacy_scan(config, text), args.repeats)
+        print(f"{size:>10} {compile_time * 1000:>13.1f} {engine_time * 1000:>12.2f} {legacy_time * 1000:>12.2f} "
+              f"{legacy_time / engine_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Per-operation latency of the log storage backends (p50/p95 in milliseconds).
+SQLite always runs against a temporary file; Supabase runs only when
+SUPABASE_URL/SUPABASE_KEY are set and --backends includes it (it writes to and
+then clears the logs table, so point it at a scratch project).
+
+Usage:
+    python benchmarks/bench_storage.py --rows 2000 --backends sqlite supabase
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "app"))
+
+from storage import create_store
+from batch import percentile
+
+LABELS = ["PER", "LOC", "ORG", "WEAPON", "CALLSIGN"]
+RISKS = ["Benign", "Suspicious", "Critical"]
+
+def synthetic_log(rng: random.Random) -> tuple:
+    text = " ".join(rng.choice(["convoy", "package", "meet", "Hyderabad", "tomorrow", "asset", "shipment"])
+                    for _ in range(rng.randint(20, 400)))
+    entities = [(f"Name{rng.randint(0, 500)}", rng.choice(LABELS)) for _ in range(rng.randint(0, 8))]
+    return text, rng.choice(RISKS), entities
+
+def measure(fn, repeats: int) -> list:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def bench_store(store, rows: int, repeats: int, rng: random.Random) -> dict:
+    store.delete_all_logs()
+    results = {}
+    results["save_log"] = measure(lambda: store.save_log(*synthetic_log(rng)), rows)
+    # One bulk insert of 100 records, as the write-behind queue issues them
+    batches = [[dict(zip(("text", "analysis", "entities"), synthetic_log(rng))) for _ in range(100)]
+               for _ in range(max(1, rows // 100))]
+    results["save_logs(100)"] = measure(lambda: store.save_logs(batches.pop()), len(batches))
+    results["load_logs(5)"] = measure(lambda: store.load_logs(5), repeats)
+    results["dashboard_stats"] = measure(store.dashboard_stats, repeats)
+    results["load_all_logs"] = measure(store.load_all_logs, max(1, repeats // 10))
+    ids = [row["id"] for row in store.load_logs(repeats)]
+    results["delete_log"] = measure(lambda: store.delete_log(ids.pop()), len(ids))
+    results["delete_all_logs"] = measure(store.delete_all_logs, 1)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--backends", nargs="+", default=["sqlite"], choices=["sqlite", "supabase"])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'backend':>9} {'operation':>16} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for backend in args.backends:
+        if backend == "sqlite":
+            tmp = tempfile.TemporaryDirectory()
+            store = create_store("sqlite", path=os.path.join(tmp.name, "bench.db"))
+        else:
+            if not (os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY")):
+                print(f"{backend:>9} skipped (SUPABASE_URL/SUPABASE_KEY not set)")
+                continue
+            store = create_store("supabase", url=os.getenv("SUPABASE_URL"), key=os.getenv("SUPABASE_KEY"))
+        for operation, samples in bench_store(store, args.rows, args.repeats, rng).items():
+            print(f"{backend:>9} {operation:>16} {percentile(samples, 50):>9.3f} {percentile(samples, 95):>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Accuracy vs latency of the inference backends on the sample intercepts (1.txt - 6.txt).
+PyTorch fp32 is the reference: risk labels are compared for agreement and
+entities by F1 over (word, label) pairs.
+
+Usage:
+    python benchmarks/compare_backends.py --backends torch torch-int8 onnx onnx-int8 --repeats 3
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from models.classifier import get_risk_assessment
+from models.NER import get_entities
+from models.loader import BACKENDS, load_ner_pipeline, load_classifier_pipeline
+
+def sample_documents() -> list:
+    docs = []
+    for i in range(1, 7):
+        path = os.path.join(ROOT, f"{i}.txt")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                docs.append(f.read())
+    return docs
+
+def entity_f1(predicted: list, reference: list) -> float:
+    predicted, reference = set(predicted), set(reference)
+    if not predicted and not reference:
+        return 1.0
+    overlap = len(predicted & reference)
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / len(predicted), overlap / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+def run_backend(backend: str, docs: list, repeats: int) -> dict:
+    load_start = time.perf_counter()
+    ner = load_ner_pipeline(backend)
+    classifier = load_classifier_pipeline(backend)
+    load_time = time.perf_counter() - load_start
+
+    # Warm-up pass so one-time graph/kernel setup is not counted
+    outputs = [(get_risk_assessment(doc, classifier)[0], get_entities(doc, ner)) for doc in docs]
+    risk_time = ner_time = 0.0
+    for _ in range(repeats):
+        for doc in docs:
+            start = time.perf_counter()
+            get_risk_assessment(doc, classifier)
+            risk_time += time.perf_counter() - start
+            start = time.perf_counter()
+            get_entities(doc, ner)
+            ner_time += time.perf_counter() - start
+    runs = repeats * len(docs)
+    return {"load": load_time, "risk": risk_time / runs, "ner": ner_time / runs, "outputs": outputs}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    docs = sample_documents()
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {backend: run_backend(backend, docs, args.repeats) for backend in backends}
+    reference = results["torch"]["outputs"]
+
+    print(f"{'backend':>11} {'load (s)':>9} {'risk (ms)':>10} {'NER (ms)':>9} {'speedup':>8} {'risk agree':>11} {'entity F1':>10}")
+    for backend, r in results.items():
+        agree = sum(out[0] == ref[0] for out, ref in zip(r["outputs"], reference)) / len(docs)
+        f1 = sum(entity_f1(out[1], ref[1]) for out, ref in zip(r["outputs"], reference)) / len(docs)
+        speedup = (results["torch"]["risk"] + results["torch"]["ner"]) / (r["risk"] + r["ner"])
+        print(f"{backend:>11} {r['load']:>9.1f} {r['risk'] * 1000:>10.1f} {r['ner'] * 1000:>9.1f} {speedup:>7.2f}x {agree:>11.0%} {f1:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Synthetic intercept corpora for the benchmarks. Documents mix sentences from the
+bundled sample intercepts (1.txt - 6.txt) with generated ones that mention the
+watchlist names, callsigns, weapons and critical keywords from models/rules.json,
+so NER, the rule engine and the classifier all see realistic input. The same
+seed always yields the same corpus.
+
+Sentences per document follow a log-normal distribution set by a profile
+(median, sigma, maximum); --median/--sigma override it.
+
+Usage:
+    python benchmarks/corpus.py --docs 1000 --profile mixed > corpus.jsonl
+"""
+import os
+import sys
+import json
+import math
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from models.classifier import split_sentences
+from models.rules import RULES_PATH
+
+# Sentences per document: (median, sigma, maximum)
+PROFILES = {
+    "short": (2, 0.5, 8),       # chat messages and one-liners
+    "mixed": (6, 1.0, 120),     # mostly short messages, a tail of long reports
+    "long": (40, 0.5, 300),     # field reports past the 1024-token window
+}
+
+VOCABULARY = ("convoy package meet tomorrow asset shipment checkpoint border river bridge market north south "
+              "station courier signal contact route delay vehicle night morning cargo harbor warehouse unit team "
+              "confirm cancel move hold transfer payment account phone number address sector grid").split()
+
+def sample_sentences() -> list:
+    """Sentences of the bundled sample intercepts (1.txt - 6.txt)."""
+    sentences = []
+    for i in range(1, 7):
+        path = os.path.join(ROOT, f"{i}.txt")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                sentences.extend(s for s in split_sentences(f.read()) if len(s) >= 10)
+    return sentences
+
+def watchlist_terms() -> tuple:
+    """(names, critical keywords) from the rules file, so generated text triggers the rules."""
+    with open(RULES_PATH, encoding="utf-8") as f:
+        config = json.load(f)
+    names = list(config.get("label_corrections", {}))
+    for entries in config.get("custom_entities", {}).values():
+        names.extend(entries)
+    return names or ["Viper"], config.get("critical_keywords", []) or ["target"]
+
+def synthetic_sentence(rng: random.Random, names: list, keywords: list, keyword_rate: float) -> str:
+    words = rng.choices(VOCABULARY, k=rng.randint(6, 16))
+    words.insert(rng.randrange(len(words)), rng.choice(names))
+    if rng.random() < keyword_rate:
+        words.insert(rng.randrange(len(words)), rng.choice(keywords))
+    return " ".join(words).capitalize()
+
+def sentence_count(rng: random.Random, median: float, sigma: float, maximum: int) -> int:
+    return max(1, min(maximum, round(rng.lognormvariate(math.log(median), sigma))))
+
+def synthetic_corpus(docs: int, profile: str = "mixed", seed: int = 7, median: float | None = None,
+                     sigma: float | None = None, keyword_rate: float = 0.05, sample_rate: float = 0.5) -> list:
+    """
+    docs synthetic intercepts. sample_rate is the share of sentences taken from
+    the sample files, keyword_rate the chance a generated sentence contains a
+    critical keyword.
+    """
+    default_median, default_sigma, maximum = PROFILES[profile]
+    median = median or default_median
+    sigma = default_sigma if sigma is None else sigma
+    rng = random.Random(seed)
+    pool = sample_sentences()
+    names, keywords = watchlist_terms()
+    corpus = []
+    for _ in range(docs):
+        sentences = []
+        for _ in range(sentence_count(rng, median, sigma, maximum)):
+            if pool and rng.random() < sample_rate:
+                sentences.append(rng.choice(pool))
+            else:
+                sentences.append(synthetic_sentence(rng, names, keywords, keyword_rate))
+        corpus.append(". ".join(sentences) + ".")
+    return corpus
+
+def document_with_sentences(n_sentences: int, seed: int = 7) -> str:
+    """A document of exactly n_sentences sentences (for scaling curves)."""
+    rng = random.Random(seed)
+    pool = sample_sentences()
+    names, keywords = watchlist_terms()
+    sentences = [rng.choice(pool) if pool and rng.random() < 0.5 else synthetic_sentence(rng, names, keywords, 0.05)
+                 for _ in range(n_sentences)]
+    return ". ".join(sentences) + "."
+
+def describe(corpus: list) -> dict:
+    sentences = [len(split_sentences(text)) for text in corpus]
+    chars = [len(text) for text in corpus]
+    return {"docs": len(corpus), "chars_total": sum(chars), "chars_max": max(chars, default=0),
+            "sentences_mean": round(sum(sentences) / len(sentences), 2) if sentences else 0.0,
+            "sentences_max": max(sentences, default=0)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--profile", default="mixed", choices=sorted(PROFILES))
+    parser.add_argument("--median", type=float, help="Median sentences per document (overrides the profile)")
+    parser.add_argument("--sigma", type=float, help="Log-normal spread of sentences per document")
+    parser.add_argument("--keyword-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.docs, args.profile, args.seed, args.median, args.sigma, args.keyword_rate)
+    for i, text in enumerate(corpus):
+        print(json.dumps({"id": i, "text": text}))
+    print(json.dumps(describe(corpus)), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Load test for the inference service (app/server.py). Sends the sample intercepts
+at increasing concurrency and reports throughput and tail latency per level.
+
+Usage:
+    python app/server.py --port 8600 &
+    python benchmarks/load_test.py --url http://127.0.0.1:8600 --endpoint analyze --concurrency 1 4 16 64
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "app"))
+
+import httpx
+
+from batch import percentile
+
+def sample_texts() -> list:
+    texts = []
+    for i in range(1, 7):
+        path = os.path.join(ROOT, f"{i}.txt")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                texts.append(f.read())
+    return texts
+
+async def run_level(client: httpx.AsyncClient, url: str, texts: list, concurrency: int, requests_per_level: int) -> dict:
+    """Keeps `concurrency` requests in flight until requests_per_level have completed."""
+    latencies, errors = [], 0
+    counter = iter(range(requests_per_level))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json={"text": texts[i % len(texts)]})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--endpoint", default="analyze", choices=["ner", "classify", "analyze"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    args = parser.parse_args()
+
+    texts = sample_texts()
+    url = f"{args.url.rstrip('/')}/{args.endpoint}"
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        print(f"{'concurrency':>11} {'req/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'errors':>6}")
+        for level in args.concurrency:
+            r = await run_level(client, url, texts, level, args.requests)
+            print(f"{r['concurrency']:>11} {r['throughput']:>8.2f} {r['p50']:>8.3f} {r['p95']:>8.3f} {r['p99']:>8.3f} {r['errors']:>6}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,269 @@
+"""
+Benchmark suite for the analysis pipeline and the storage layer, run on a
+seeded synthetic corpus (benchmarks/corpus.py) so results are comparable across
+commits. Each run writes one JSON file:
+
+    {"meta": {"commit", "dirty", "python", "platform", "cpus", "backend", "args", ...},
+     "results": {name: {"p50_ms", "p95_ms", "mean_ms", "n", ...}}}
+
+Groups (--groups, default all):
+    rules      one uncached rule-engine pass per document (rules.scan)
+    db         log store operations behind db.py against a temporary SQLite store preloaded with
+               --db-rows logs (saves are synchronous here; the app queues them, see PRESTO_LOG_WRITE_BEHIND)
+    models     model load time and per-document latency of NER (ner) and risk assessment (risk)
+    analyze    end-to-end run_analysis over the corpus, the model path of the app's analyze_text;
+               adds docs_per_s, chars_per_s and the mean per-stage breakdown from models/metrics.py
+    evidence   find_evidence (one call per sentence) and find_evidence_batched on documents of
+               --evidence-sizes sentences (evidence.loop.n<N>, evidence.batched.n<N>)
+
+--baseline compares p50 latencies and throughputs with an earlier run and exits
+with status 1 if any is worse by more than --threshold (latency changes under
+--min-ms, or within the round-to-round noise either run measured, are ignored).
+Compare runs from the same machine only.
+
+Usage:
+    python benchmarks/suite.py --docs 50 --output bench/main.json
+    python benchmarks/suite.py --docs 50 --baseline bench/main.json --threshold 0.3
+    python benchmarks/suite.py --groups rules db --baseline bench/main.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "app"))
+
+from corpus import PROFILES, synthetic_corpus, document_with_sentences, describe
+from batch import percentile
+from models.rules import RuleEngine, RULES_PATH
+from models.metrics import trace
+
+GROUPS = ("rules", "db", "models", "analyze", "evidence")
+# Metrics checked against the baseline, and which direction is better
+COMPARED = {"p50_ms": "lower", "docs_per_s": "higher"}
+
+def measure(fn, items: list, rounds: int = 1) -> list:
+    """Milliseconds of fn(item) for each item, once per round: [[ms, ...], ...]."""
+    samples = []
+    for _ in range(rounds):
+        round_ms = []
+        for item in items:
+            start = time.perf_counter()
+            fn(item)
+            round_ms.append((time.perf_counter() - start) * 1000)
+        samples.append(round_ms)
+    return samples
+
+def summarize(rounds: list) -> dict:
+    """
+    p50 is the lowest per-round median: background noise only ever adds time, so
+    it is far steadier across runs than the overall median. noise is how far the
+    per-round medians spread above it (relative), the run's own measure of how much
+    p50 can move without a code change. p95 and mean cover every call.
+    """
+    samples = [ms for round_ms in rounds for ms in round_ms]
+    medians = sorted(percentile(round_ms, 50) for round_ms in rounds)
+    # The slowest round is left out, so one stall doesn't mask a real regression
+    typical = medians[max(0, len(medians) - 2)]
+    return {"p50_ms": round(medians[0], 4), "noise": round((typical - medians[0]) / medians[0], 4) if medians[0] else 0.0,
+            "p95_ms": round(percentile(samples, 95), 4), "mean_ms": round(sum(samples) / len(samples), 4),
+            "n": len(samples), "rounds": len(rounds)}
+
+def git_revision() -> tuple:
+    """(short commit, dirty) of the working tree, or ("unknown", False) outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+# --- BENCHMARKS ---
+def bench_rules(corpus: list, repeats: int) -> dict:
+    engine = RuleEngine.from_file(RULES_PATH)
+    # Bypass the per-text result cache so every repeat really scans
+    return {"rules.scan": summarize(measure(engine._scan, corpus, repeats))}
+
+def bench_db(corpus: list, rows: int, samples: int, rounds: int, seed: int) -> dict:
+    # The store db.py wraps, built directly: db.py itself needs a Streamlit runtime
+    from storage import create_store
+    from models.NER import apply_entity_rules
+
+    tmp = tempfile.TemporaryDirectory()
+    rng = random.Random(seed)
+    def record(text: str) -> dict:
+        return {"text": text, "analysis": rng.choice(["Benign", "Suspicious", "Critical"]),
+                "entities": apply_entity_rules(text, [])}
+    store = create_store("sqlite", path=os.path.join(tmp.name, "bench.db"))
+    for start in range(0, rows, 500):
+        store.save_logs([record(corpus[i % len(corpus)]) for i in range(start, min(start + 500, rows))])
+
+    results = {}
+    saves = [record(text) for text in corpus[:samples]]
+    results["db.save_log"] = summarize(measure(lambda r: store.save_log(r["text"], r["analysis"], r["entities"]), saves))
+    results["db.load_history"] = summarize(measure(lambda _: store.load_history(5), range(samples), rounds))
+    # A page deep in the history, reached through the keyset cursor
+    history = store.load_history(100)
+    if history:
+        cursor = (history[-1]["created_at"], history[-1]["id"])
+        results["db.load_history.deep"] = summarize(measure(lambda _: store.load_history(5, before=cursor), range(samples), rounds))
+    results["db.count_logs"] = summarize(measure(lambda _: store.count_logs(), range(samples), rounds))
+    ids = [row["id"] for row in store.load_history(samples)]
+    results["db.load_log_text"] = summarize(measure(store.load_log_text, ids, rounds))
+    words = [rng.choice(text.split()) for text in corpus[:samples]]
+    results["db.search_logs.text"] = summarize(measure(lambda w: store.search_logs(query=w), words, rounds))
+    entities = [e[0] for r in saves for e in r["entities"]][:samples] or ["Viper"]
+    results["db.search_logs.entity"] = summarize(measure(lambda e: store.search_logs(entity=e), entities, rounds))
+    results["db.load_dashboard_stats"] = summarize(measure(lambda _: store.dashboard_stats(), range(samples), rounds))
+    results["db.delete_log"] = summarize(measure(store.delete_log, ids))
+    tmp.cleanup()
+    return results
+
+def load_models() -> tuple:
+    from models.loader import load_ner_pipeline, load_classifier_pipeline
+    start = time.perf_counter()
+    ner = load_ner_pipeline()
+    ner_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    classifier = load_classifier_pipeline()
+    classifier_ms = (time.perf_counter() - start) * 1000
+    return ner, classifier, {"model_load.ner": summarize([[ner_ms]]), "model_load.classifier": summarize([[classifier_ms]])}
+
+def bench_models(corpus: list, ner, classifier, risk_mode: str) -> dict:
+    from models.NER import get_entities
+    from models.classifier import get_risk_assessment
+    # Warm-up: the first call pays for lazy initialization
+    get_entities(corpus[0], ner)
+    get_risk_assessment(corpus[0], classifier, mode=risk_mode)
+    return {"ner": summarize(measure(lambda text: get_entities(text, ner), corpus)),
+            "risk": summarize(measure(lambda text: get_risk_assessment(text, classifier, mode=risk_mode), corpus))}
+
+def bench_analyze(corpus: list, ner, classifier, execution_mode: str, risk_mode: str) -> dict:
+    from models.runner import run_analysis
+    run_analysis(corpus[0], ner, classifier, mode=execution_mode, risk_mode=risk_mode)
+    with trace() as analysis_trace:
+        start = time.perf_counter()
+        samples = measure(lambda text: run_analysis(text, ner, classifier, mode=execution_mode, risk_mode=risk_mode), corpus)
+        elapsed = time.perf_counter() - start
+    result = summarize(samples)
+    result["docs_per_s"] = round(len(corpus) / elapsed, 3)
+    result["chars_per_s"] = round(sum(len(text) for text in corpus) / elapsed, 1)
+    result["stages_ms_per_doc"] = {name: round(seconds * 1000 / len(corpus), 3)
+                                   for name, _, seconds in analysis_trace.breakdown()}
+    return {"analyze": result}
+
+def bench_evidence(classifier, sizes: list, repeats: int) -> dict:
+    from models.classifier import CANDIDATE_LABELS, find_evidence, find_evidence_batched
+    label = CANDIDATE_LABELS[0]
+    results = {}
+    for size in sizes:
+        document = [document_with_sentences(size)]
+        results[f"evidence.loop.n{size}"] = summarize(
+            measure(lambda text: find_evidence(text, label, classifier, CANDIDATE_LABELS), document, repeats))
+        results[f"evidence.batched.n{size}"] = summarize(
+            measure(lambda text: find_evidence_batched(text, label, classifier, CANDIDATE_LABELS), document, repeats))
+    return results
+
+# --- REGRESSION CHECK ---
+def compare(results: dict, baseline: dict, threshold: float, min_ms: float) -> list:
+    """
+    (name, metric, baseline, current, relative change, regressed) for every metric both
+    runs have. A latency regresses only past threshold, min_ms and the noise either run measured.
+    """
+    rows = []
+    for name in sorted(set(results) & set(baseline)):
+        for metric, better in COMPARED.items():
+            old, new = baseline[name].get(metric), results[name].get(metric)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / old
+            if better == "lower":
+                noise = max(baseline[name].get("noise", 0.0), results[name].get("noise", 0.0))
+                regressed = change > max(threshold, noise) and new - old >= min_ms
+            else:
+                regressed = change < -threshold
+            rows.append((name, metric, old, new, change, regressed))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="+", default=list(GROUPS), choices=GROUPS)
+    parser.add_argument("--docs", type=int, default=50, help="Corpus size")
+    parser.add_argument("--profile", default="mixed", choices=sorted(PROFILES), help="Document length distribution")
+    parser.add_argument("--median", type=float, help="Median sentences per document (overrides the profile)")
+    parser.add_argument("--sigma", type=float, help="Log-normal spread of sentences per document")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeats", type=int, default=10, help="Rounds of the rules, db and evidence benchmarks")
+    parser.add_argument("--db-rows", type=int, default=5000, help="Logs preloaded before the db benchmarks")
+    parser.add_argument("--evidence-sizes", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--execution-mode", default="sequential", choices=["sequential", "threads"])
+    parser.add_argument("--risk-mode", default="auto", choices=["full", "segmented", "auto"])
+    parser.add_argument("--output", help="JSON results file (default benchmark-<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Allowed relative slowdown before failing")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.docs, args.profile, args.seed, args.median, args.sigma)
+    commit, dirty = git_revision()
+    results = {}
+    if "rules" in args.groups:
+        results.update(bench_rules(corpus, args.repeats))
+    if "db" in args.groups:
+        results.update(bench_db(corpus, args.db_rows, max(args.docs, 20), args.repeats, args.seed))
+    if {"models", "analyze", "evidence"} & set(args.groups):
+        ner, classifier, load_times = load_models()
+        if "models" in args.groups:
+            results.update(load_times)
+            results.update(bench_models(corpus, ner, classifier, args.risk_mode))
+        if "analyze" in args.groups:
+            results.update(bench_analyze(corpus, ner, classifier, args.execution_mode, args.risk_mode))
+        if "evidence" in args.groups:
+            results.update(bench_evidence(classifier, args.evidence_sizes, args.repeats))
+
+    from models.loader import DEFAULT_BACKEND, NER_MODEL, CLASSIFIER_MODEL
+    meta = {"commit": commit, "dirty": dirty, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "backend": DEFAULT_BACKEND, "models": [NER_MODEL, CLASSIFIER_MODEL], "corpus": describe(corpus),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}}
+    output = args.output or f"benchmark-{commit}{'-dirty' if dirty else ''}.json"
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    print(f"Commit {commit}{' (dirty)' if dirty else ''}, corpus {meta['corpus']}")
+    print(f"{'benchmark':>26} {'p50 (ms)':>10} {'p95 (ms)':>10} {'n':>6}")
+    for name, result in results.items():
+        print(f"{name:>26} {result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} {result['n']:>6}")
+    print(f"Results written to {output}")
+
+    if not args.baseline:
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    for key in ("platform", "cpus", "backend"):
+        if baseline["meta"].get(key) != meta[key]:
+            print(f"Warning: baseline {key} differs ({baseline['meta'].get(key)} vs {meta[key]}); timings may not be comparable")
+    rows = compare(results, baseline["results"], args.threshold, args.min_ms)
+    print(f"\nAgainst {args.baseline} (commit {baseline['meta'].get('commit')}), threshold {args.threshold:.0%}")
+    print(f"{'benchmark':>26} {'metric':>11} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, metric, old, new, change, regressed in rows:
+        print(f"{name:>26} {metric:>11} {old:>10.3f} {new:>10.3f} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print("No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,86 @@
 # In NER.py
 
-import re
+from models.rules import get_rule_engine
+from models.batching import run_batched
+from models.metrics import stage, timed
 
+@timed("ner")
 def get_entities(text: str, ner_pipeline) -> list:
     """
-    Extracts named entities from text, adds custom entities via regex, 
+    Extracts named entities from text, adds custom entities from the rule engine,
     and corrects common misclassifications.
     """
     # 1. Get initial results from the NER pipeline
-    ner_results = ner_pipeline(text)
-    
+    with stage("ner.model"):
+        ner_results = ner_pipeline(text)
+    with stage("ner.rules"):
+        return apply_entity_rules(text, ner_results)
+
+@timed("ner.batch")
+def get_entities_batch(texts: list, ner_pipeline, batch_size: int = 16, token_budget: int | None = None) -> list:
+    """
+    get_entities for many texts, batched by length under a token budget
+    (models/batching.py; token_budget=0 uses fixed batches of batch_size).
+    """
+    if not texts:
+        return []
+    ner_results = run_batched(ner_pipeline, list(texts), batch_size=batch_size, token_budget=token_budget)
+    return [apply_entity_rules(text, result) for text, result in zip(texts, ner_results)]
+
+def apply_entity_rules(text: str, ner_results: list) -> list:
+    """
+    Turns raw NER pipeline output for text into (word, label) tuples, adding
+    custom entities and correcting known misclassifications (see models/rules.json).
+    """
+    rules = get_rule_engine()
+
     # Use a list of lists to allow modifications
     entities = []
     for item in ner_results:
         entities.append([item['word'], item['entity_group']])
-        
-    # 2. Use regex for more powerful custom entity detection
-    custom_patterns = {
-        "WEAPON": r"\b(AK-47|RPG|IED)\b",
-        "CALLSIGN": r"\b(Bravo Six|Alpha One|Ghost)\b"
-    }
-    
-    for label, pattern in custom_patterns.items():
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            # Add entity only if it hasn't already been found by the model
-            # This avoids duplicate entries
-            if not any(match.group(0).lower() == e[0].lower() for e in entities):
-                entities.append([match.group(0), label])
-    
-    # 3. --- NEW: Rule-based correction for common misclassifications ---
-    # This map defines known words and their correct entity type.
-    known_name_map = {
-        "Viper": "PER",
-        "Eagle": "PER",
-        "Mishra": "PER",
-        "Charminar": "LOC"
-    }
-
-    # Loop through the detected entities and correct their labels if they are in our map
+
+    # 2. Add custom entities from the rule engine (one pass over the text)
+    # Add entity only if it hasn't already been found; a set keeps this O(1)
+    seen_words = {e[0].lower() for e in entities}
+    for word, label, _, _ in rules.custom_entities(text):
+        if word.lower() not in seen_words:
+            entities.append([word, label])
+            seen_words.add(word.lower())
+
+    # 3. Rule-based correction for common misclassifications
     for entity in entities:
-        # Check against the word itself and its cleaned-up version
-        word = entity[0].strip()
-        if word in known_name_map:
-            entity[1] = known_name_map[word] # Correct the label
+        entity[1] = rules.correct_label(entity[0], entity[1])
 
     # 4. Convert back to a list of tuples before returning for immutability
-    return [tuple(entity) for entity in entities]
\ No newline at end of file
+    return [tuple(entity) for entity in entities]
+
+def get_entity_spans(text: str, ner_pipeline, offset: int = 0) -> list:
+    """
+    Same rules as get_entities, but keeps character positions. Returns dicts with
+    word, label, start and end; offset is added to every position so spans from
+    a chunk can be placed in the full document.
+    """
+    rules = get_rule_engine()
+    spans = []
+    for item in ner_pipeline(text):
+        word = item['word']
+        spans.append({
+            "word": word,
+            "label": rules.correct_label(word, item['entity_group']),
+            "start": item['start'] + offset,
+            "end": item['end'] + offset,
+        })
+
+    seen_words = {span["word"].lower() for span in spans}
+    for word, label, start, end in rules.custom_entities(text):
+        if word.lower() in seen_words:
+            continue
+        spans.append({
+            "word": word,
+            "label": rules.correct_label(word, label),
+            "start": start + offset,
+            "end": end + offset,
+        })
+        seen_words.add(word.lower())
+
+    return sorted(spans, key=lambda span: (span["start"], span["end"]))
@@ -1,28 +1,170 @@
 import re
+import math
 
-def get_risk_assessment(text: str, classifier_pipeline) -> tuple:
+from models.rules import get_rule_engine
+from models.batching import run_batched
+from models.metrics import stage, timed, record_size
+from models.prefilter import get_cascade
+
+# Define the categories you want the model to check against
+CANDIDATE_LABELS = ["critical threat", "suspicious activity", "benign communication"]
+
+# Context window of valhalla/distilbart-mnli-12-1; longer inputs are truncated by the tokenizer
+MODEL_MAX_TOKENS = 1024
+
+# Minimum sentence length considered as evidence (shorter ones are skipped)
+MIN_EVIDENCE_LENGTH = 10
+
+# Ways of turning sentence scores into a document score (see aggregate_scores)
+AGGREGATIONS = ("max", "mean", "attention")
+
+@timed("risk")
+def get_risk_assessment(text: str, classifier_pipeline, mode: str = "full", aggregation: str = "max") -> tuple:
     """
     Analyzes text to determine a risk level using a zero-shot classification model.
     Returns risk level, description, and evidence text.
+
+    mode="full" classifies the whole document, then scores its sentences for evidence.
+    mode="segmented" splits the document once, classifies all sentences in one batch and
+    derives the document label by aggregating sentence scores ("max", "mean" or "attention").
+    mode="auto" uses "segmented" only when the text exceeds the model's context window.
+
+    With the pre-filter cascade enabled (models/prefilter.py), texts it finds
+    confidently benign are labeled without the model.
     """
-    # Define the categories you want the model to check against
-    candidate_labels = ["critical threat", "suspicious activity", "benign communication"]
-    
+    cascade = get_cascade()
+    if cascade is not None:
+        with stage("risk.prefilter"):
+            outcome, _ = cascade.decide(text)
+        if outcome == "skip":
+            return prefilter_assessment(text, cascade.model)
+        if outcome == "audit":
+            assessment = _model_risk_assessment(text, classifier_pipeline, mode, aggregation)
+            cascade.record_audit(assessment[0] == "Benign")
+            return assessment
+    return _model_risk_assessment(text, classifier_pipeline, mode, aggregation)
+
+def _model_risk_assessment(text: str, classifier_pipeline, mode: str, aggregation: str) -> tuple:
+    candidate_labels = CANDIDATE_LABELS
+
+    if mode == "auto":
+        mode = "segmented" if count_tokens(text, classifier_pipeline) > MODEL_MAX_TOKENS else "full"
+
+    if mode == "segmented":
+        return _segmented_risk_assessment(text, classifier_pipeline, candidate_labels, aggregation)
+    if mode != "full":
+        raise ValueError(f"Unknown risk assessment mode: {mode}")
+
     # Pass the text and the labels to the pipeline for overall classification
-    result = classifier_pipeline(text, candidate_labels)
+    with stage("risk.classify"):
+        result = classifier_pipeline(text, candidate_labels)
     
     # Get the label with the highest score
     top_label = result['labels'][0]
+    risk_level, description, top_label = resolve_risk(top_label, text)
+    
+    # Find evidence by scoring all sentences in one batched pass
+    with stage("risk.evidence"):
+        evidence = find_evidence_batched(text, top_label, classifier_pipeline, candidate_labels)
     
-    # --- NEW: Define critical keywords for override ---
-    critical_keywords = ["ied", "bomb", "target", "neutralize", "attack", "hostage", "weapon"]
+    return (risk_level, description, evidence)
+
+@timed("risk.batch")
+def get_risk_assessments(texts: list, classifier_pipeline, batch_size: int = 16, token_budget: int | None = None,
+                         mode: str = "full", aggregation: str = "max") -> list:
+    """
+    get_risk_assessment for many documents at once. Documents in full mode share
+    one batched pass that classifies them all and a second that scores all of their
+    sentences for evidence, both batched by length under a token budget
+    (models/batching.py). Documents that mode sends to segmented assessment are
+    assessed one at a time.
+    Returns one (risk level, description, evidence) tuple per text. Texts the
+    pre-filter cascade finds confidently benign skip both passes.
+    """
+    cascade = get_cascade()
+    if cascade is None:
+        return _model_risk_assessments(texts, classifier_pipeline, batch_size, token_budget, mode, aggregation)
+
+    assessments, pending, audited = [None] * len(texts), [], set()
+    with stage("risk.prefilter"):
+        for index, text in enumerate(texts):
+            outcome, _ = cascade.decide(text)
+            if outcome == "skip":
+                assessments[index] = prefilter_assessment(text, cascade.model)
+                continue
+            pending.append(index)
+            if outcome == "audit":
+                audited.add(index)
+    model_assessments = _model_risk_assessments([texts[i] for i in pending], classifier_pipeline, batch_size, token_budget,
+                                                mode, aggregation)
+    for index, assessment in zip(pending, model_assessments):
+        assessments[index] = assessment
+        if index in audited:
+            cascade.record_audit(assessment[0] == "Benign")
+    return assessments
+
+def _model_risk_assessments(texts: list, classifier_pipeline, batch_size: int, token_budget: int | None,
+                            mode: str, aggregation: str) -> list:
+    if mode not in ("full", "segmented", "auto"):
+        raise ValueError(f"Unknown risk assessment mode: {mode}")
+    # Same choice as _model_risk_assessment, made per document
+    segmented = {
+        index for index, text in enumerate(texts)
+        if mode == "segmented" or (mode == "auto" and count_tokens(text, classifier_pipeline) > MODEL_MAX_TOKENS)
+    }
+    full = [index for index in range(len(texts)) if index not in segmented]
+
+    assessments = [None] * len(texts)
+    for index in segmented:
+        assessments[index] = _segmented_risk_assessment(texts[index], classifier_pipeline, CANDIDATE_LABELS, aggregation)
+    full_assessments = _full_risk_assessments([texts[i] for i in full], classifier_pipeline, batch_size, token_budget)
+    for index, assessment in zip(full, full_assessments):
+        assessments[index] = assessment
+    return assessments
+
+def _full_risk_assessments(texts: list, classifier_pipeline, batch_size: int, token_budget: int | None) -> list:
+    if not texts:
+        return []
+    doc_results = run_batched(classifier_pipeline, list(texts), CANDIDATE_LABELS, batch_size=batch_size,
+                              token_budget=token_budget, pairs_per_input=len(CANDIDATE_LABELS))
+    verdicts = [resolve_risk(result['labels'][0], text) for result, text in zip(doc_results, texts)]
 
-    # --- NEW: Check if any critical keyword is in the text ---
-    text_lower = text.lower()
-    is_critical_override = any(keyword in text_lower for keyword in critical_keywords)
+    # Pool the evidence candidates of every multi-sentence document into one batch
+    doc_sentences = [split_sentences(text) for text in texts]
+    owners, candidates = [], []
+    for index, sentences in enumerate(doc_sentences):
+        if len(sentences) > 1:
+            for sentence in sentences:
+                if len(sentence) >= MIN_EVIDENCE_LENGTH:
+                    owners.append(index)
+                    candidates.append(sentence)
+    sentence_scores = classify_sentences(candidates, classifier_pipeline, CANDIDATE_LABELS, batch_size=batch_size,
+                                         token_budget=token_budget)
+
+    best = {}
+    for owner, sentence, scores in zip(owners, candidates, sentence_scores):
+        score = scores.get(verdicts[owner][2], 0.0)
+        if score > best.get(owner, (None, 0.0))[1]:
+            best[owner] = (sentence, score)
+
+    assessments = []
+    for index, (sentences, (risk_level, description, _)) in enumerate(zip(doc_sentences, verdicts)):
+        if not sentences:
+            evidence = "No evidence available"
+        else:
+            evidence = f"Evidence: '{best.get(index, (sentences[0],))[0]}'"
+        assessments.append((risk_level, description, evidence))
+    return assessments
+
+def resolve_risk(top_label: str, text: str) -> tuple:
+    """
+    Maps the model's top label to (risk level, description, evidence label),
+    applying the critical keyword override.
+    """
+    # Check if any critical keyword (models/rules.json) appears as a whole word
+    is_critical_override = get_rule_engine().is_critical(text)
     
     # Determine risk level and description
-    # --- MODIFIED: Added check for 'is_critical_override' ---
     if "critical" in top_label or is_critical_override:
         risk_level = "Critical"
         description = "High threat detected"
@@ -36,19 +178,123 @@ def get_risk_assessment(text: str, classifier_pipeline) -> tuple:
     else:
         risk_level = "Benign"
         description = "Low threat potential"
-    
-    # Find evidence by analyzing individual sentences
-    evidence = find_evidence(text, top_label, classifier_pipeline, candidate_labels)
-    
+
+    return (risk_level, description, top_label)
+
+def prefilter_assessment(text: str, model) -> tuple:
+    """
+    (risk level, description, evidence) for a text the pre-filter labeled benign;
+    the evidence is the sentence the pre-filter finds most benign.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return ("Benign", "Low threat potential (pre-filter)", "No evidence available")
+    candidates = [s for s in sentences if len(s) >= MIN_EVIDENCE_LENGTH] or sentences
+    evidence = candidates[0] if len(candidates) == 1 else max(candidates, key=model.predict_proba)
+    return ("Benign", "Low threat potential (pre-filter)", f"Evidence: '{evidence}'")
+
+def count_tokens(text: str, classifier_pipeline) -> int:
+    """
+    Counts model tokens in text, falling back to a whitespace estimate when the
+    pipeline exposes no tokenizer.
+    """
+    tokenizer = getattr(classifier_pipeline, "tokenizer", None)
+    if tokenizer is None:
+        return len(text.split())
+    with stage("tokenize"):
+        n_tokens = len(tokenizer(text, add_special_tokens=False, truncation=False)["input_ids"])
+    record_size("tokens", n_tokens)
+    return n_tokens
+
+# --- SEGMENT ONCE, CLASSIFY ONCE ---
+def classify_sentences(sentences: list, classifier_pipeline, candidate_labels: list, batch_size: int = 16,
+                       token_budget: int | None = None) -> list:
+    """
+    Classifies all sentences in length-bucketed batches. Returns one {label: score} dict per sentence.
+    """
+    if not sentences:
+        return []
+    results = run_batched(classifier_pipeline, sentences, candidate_labels, batch_size=batch_size,
+                          token_budget=token_budget, pairs_per_input=len(candidate_labels))
+    return [dict(zip(result['labels'], result['scores'])) for result in results]
+
+def aggregate_scores(sentence_scores: list, candidate_labels: list, method: str = "max") -> dict:
+    """
+    Combines per-sentence label scores into document-level scores.
+
+    "max" takes the strongest sentence per label, "mean" averages all sentences, and
+    "attention" averages with softmax weights on each sentence's confidence, so
+    decisive sentences outweigh filler.
+    """
+    if method not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {method}")
+    if not sentence_scores:
+        return {label: 0.0 for label in candidate_labels}
+
+    if method == "max":
+        return {label: max(s.get(label, 0.0) for s in sentence_scores) for label in candidate_labels}
+
+    if method == "mean":
+        weights = [1.0] * len(sentence_scores)
+    else:
+        temperature = 0.1
+        confidences = [max(s.values()) / temperature for s in sentence_scores]
+        peak = max(confidences)
+        weights = [math.exp(c - peak) for c in confidences]
+
+    total = sum(weights)
+    return {
+        label: sum(w * s.get(label, 0.0) for w, s in zip(weights, sentence_scores)) / total
+        for label in candidate_labels
+    }
+
+@timed("risk.segmented")
+def _segmented_risk_assessment(text: str, classifier_pipeline, candidate_labels: list, aggregation: str) -> tuple:
+    """
+    Risk assessment from a single batched pass over the document's sentences; the
+    same sentence scores provide both the document label and the evidence.
+    """
+    sentences = split_sentences(text)
+    segmented = bool(sentences)
+    if not segmented:
+        # Nothing to segment; classify the raw text as-is
+        sentences = [text]
+
+    sentence_scores = classify_sentences(sentences, classifier_pipeline, candidate_labels)
+    doc_scores = aggregate_scores(sentence_scores, candidate_labels, aggregation)
+    top_label = max(candidate_labels, key=lambda label: doc_scores[label])
+    risk_level, description, top_label = resolve_risk(top_label, text)
+
+    # Same as full mode: no sentences, no evidence
+    if not segmented:
+        return (risk_level, description, "No evidence available")
+
+    # Reuse the sentence scores for evidence instead of classifying again
+    if len(sentences) == 1:
+        return (risk_level, description, f"Evidence: '{sentences[0]}'")
+    best_sentence, best_score = None, 0.0
+    for sentence, scores in zip(sentences, sentence_scores):
+        if len(sentence) < MIN_EVIDENCE_LENGTH:
+            continue
+        if scores.get(top_label, 0.0) > best_score:
+            best_sentence, best_score = sentence, scores[top_label]
+    evidence = f"Evidence: '{best_sentence or sentences[0]}'"
+
     return (risk_level, description, evidence)
 
+def split_sentences(text: str) -> list:
+    """
+    Splits text into sentences (simple regex-based approach).
+    """
+    sentences = re.split(r'[.!?]+', text.strip())
+    return [s.strip() for s in sentences if s.strip()]
+
+@timed("risk.evidence_loop")
 def find_evidence(text: str, predicted_label: str, classifier_pipeline, candidate_labels: list) -> str:
     """
     Finds the most relevant sentence as evidence for the classification.
     """
-    # Split text into sentences (simple regex-based approach)
-    sentences = re.split(r'[.!?]+', text.strip())
-    sentences = [s.strip() for s in sentences if s.strip()]
+    sentences = split_sentences(text)
     
     if not sentences:
         return "No evidence available"
@@ -86,4 +332,74 @@ def find_evidence(text: str, predicted_label: str, classifier_pipeline, candidat
         return f"Evidence: '{best_sentence}'"
     else:
         # Fallback: return the first sentence if no good evidence found
-        return f"Evidence: '{sentences[0]}'"
\ No newline at end of file
+        return f"Evidence: '{sentences[0]}'"
+
+# --- BATCHED EVIDENCE ENGINE ---
+def score_sentences(sentences: list, predicted_label: str, classifier_pipeline, candidate_labels: list,
+                    batch_size: int = 16, single_hypothesis: bool = False, token_budget: int | None = None) -> list:
+    """
+    Scores every sentence against the predicted label in length-bucketed batches.
+    With single_hypothesis=True only the predicted label's NLI hypothesis is run
+    (one forward pass per sentence instead of one per candidate label). Its score is
+    entailment vs contradiction for that one label, not the softmax over all labels
+    that find_evidence ranks by, so the two modes can pick different sentences.
+    """
+    if not sentences:
+        return []
+
+    if single_hypothesis:
+        results = run_batched(classifier_pipeline, sentences, [predicted_label], multi_label=True,
+                              batch_size=batch_size, token_budget=token_budget)
+    else:
+        results = run_batched(classifier_pipeline, sentences, candidate_labels, batch_size=batch_size,
+                              token_budget=token_budget, pairs_per_input=len(candidate_labels))
+
+    scores = []
+    for result in results:
+        try:
+            scores.append(result['scores'][result['labels'].index(predicted_label)])
+        except ValueError:
+            scores.append(0.0)
+    return scores
+
+def rank_evidence(text: str, predicted_label: str, classifier_pipeline, candidate_labels: list,
+                  top_k: int = 1, batch_size: int = 16, single_hypothesis: bool = False) -> list:
+    """
+    Returns up to top_k (sentence, score) pairs that best support the predicted label,
+    best first. Mirrors the selection rules of find_evidence.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    # If only one sentence, it is the evidence (no model call needed)
+    if len(sentences) == 1:
+        return [(sentences[0], 1.0)]
+
+    eligible = [s for s in sentences if len(s) >= MIN_EVIDENCE_LENGTH]
+    scores = score_sentences(eligible, predicted_label, classifier_pipeline, candidate_labels,
+                             batch_size=batch_size, single_hypothesis=single_hypothesis)
+
+    # Stable sort keeps the earliest sentence on ties, like the sequential loop
+    ranked = sorted(
+        ((sentence, score) for sentence, score in zip(eligible, scores) if score > 0.0),
+        key=lambda pair: pair[1],
+        reverse=True,
+    )
+    if not ranked:
+        # Fallback: the first sentence if no good evidence found
+        return [(sentences[0], 0.0)]
+    return ranked[:top_k]
+
+def find_evidence_batched(text: str, predicted_label: str, classifier_pipeline, candidate_labels: list,
+                          top_k: int = 1, batch_size: int = 16, single_hypothesis: bool = False) -> str:
+    """
+    Batched drop-in replacement for find_evidence. Returns the same "Evidence: '...'"
+    string; with top_k > 1 the best sentences are joined with " | ".
+    single_hypothesis trades that equivalence for speed (see score_sentences).
+    """
+    ranked = rank_evidence(text, predicted_label, classifier_pipeline, candidate_labels,
+                           top_k=top_k, batch_size=batch_size, single_hypothesis=single_hypothesis)
+    if not ranked:
+        return "No evidence available"
+    return "Evidence: " + " | ".join(f"'{sentence}'" for sentence, _ in ranked)
@@ -0,0 +1,153 @@
+"""
+Model loading for the app, CLI tools and benchmarks.
+
+Backends (PRESTO_BACKEND or the backend argument):
+    torch       PyTorch fp32 (default)
+    torch-int8  PyTorch with dynamic int8 quantization of Linear layers
+    onnx        ONNX Runtime, exported once into PRESTO_ONNX_DIR
+    onnx-int8   ONNX Runtime with a dynamically quantized int8 graph
+
+All backends return transformers pipelines with the same call interface, so
+get_entities and get_risk_assessment work unchanged. The ONNX backends need
+`pip install optimum[onnxruntime]`.
+
+One-time export (otherwise done on first load):
+    python -m models.loader export --backend onnx-int8
+
+Offline snapshots: `python -m models.loader prefetch --dir /srv/presto-models`
+downloads both models once; with PRESTO_MODEL_DIR pointing there they load
+from disk without touching the network.
+"""
+import os
+import argparse
+import platform
+
+from models.metrics import timed
+
+# Model identifiers used across the app, CLI tools and benchmarks
+NER_MODEL = "Davlan/distilbert-base-multilingual-cased-ner-hrl"
+CLASSIFIER_MODEL = "valhalla/distilbart-mnli-12-1"
+
+# Tokens shared by consecutive NER windows on inputs longer than the model accepts
+NER_STRIDE = 64
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+DEFAULT_BACKEND = os.getenv("PRESTO_BACKEND", "torch")
+MODEL_DIR = os.getenv("PRESTO_MODEL_DIR")
+ONNX_DIR = os.getenv("PRESTO_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "presto", "onnx"))
+
+@timed("model_load.ner")
+def load_ner_pipeline(backend: str | None = None):
+    """
+    Builds the multilingual NER pipeline (entities grouped into words). Inputs past
+    the model's 512 tokens are split into overlapping windows instead of truncated.
+    """
+    return _build_pipeline("ner", NER_MODEL, backend, aggregation_strategy="simple", stride=NER_STRIDE)
+
+@timed("model_load.classifier")
+def load_classifier_pipeline(backend: str | None = None):
+    """Builds the zero-shot classification pipeline used for risk assessment."""
+    return _build_pipeline("zero-shot-classification", CLASSIFIER_MODEL, backend)
+
+def _snapshot_dir(base_dir: str, model_name: str) -> str:
+    return os.path.join(base_dir, model_name.replace("/", "--"))
+
+def resolve_model(model_name: str) -> str:
+    """Local snapshot path for model_name if one was prefetched into MODEL_DIR, else the hub name."""
+    if MODEL_DIR:
+        local = _snapshot_dir(MODEL_DIR, model_name)
+        if os.path.isdir(local):
+            return local
+    return model_name
+
+def prefetch_models(target_dir: str) -> list:
+    """Downloads full snapshots of both models into target_dir for offline loading."""
+    from huggingface_hub import snapshot_download
+    paths = []
+    for model_name in (NER_MODEL, CLASSIFIER_MODEL):
+        paths.append(snapshot_download(repo_id=model_name, local_dir=_snapshot_dir(target_dir, model_name)))
+    return paths
+
+def _build_pipeline(task: str, model_name: str, backend: str | None, **kwargs):
+    from transformers import pipeline
+
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend} (choose from {', '.join(BACKENDS)})")
+
+    if backend == "torch":
+        return pipeline(task, model=resolve_model(model_name), **kwargs)
+
+    if backend == "torch-int8":
+        import torch
+        pipe = pipeline(task, model=resolve_model(model_name), **kwargs)
+        pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipe
+
+    from transformers import AutoTokenizer
+    quantize = backend == "onnx-int8"
+    model_dir, file_name = export_onnx(task, model_name, quantize=quantize)
+    model = _ort_model_class(task).from_pretrained(model_dir, file_name=file_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline(task, model=model, tokenizer=tokenizer, **kwargs)
+
+# --- ONNX EXPORT ---
+def _ort_model_class(task: str):
+    try:
+        from optimum.onnxruntime import ORTModelForTokenClassification, ORTModelForSequenceClassification
+    except ImportError as e:
+        raise ImportError("ONNX backends require optimum with onnxruntime: pip install optimum[onnxruntime]") from e
+    return ORTModelForTokenClassification if task == "ner" else ORTModelForSequenceClassification
+
+def onnx_model_dir(model_name: str) -> str:
+    return _snapshot_dir(ONNX_DIR, model_name)
+
+def export_onnx(task: str, model_name: str, quantize: bool = False) -> tuple:
+    """
+    Exports model_name to ONNX (and optionally an int8 copy) under ONNX_DIR unless
+    already there. Returns (model directory, ONNX file name to load).
+    """
+    model_dir = onnx_model_dir(model_name)
+    if not os.path.exists(os.path.join(model_dir, "model.onnx")):
+        from transformers import AutoTokenizer
+        source = resolve_model(model_name)
+        model = _ort_model_class(task).from_pretrained(source, export=True)
+        model.save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(source).save_pretrained(model_dir)
+
+    if not quantize:
+        return model_dir, "model.onnx"
+
+    if not os.path.exists(os.path.join(model_dir, "model_quantized.onnx")):
+        from optimum.onnxruntime import ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        if platform.machine().lower() in ("arm64", "aarch64"):
+            qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+        else:
+            qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        quantizer = ORTQuantizer.from_pretrained(model_dir, file_name="model.onnx")
+        quantizer.quantize(save_dir=model_dir, quantization_config=qconfig)
+    return model_dir, "model_quantized.onnx"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Convert both models for an ONNX backend")
+    export.add_argument("--backend", default="onnx", choices=["onnx", "onnx-int8"])
+    prefetch = commands.add_parser("prefetch", help="Snapshot both models into a local directory")
+    prefetch.add_argument("--dir", default=MODEL_DIR, required=MODEL_DIR is None)
+    args = parser.parse_args()
+
+    if args.command == "prefetch":
+        for path in prefetch_models(args.dir):
+            print(path)
+        print(f"Set PRESTO_MODEL_DIR={args.dir} to load these snapshots offline.")
+
+    if args.command == "export":
+        quantize = args.backend == "onnx-int8"
+        for task, model_name in (("ner", NER_MODEL), ("zero-shot-classification", CLASSIFIER_MODEL)):
+            model_dir, file_name = export_onnx(task, model_name, quantize=quantize)
+            print(f"{model_name}: {os.path.join(model_dir, file_name)}")
+
+if __name__ == "__main__":
+    main()
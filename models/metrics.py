@@ -0,0 +1,249 @@
+"""
+Lightweight instrumentation: per-stage latency histograms, counters and input
+size histograms, exported in Prometheus text format.
+
+    with stage("ner.model"):          # time a block
+        ...
+    @timed("risk")                    # time a function
+    record_size("chars", len(text))   # size histogram
+
+Every stage feeds the process-wide REGISTRY; inside `with trace() as t:` the
+stages are also collected on t, which is how the app shows the breakdown of the
+last analysis. Export with REGISTRY.render() (the inference service serves it
+at /metrics), PRESTO_METRICS_FILE (rewritten after each analysis, e.g. for the
+node_exporter textfile collector) or PRESTO_METRICS_PORT (a /metrics endpoint
+next to the Streamlit app).
+
+Profiling mode: with PRESTO_PROFILE_DIR set, profiled() runs a block under
+cProfile and writes <name>-<timestamp>.prof there (open with snakeviz or
+`python -m pstats`). py-spy needs no setup: `py-spy record --pid <app pid>`;
+model threads are named presto-model-*.
+"""
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_FILE = os.getenv("PRESTO_METRICS_FILE")
+METRICS_PORT = int(os.getenv("PRESTO_METRICS_PORT", "0"))
+PROFILE_DIR = os.getenv("PRESTO_PROFILE_DIR")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 10, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+def _labels(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{str(value)}"' for key, value in items.items()) + "}"
+
+class MetricsRegistry:
+    """Histograms, counters and callback gauges, keyed by name and label set. Thread-safe."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.callbacks = {}
+        self.lock = threading.Lock()
+
+    def observe(self, name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def register(self, name: str, callback, kind: str = "gauge"):
+        """Reports callback() as name on every render (kind "gauge" or "counter")."""
+        with self.lock:
+            self.callbacks[name] = (callback, kind)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            callbacks = sorted(self.callbacks.items())
+
+        typed = set()
+        for (name, labels), histogram in histograms:
+            labels = dict(labels)
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {histogram.count}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_labels(dict(labels))} {value}")
+        for name, (callback, kind) in callbacks:
+            try:
+                value = callback()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Writes render() to path atomically, so a scraper never reads a partial file."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+REGISTRY = MetricsRegistry()
+
+# --- STAGES AND TRACES ---
+class Trace:
+    """Stages and sizes recorded during one analysis."""
+
+    def __init__(self):
+        self.stages = []
+        self.sizes = {}
+        self.profile = None
+
+    def breakdown(self) -> list:
+        """[(stage, calls, total seconds)] in order of first appearance."""
+        totals = {}
+        for name, seconds in list(self.stages):
+            calls, total = totals.get(name, (0, 0.0))
+            totals[name] = (calls + 1, total + seconds)
+        return [(name, calls, total) for name, (calls, total) in totals.items()]
+
+_current_trace = contextvars.ContextVar("presto_trace", default=None)
+
+def record_stage(name: str, seconds: float):
+    """Records a stage timed elsewhere (e.g. in a worker process)."""
+    REGISTRY.observe("presto_stage_seconds", seconds, stage=name)
+    current = _current_trace.get()
+    if current is not None:
+        current.stages.append((name, seconds))
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_size(kind: str, value: int):
+    REGISTRY.observe("presto_input_size", value, SIZE_BUCKETS, kind=kind)
+    current = _current_trace.get()
+    if current is not None:
+        current.sizes[kind] = value
+
+@contextmanager
+def trace():
+    """Collects the stages and sizes recorded in this context (and in submit_traced work) on a Trace."""
+    current = Trace()
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+def submit_traced(executor, fn, *args, **kwargs):
+    """executor.submit that keeps the caller's trace, so stages on worker threads are collected too."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+# --- PROFILING ---
+@contextmanager
+def profiled(name: str, top: int = 25):
+    """
+    Runs the block under cProfile when PRESTO_PROFILE_DIR is set, writes the .prof
+    file and attaches {"path", "summary"} (top functions by cumulative time) to the
+    current trace. cProfile sees only the calling thread, so profile sequential runs.
+    """
+    if not PROFILE_DIR:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+        profile.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(top)
+        current = _current_trace.get()
+        if current is not None:
+            current.profile = {"path": path, "summary": summary.getvalue()}
+
+# --- EXPORT ---
+def export_metrics():
+    """Rewrites PRESTO_METRICS_FILE, if configured."""
+    if METRICS_FILE:
+        REGISTRY.write(METRICS_FILE)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(port: int) -> ThreadingHTTPServer:
+    """Serves REGISTRY at http://0.0.0.0:<port>/metrics from a daemon thread."""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="presto-metrics", daemon=True).start()
+    return server
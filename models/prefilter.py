@@ -0,0 +1,192 @@
+"""
+Cheap first stage of the risk cascade. Most traffic is routine chatter, so
+before the zero-shot model runs, get_risk_assessment asks the pre-filter
+whether a text is confidently benign:
+
+  1. Any rule hit (critical keyword or custom entity, models/rules.json) sends
+     the text on to the transformer.
+  2. A logistic regression over hashed word 1-2 grams, trained on the labeled
+     log history (python app/train_prefilter.py), estimates P(benign). At or
+     above PRESTO_PREFILTER_THRESHOLD (default 0.95) the text is labeled Benign
+     without the transformer; anything else (uncertain or risky) goes on.
+
+A random PRESTO_PREFILTER_AUDIT_RATE share (default 0.05) of the texts the
+pre-filter would skip still run through the transformer, which keeps a live
+agreement figure. The cascade is off unless PRESTO_PREFILTER=1 and a trained
+model exists at PRESTO_PREFILTER_PATH (default models/prefilter.json).
+"""
+import os
+import re
+import json
+import math
+import zlib
+import random
+import hashlib
+import threading
+import warnings
+
+from models.rules import get_rule_engine
+from models.metrics import REGISTRY
+
+PREFILTER_ENABLED = os.getenv("PRESTO_PREFILTER", "0") == "1"
+PREFILTER_PATH = os.getenv("PRESTO_PREFILTER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "prefilter.json"))
+PREFILTER_THRESHOLD = float(os.getenv("PRESTO_PREFILTER_THRESHOLD", "0.95"))
+PREFILTER_AUDIT_RATE = float(os.getenv("PRESTO_PREFILTER_AUDIT_RATE", "0.05"))
+
+# Hashed feature space (a power of two) and the longest word n-gram
+N_FEATURES = 1 << 18
+MAX_NGRAM = 2
+
+def features(text: str, n_features: int = N_FEATURES) -> dict:
+    """
+    Signed, hashed word 1-2 gram counts (log-scaled, L2-normalized) as {index: value}.
+    crc32 keeps the hashing identical across processes, unlike hash().
+    """
+    words = re.findall(r"\w+", text.lower())
+    counts = {}
+    for n in range(1, MAX_NGRAM + 1):
+        for i in range(len(words) - n + 1):
+            h = zlib.crc32(" ".join(words[i:i + n]).encode("utf-8"))
+            index, sign = h & (n_features - 1), 1.0 if h & 0x80000000 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+    values = {index: math.copysign(math.log1p(abs(count)), count) for index, count in counts.items() if count}
+    norm = math.sqrt(sum(value * value for value in values.values())) or 1.0
+    return {index: value / norm for index, value in values.items()}
+
+def _sigmoid(z: float) -> float:
+    if z < -35:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+class HashedLinearClassifier:
+    """Binary logistic regression over hashed n-grams; predicts P(benign)."""
+
+    def __init__(self, weights: dict | None = None, bias: float = 0.0, n_features: int = N_FEATURES, meta: dict | None = None):
+        self.weights = weights or {}
+        self.bias = bias
+        self.n_features = n_features
+        self.meta = meta or {}
+
+    def predict_proba(self, text: str) -> float:
+        z = self.bias + sum(self.weights.get(index, 0.0) * value for index, value in features(text, self.n_features).items())
+        return _sigmoid(z)
+
+    def fit(self, texts: list, benign: list, epochs: int = 8, learning_rate: float = 0.5, l2: float = 1e-5,
+            seed: int = 1) -> "HashedLinearClassifier":
+        """
+        SGD on the log loss. Classes are weighted by inverse frequency, so the
+        majority of benign chatter does not drown out the risky minority.
+        """
+        examples = [(features(text, self.n_features), 1.0 if label else 0.0) for text, label in zip(texts, benign)]
+        positives = sum(label for _, label in examples)
+        negatives = len(examples) - positives
+        class_weight = {1.0: len(examples) / (2 * positives) if positives else 1.0,
+                        0.0: len(examples) / (2 * negatives) if negatives else 1.0}
+        rng = random.Random(seed)
+        weights = self.weights
+        for epoch in range(epochs):
+            rng.shuffle(examples)
+            rate = learning_rate / (1 + epoch)
+            for x, y in examples:
+                p = _sigmoid(self.bias + sum(weights.get(index, 0.0) * value for index, value in x.items()))
+                gradient = (p - y) * class_weight[y]
+                for index, value in x.items():
+                    w = weights.get(index, 0.0)
+                    weights[index] = w - rate * (gradient * value + l2 * w)
+                self.bias -= rate * gradient
+        return self
+
+    def save(self, path: str):
+        weights = {str(index): round(w, 6) for index, w in self.weights.items() if abs(w) >= 1e-6}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"n_features": self.n_features, "bias": self.bias, "meta": self.meta, "weights": weights}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearClassifier":
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+        meta = dict(data.get("meta", {}), version=hashlib.sha256(raw).hexdigest()[:12])
+        return cls({int(index): w for index, w in data["weights"].items()}, data["bias"], data["n_features"], meta)
+
+# --- CASCADE ---
+class Cascade:
+    """
+    Decides which texts skip the transformer and keeps agreement and fallback
+    counts. Thread-safe: the model threads and Streamlit sessions share one instance.
+    """
+
+    def __init__(self, model: HashedLinearClassifier, threshold: float = PREFILTER_THRESHOLD,
+                 audit_rate: float = PREFILTER_AUDIT_RATE):
+        self.model = model
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self.lock = threading.Lock()
+        self.stats = {"documents": 0, "skipped": 0, "rule_hit": 0, "uncertain": 0, "risky": 0,
+                      "audited": 0, "audit_agreed": 0, "errors": 0}
+
+    @property
+    def version(self) -> str:
+        """Identifies the model and thresholds, for cache keys."""
+        return f"{self.model.meta.get('version', '')}:{self.threshold}"
+
+    def decide(self, text: str) -> tuple:
+        """
+        (outcome, P(benign)) where outcome is "skip" (confidently benign), "audit"
+        (confidently benign, but sampled to run through the transformer anyway),
+        "rule_hit", "uncertain" or "risky". A failing model counts as an error and escalates.
+        """
+        rules = get_rule_engine()
+        if rules.is_critical(text) or rules.custom_entities(text):
+            outcome, p_benign = "rule_hit", 0.0
+        else:
+            try:
+                p_benign = self.model.predict_proba(text)
+            except Exception:
+                self._count("errors")
+                p_benign = 0.0
+            if p_benign >= self.threshold:
+                # Audited texts run the transformer, so they are not counted as skipped
+                outcome = "audit" if self.audit_rate > 0 and random.random() < self.audit_rate else "skip"
+            else:
+                outcome = "uncertain" if p_benign >= 0.5 else "risky"
+        self._count("documents")
+        self._count({"skip": "skipped", "audit": "audited"}.get(outcome, outcome))
+        REGISTRY.inc("presto_prefilter_decisions_total", outcome=outcome)
+        return outcome, p_benign
+
+    def record_audit(self, transformer_benign: bool):
+        """Counts whether the transformer agreed (Benign) on an audited text."""
+        if transformer_benign:
+            self._count("audit_agreed")
+        REGISTRY.inc("presto_prefilter_audits_total", agreed=str(transformer_benign).lower())
+
+    def _count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def summary(self) -> dict:
+        """Counters plus skip rate (audited texts excluded) and audited agreement (None before the first audit)."""
+        with self.lock:
+            stats = dict(self.stats)
+        stats["skip_rate"] = stats["skipped"] / stats["documents"] if stats["documents"] else 0.0
+        stats["agreement"] = stats["audit_agreed"] / stats["audited"] if stats["audited"] else None
+        return stats
+
+_cascade = None
+_cascade_lock = threading.Lock()
+
+def get_cascade() -> Cascade | None:
+    """The configured cascade, or None when it is disabled or no trained model exists."""
+    global _cascade
+    if not PREFILTER_ENABLED:
+        return None
+    with _cascade_lock:
+        if _cascade is None:
+            try:
+                _cascade = Cascade(HashedLinearClassifier.load(PREFILTER_PATH))
+            except (OSError, ValueError, KeyError) as e:
+                # Every text goes to the transformer; warn once rather than on every call
+                warnings.warn(f"Pre-filter disabled, could not load {PREFILTER_PATH}: {e}")
+                _cascade = False
+    return _cascade or None
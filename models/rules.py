@@ -0,0 +1,170 @@
+"""
+Rule engine for keyword overrides, custom entities and label corrections.
+
+Rules live in a JSON file (models/rules.json, or PRESTO_RULES_PATH):
+
+    {
+        "critical_keywords": ["bomb", ...],                 # force a Critical verdict
+        "custom_entities": {"WEAPON": ["AK-47", ...], ...}, # extra entities by label
+        "label_corrections": {"Viper": "PER", ...}          # fix NER labels for known words
+    }
+
+All keywords and entity terms compile into one trie-shaped regex, so a text is
+scanned once however large the watchlist is. Terms only match as whole words
+("target" does not match "targeted") and case-insensitively; a space in a term
+matches any run of whitespace. Critical keywords also match their plural ("bombs",
+"hostages", "ieds"); names, callsigns and other entity terms match only as written.
+Entities are reported under their spelling in the rules file. get_rule_engine()
+reloads the file when it changes.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import warnings
+from functools import lru_cache
+
+from models.metrics import timed
+
+RULES_PATH = os.getenv("PRESTO_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json"))
+# Seconds between checks of the rules file's modification time
+RELOAD_CHECK_INTERVAL = 1.0
+
+def _normalize(term: str) -> str:
+    return " ".join(term.lower().split())
+
+def _plural_suffix(term: str) -> str:
+    """English plural ending of term: "es" after s, x, z, ch and sh, else "s"."""
+    return "es" if term.endswith(("s", "x", "z", "ch", "sh")) else "s"
+
+def _trie_regex(terms: list, plurals: set = frozenset()) -> str:
+    """
+    Builds a regex matching any of terms, shaped like a trie so matching cost
+    depends on the text, not on how many terms there are. Longer terms win.
+    Terms in plurals may be followed by their plural suffix.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        # The end marker holds what may follow the term ("" for nothing)
+        node[""] = _plural_suffix(term) if term in plurals else ""
+
+    def build(node: dict) -> str:
+        end = node.get("")
+        branches = [(r"\s+" if char == " " else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char != ""]
+        if end:
+            # Tried after the longer terms, like the end of the term itself
+            branches.append(end)
+        if not branches:
+            return ""
+        if len(branches) == 1 and end is None:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if end is not None else body
+
+    return build(trie)
+
+class RuleEngine:
+    def __init__(self, config: dict, version: str = ""):
+        self.version = version
+        self.critical_keywords = {_normalize(k) for k in config.get("critical_keywords", [])}
+        self.label_corrections = dict(config.get("label_corrections", {}))
+
+        # term -> entity label (None for keywords that are not entities)
+        self.terms = {keyword: None for keyword in self.critical_keywords}
+        # term -> spelling in the rules file, which is what entity matches report
+        self.spellings = {}
+        for label, entries in config.get("custom_entities", {}).items():
+            for entry in entries:
+                self.terms[_normalize(entry)] = label
+                self.spellings[_normalize(entry)] = " ".join(entry.split())
+        # Plural form -> keyword, to look matched plurals up under their keyword
+        self.plural_forms = {keyword + _plural_suffix(keyword): keyword for keyword in self.critical_keywords}
+
+        # The scan returns the longest match, so a longer term swallows a keyword it
+        # contains ("car bomb"); precompute which terms contain a critical keyword
+        keyword_regex = self._compile(self.critical_keywords, self.critical_keywords)
+        self.critical_terms = {term for term in self.terms if keyword_regex and keyword_regex.search(term)}
+
+        self.regex = self._compile(self.terms, self.critical_keywords)
+        self.scan = lru_cache(maxsize=8)(self._scan)
+
+    @staticmethod
+    def _compile(terms, plurals=frozenset()):
+        terms = [t for t in terms if t]
+        if not terms:
+            return None
+        return re.compile(r"(?<!\w)(?:" + _trie_regex(sorted(terms), plurals) + r")(?!\w)", re.IGNORECASE)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleEngine":
+        with open(path, "rb") as f:
+            raw = f.read()
+        return cls(json.loads(raw), version=hashlib.sha256(raw).hexdigest()[:12])
+
+    @timed("rules.scan")
+    def _scan(self, text: str) -> tuple:
+        """
+        One pass over text. Returns (is_critical, matches) where matches are
+        (word, label, start, end) for every custom entity occurrence.
+        Results for recent texts are cached, so the classifier and NER share one scan.
+        """
+        is_critical = False
+        matches = []
+        if self.regex is None:
+            return (False, ())
+        for match in self.regex.finditer(text):
+            term = _normalize(match.group(0))
+            if term not in self.terms:
+                term = self.plural_forms[term]
+            if term in self.critical_terms:
+                is_critical = True
+            label = self.terms.get(term)
+            if label is not None:
+                matches.append((self.spellings[term], label, match.start(), match.end()))
+        return (is_critical, tuple(matches))
+
+    def is_critical(self, text: str) -> bool:
+        return self.scan(text)[0]
+
+    def custom_entities(self, text: str) -> tuple:
+        return self.scan(text)[1]
+
+    def correct_label(self, word: str, label: str) -> str:
+        return self.label_corrections.get(word.strip(), label)
+
+# --- HOT RELOAD ---
+_engine = None
+_engine_mtime = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+def get_rule_engine() -> RuleEngine:
+    """
+    Returns the engine for RULES_PATH, recompiling it when the file changes. A file
+    that fails to load keeps the previous rules in force.
+    """
+    global _engine, _engine_mtime, _last_check
+    now = time.monotonic()
+    if _engine is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+        return _engine
+    with _lock:
+        _last_check = now
+        mtime = None
+        try:
+            mtime = os.stat(RULES_PATH).st_mtime_ns
+            if _engine is None or mtime != _engine_mtime:
+                _engine = RuleEngine.from_file(RULES_PATH)
+                _engine_mtime = mtime
+        except (OSError, ValueError) as e:
+            if _engine is None:
+                raise
+            # Remember the broken version so the warning is issued once, not every check
+            _engine_mtime = mtime
+            warnings.warn(f"Could not reload rules from {RULES_PATH}, keeping previous rules: {e}")
+    return _engine
@@ -0,0 +1,155 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from models.classifier import get_risk_assessment
+from models.NER import get_entities
+from models.loader import load_ner_pipeline, load_classifier_pipeline
+from models.metrics import record_stage, submit_traced, stage
+
+# How analyze runs the two models: one after the other, in two threads, or in two worker processes
+EXECUTION_MODES = ("sequential", "threads", "processes")
+
+def split_threads(n_tasks: int = 2) -> int:
+    """Intra-op threads each concurrent model gets so together they use every core once."""
+    return max(1, (os.cpu_count() or 1) // n_tasks)
+
+def set_torch_threads(n_threads: int) -> int | None:
+    """Sets torch intra-op threads (process-wide); returns the previous value."""
+    try:
+        import torch
+    except ImportError:
+        return None
+    previous = torch.get_num_threads()
+    torch.set_num_threads(n_threads)
+    return previous
+
+# Long-lived so OpenMP thread teams are reused between analyses
+_THREAD_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="presto-model")
+
+# The thread count is process-wide, so threads mode sets it once instead of per call;
+# setting and restoring it around each analysis raced between concurrent callers
+_THREADS_LOCK = threading.Lock()
+_threads_configured = False
+
+def _configure_split_threads():
+    global _threads_configured
+    with _THREADS_LOCK:
+        if not _threads_configured:
+            set_torch_threads(split_threads(2))
+            _threads_configured = True
+
+def _timed(fn, *args, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+class LimitedPipeline:
+    """
+    Wraps a pipeline so at most limit calls run at once across all threads;
+    further callers wait their turn instead of oversubscribing the CPU. Other
+    attributes (tokenizer, model, ...) pass through to the pipeline.
+    """
+
+    def __init__(self, pipeline, limit: int = 1, name: str = "model"):
+        self.pipeline = pipeline
+        self.semaphore = threading.BoundedSemaphore(limit)
+        self.name = name
+
+    def __call__(self, *args, **kwargs):
+        # Time spent waiting for a slot shows up as its own stage
+        with stage(f"model_wait.{self.name}"):
+            self.semaphore.acquire()
+        try:
+            return self.pipeline(*args, **kwargs)
+        finally:
+            self.semaphore.release()
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+# --- PROCESS WORKERS ---
+# Each worker process owns exactly one model, loaded once by the pool initializer
+_WORKER_PIPELINE = None
+
+def _init_worker(task: str, n_threads: int):
+    global _WORKER_PIPELINE
+    set_torch_threads(n_threads)
+    _WORKER_PIPELINE = load_ner_pipeline() if task == "ner" else load_classifier_pipeline()
+
+def _run_risk(text: str, risk_mode: str, risk_aggregation: str) -> tuple:
+    return _timed(get_risk_assessment, text, _WORKER_PIPELINE, mode=risk_mode, aggregation=risk_aggregation)
+
+def _run_ner(text: str) -> tuple:
+    return _timed(get_entities, text, _WORKER_PIPELINE)
+
+class ModelProcessPool:
+    """
+    Two single-worker process pools, one per model, so NER and classification run
+    on separate interpreters (no shared GIL) with their own share of CPU threads.
+    """
+
+    def __init__(self, n_threads: int | None = None):
+        n_threads = n_threads or split_threads(2)
+        self.risk = ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=("classifier", n_threads))
+        self.ner = ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=("ner", n_threads))
+
+    def shutdown(self):
+        self.risk.shutdown()
+        self.ner.shutdown()
+
+# --- ORCHESTRATION ---
+def run_ner(text: str, ner_pipeline=None, process_pool: ModelProcessPool | None = None) -> list:
+    """NER alone, in process_pool's NER worker when given, else on ner_pipeline."""
+    if process_pool is None:
+        return get_entities(text, ner_pipeline)
+    entities, ner_time = process_pool.ner.submit(_run_ner, text).result()
+    record_stage("ner", ner_time)
+    return entities
+
+def run_analysis(text: str, ner_pipeline=None, classifier_pipeline=None, mode: str = "sequential",
+                 process_pool: ModelProcessPool | None = None, timings: dict | None = None,
+                 risk_mode: str = "full", risk_aggregation: str = "max") -> dict:
+    """
+    Runs risk assessment and NER on text and returns the analyze_text result dict.
+
+    mode="threads" runs both models concurrently with the CPU cores split between
+    them; mode="processes" sends each model's work to its own worker in process_pool.
+    risk_mode and risk_aggregation are passed on to get_risk_assessment.
+
+    If timings is given it is filled with per-model seconds ("risk", "ner"), their
+    "sum" and the "wall" clock time.
+
+    The first threads-mode call splits torch's threads for the whole process and
+    leaves them split, so other modes in the same process then get half the cores.
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode: {mode}")
+
+    start = time.perf_counter()
+    if mode == "sequential":
+        (risk, risk_time) = _timed(get_risk_assessment, text, classifier_pipeline, mode=risk_mode, aggregation=risk_aggregation)
+        (entities, ner_time) = _timed(get_entities, text, ner_pipeline)
+    elif mode == "threads":
+        _configure_split_threads()
+        risk_future = submit_traced(_THREAD_POOL, _timed, get_risk_assessment, text, classifier_pipeline,
+                                    mode=risk_mode, aggregation=risk_aggregation)
+        ner_future = submit_traced(_THREAD_POOL, _timed, get_entities, text, ner_pipeline)
+        (risk, risk_time), (entities, ner_time) = risk_future.result(), ner_future.result()
+    else:
+        if process_pool is None:
+            raise ValueError("mode='processes' requires a ModelProcessPool")
+        risk_future = process_pool.risk.submit(_run_risk, text, risk_mode, risk_aggregation)
+        ner_future = process_pool.ner.submit(_run_ner, text)
+        (risk, risk_time), (entities, ner_time) = risk_future.result(), ner_future.result()
+        # Stages inside the workers stay in their processes; record the per-model totals here
+        record_stage("risk", risk_time)
+        record_stage("ner", ner_time)
+    wall = time.perf_counter() - start
+
+    if timings is not None:
+        timings.update({"mode": mode, "risk": risk_time, "ner": ner_time, "sum": risk_time + ner_time, "wall": wall})
+
+    risk_level, risk_details, evidence = risk
+    return {"risk_level": risk_level, "risk_details": risk_details, "evidence": evidence, "entities": entities}
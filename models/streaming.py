@@ -0,0 +1,185 @@
+import os
+import re
+
+from models.classifier import get_risk_assessment, count_tokens, MODEL_MAX_TOKENS
+from models.NER import get_entity_spans
+
+# Token budget per window: the NER model (DistilBERT) accepts 512 tokens incl. [CLS]/[SEP]
+CHUNK_MAX_TOKENS = 510
+# Tokens shared by consecutive windows so entities on a boundary are seen whole at least once
+CHUNK_STRIDE = 64
+# Characters tokenized at a time when looking for the end of a window (grown on demand)
+CHARS_PER_TOKEN_GUESS = 8
+
+# Documents past this many classifier tokens are analyzed window by window. Shorter ones go
+# through get_risk_assessment whole, where "auto" risk mode segments anything past the
+# classifier's 1024-token window, so the threshold must sit above it
+STREAMING_THRESHOLD_TOKENS = int(os.getenv("PRESTO_STREAMING_THRESHOLD_TOKENS", str(4 * MODEL_MAX_TOKENS)))
+
+RISK_SEVERITY = {"Benign": 0, "Suspicious": 1, "Critical": 2}
+
+# --- CHUNKER ---
+def _token_offsets(window: str, tokenizer) -> list:
+    """
+    Returns (start, end) character offsets of each token in window. Without a
+    tokenizer, whitespace-separated words stand in for tokens.
+    """
+    if tokenizer is None:
+        return [m.span() for m in re.finditer(r"\S+", window)]
+    encoding = tokenizer(window, add_special_tokens=False, truncation=False, return_offsets_mapping=True)
+    return [tuple(span) for span in encoding["offset_mapping"]]
+
+def iter_chunks(text: str, tokenizer=None, max_tokens: int = CHUNK_MAX_TOKENS, stride: int = CHUNK_STRIDE):
+    """
+    Yields (start, end, chunk_text) windows of at most max_tokens tokens, with
+    consecutive windows overlapping by about stride tokens. Only a bounded slice of
+    text is tokenized per window, so cost per window does not depend on input size.
+    """
+    if stride >= max_tokens:
+        raise ValueError("stride must be smaller than max_tokens")
+
+    pos = 0
+    length = len(text)
+    initial_chars = max_tokens * CHARS_PER_TOKEN_GUESS
+    window_chars = initial_chars
+    while pos < length:
+        window = text[pos:pos + window_chars]
+        offsets = _token_offsets(window, tokenizer)
+
+        if len(offsets) <= max_tokens:
+            if pos + window_chars >= length:
+                # Remainder fits in one window
+                if offsets:
+                    yield (pos, length, text[pos:])
+                return
+            # Window held fewer tokens than needed; look further ahead
+            window_chars *= 2
+            continue
+
+        # Cut at the start of the first token that does not fit, backing off to a
+        # word boundary so a word is not split between windows
+        cut = max_tokens
+        for i in range(max_tokens, max_tokens - stride, -1):
+            start = offsets[i][0]
+            if start == 0 or window[start - 1].isspace():
+                cut = i
+                break
+        end = offsets[cut][0]
+        yield (pos, pos + end, text[pos:pos + end])
+
+        # Next window starts stride tokens before the cut; one sparse stretch of text
+        # should not make every later window tokenize a larger slice
+        next_start = offsets[max(cut - stride, 1)][0]
+        pos += next_start
+        window_chars = initial_chars
+
+# --- ENTITY MERGING ---
+class EntityMerger:
+    """
+    Merges entity spans from overlapping windows. Spans overlapping one another are
+    collapsed to the longest (a name cut by a window edge is seen whole in the
+    neighbouring window). Spans ending before the next window can no longer change
+    and are released by commit().
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def add(self, spans: list):
+        for span in spans:
+            overlapping = [p for p in self.pending if span["start"] < p["end"] and p["start"] < span["end"]]
+            if any(p["end"] - p["start"] >= span["end"] - span["start"] for p in overlapping):
+                continue
+            self.pending = [p for p in self.pending if p not in overlapping]
+            self.pending.append(span)
+        self.pending.sort(key=lambda s: (s["start"], s["end"]))
+
+    def commit(self, upto: int | None = None) -> list:
+        """Releases spans ending at or before upto (all spans when upto is None)."""
+        if upto is None:
+            done, self.pending = self.pending, []
+        else:
+            done = [s for s in self.pending if s["end"] <= upto]
+            self.pending = [s for s in self.pending if s["end"] > upto]
+        return done
+
+def unique_entities(spans: list) -> list:
+    """
+    (word, label) pairs of spans in document order, each pair once. Every window
+    reports the names it sees, so a name mentioned across windows would repeat.
+    """
+    return list(dict.fromkeys((span["word"], span["label"]) for span in spans))
+
+# --- STREAMING ANALYSIS ---
+def needs_streaming(text: str, classifier_pipeline=None, threshold: int = STREAMING_THRESHOLD_TOKENS) -> bool:
+    """
+    True when text is longer than threshold classifier tokens. Without a pipeline
+    (e.g. models in worker processes), words stand in for tokens.
+    """
+    # Every token covers at least one character, so short texts skip the tokenizer
+    if len(text) <= threshold:
+        return False
+    return count_tokens(text, classifier_pipeline) > threshold
+
+def analyze_stream(text: str, ner_pipeline, classifier_pipeline, max_tokens: int = CHUNK_MAX_TOKENS,
+                   stride: int = CHUNK_STRIDE, risk_mode: str = "full", risk_aggregation: str = "max"):
+    """
+    Runs NER and risk classification window by window and yields one update per
+    window as it finishes:
+
+        {"chunk": i, "start": ..., "end": ..., "progress": 0..1,
+         "chunk_risk": (level, description, evidence), "risk_level": ..., "risk_details": ...,
+         "evidence": ..., "entities": [new final spans], "done": bool}
+
+    risk_level/risk_details/evidence are the running document verdict (the most severe
+    window so far). "entities" holds only spans finalized by this window, so the
+    caller decides whether to accumulate them.
+    """
+    tokenizer = getattr(ner_pipeline, "tokenizer", None)
+    merger = EntityMerger()
+    verdict = None
+    previous = None
+
+    def update(index, chunk, next_start, done):
+        nonlocal verdict
+        start, end, chunk_text = chunk
+        chunk_risk = get_risk_assessment(chunk_text, classifier_pipeline, mode=risk_mode, aggregation=risk_aggregation)
+        if verdict is None or RISK_SEVERITY.get(chunk_risk[0], 0) > RISK_SEVERITY.get(verdict[0], 0):
+            verdict = chunk_risk
+        merger.add(get_entity_spans(chunk_text, ner_pipeline, offset=start))
+        return {
+            "chunk": index,
+            "start": start,
+            "end": end,
+            "progress": end / len(text) if text else 1.0,
+            "chunk_risk": chunk_risk,
+            "risk_level": verdict[0],
+            "risk_details": verdict[1],
+            "evidence": verdict[2],
+            "entities": merger.commit(None if done else next_start),
+            "done": done,
+        }
+
+    # Hold each window back by one so the update knows where the next window starts
+    index = -1
+    for index, chunk in enumerate(iter_chunks(text, tokenizer, max_tokens, stride)):
+        if previous is not None:
+            yield update(index - 1, previous, chunk[0], done=False)
+        previous = chunk
+    if previous is not None:
+        yield update(index, previous, None, done=True)
+
+def analyze_chunked(text: str, ner_pipeline, classifier_pipeline, **kwargs) -> dict:
+    """
+    Consumes analyze_stream and returns the same result dict as a single-pass
+    analysis, plus "entity_spans" with character offsets.
+    """
+    result = {"risk_level": "Benign", "risk_details": "Low threat potential",
+              "evidence": "No evidence available", "entities": [], "entity_spans": []}
+    for update in analyze_stream(text, ner_pipeline, classifier_pipeline, **kwargs):
+        result["risk_level"] = update["risk_level"]
+        result["risk_details"] = update["risk_details"]
+        result["evidence"] = update["evidence"]
+        result["entity_spans"].extend(update["entities"])
+    result["entities"] = unique_entities(result["entity_spans"])
+    return result
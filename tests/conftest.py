@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Scripts and the app import app/ modules flat, next to the models package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "app"))
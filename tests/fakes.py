@@ -0,0 +1,49 @@
+"""Stub pipelines with the call signatures of the transformers ones, so tests need no models."""
+import re
+import zlib
+
+class FakeClassifier:
+    """
+    Zero-shot stand-in: scores each label by a hash of (text, label), so results are
+    deterministic. Raises for texts containing fail_on.
+    """
+
+    tokenizer = None
+
+    def __init__(self, fail_on: str | None = None):
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def __call__(self, sequences, candidate_labels, multi_label=False, **kwargs):
+        self.calls += 1
+        single = isinstance(sequences, str)
+        results = [self._classify(text, candidate_labels, multi_label) for text in ([sequences] if single else sequences)]
+        return results[0] if single else results
+
+    def _classify(self, text: str, labels: list, multi_label: bool) -> dict:
+        if self.fail_on and self.fail_on in text:
+            raise RuntimeError(f"cannot classify {text[:20]!r}")
+        scores = [(zlib.crc32((text + label).encode()) % 1000 + 1) / 1000 for label in labels]
+        if not multi_label:
+            total = sum(scores)
+            scores = [score / total for score in scores]
+        order = sorted(range(len(labels)), key=lambda i: -scores[i])
+        return {"sequence": text, "labels": [labels[i] for i in order], "scores": [scores[i] for i in order]}
+
+class FakeNER:
+    """Token-classification stand-in: every capitalized word run is a PER entity."""
+
+    tokenizer = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, inputs, **kwargs):
+        self.calls += 1
+        if isinstance(inputs, list):
+            return [self._entities(text) for text in inputs]
+        return self._entities(inputs)
+
+    def _entities(self, text: str) -> list:
+        return [{"word": m.group(0), "entity_group": "PER", "start": m.start(), "end": m.end(), "score": 0.9}
+                for m in re.finditer(r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)*\b", text)]
@@ -0,0 +1,67 @@
+import json
+import multiprocessing
+
+import pytest
+
+import batch
+from batch import ParquetWriter
+from fakes import FakeClassifier, FakeNER
+
+def success(doc_id: str) -> dict:
+    return {"id": doc_id, "risk_level": "Benign", "risk_details": "Low threat potential",
+            "evidence": "Evidence: 'all quiet'", "entities": [("Viper", "PER")], "chars": 9, "latency": 0.5}
+
+def failure(doc_id: str) -> dict:
+    return {"id": doc_id, "error": "RuntimeError: boom", "chars": 3, "latency": 0.1}
+
+def test_parquet_mixes_success_and_failure_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "results.parquet")
+    writer = ParquetWriter(path, row_group_size=2)
+    # Row groups: [ok, failed], [failed, failed], [ok]
+    records = [success("a"), failure("b"), failure("c"), failure("d"), success("e")]
+    for record in records:
+        assert writer.write(record) == []
+
+    assert writer.close() == ["a", "b", "c", "d", "e"]
+    table = pq.read_table(path)
+    assert table.schema == writer.schema
+    rows = table.to_pylist()
+    assert [row["id"] for row in rows] == ["a", "b", "c", "d", "e"]
+    assert rows[0]["error"] is None and rows[0]["entities"] == '[["Viper", "PER"]]'
+    assert rows[2]["risk_level"] is None and rows[2]["error"] == "RuntimeError: boom"
+    assert rows[4]["latency"] == 0.5
+
+def test_parquet_resume_writes_new_part(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "results.parquet"
+    path.write_bytes(b"")
+    assert ParquetWriter(str(path)).path == str(tmp_path / "results.part1.parquet")
+
+def run_batch(monkeypatch, source, output, fail_on=None):
+    # Worker processes are forked, so they inherit the patched loaders
+    monkeypatch.setattr(batch, "load_classifier_pipeline", lambda: FakeClassifier(fail_on))
+    monkeypatch.setattr(batch, "load_ner_pipeline", FakeNER)
+    batch.main([str(source), "-o", str(output), "--workers", "1", "--threads-per-worker", "1"])
+
+def read_jsonl(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="patched loaders need forked workers")
+def test_resume_retries_failures_without_duplicates(tmp_path, monkeypatch):
+    source, output = tmp_path / "docs.jsonl", tmp_path / "results.jsonl"
+    with open(source, "w", encoding="utf-8") as f:
+        for doc_id, text in [("a", "Viper met Ghost at the bridge."), ("b", "Payload boom tonight."), ("c", "All quiet.")]:
+            f.write(json.dumps({"id": doc_id, "text": text}) + "\n")
+
+    run_batch(monkeypatch, source, output, fail_on="boom")
+    assert sorted(r["id"] for r in read_jsonl(output)) == ["a", "c"]
+    assert [r["id"] for r in read_jsonl(f"{output}.errors")] == ["b"]
+    assert batch.load_checkpoint(f"{output}.checkpoint") == {"a", "c"}
+
+    # The resumed run analyzes only the failed document
+    run_batch(monkeypatch, source, output)
+    assert sorted(r["id"] for r in read_jsonl(output)) == ["a", "b", "c"]
+    assert read_jsonl(f"{output}.errors") == []
+    assert batch.load_checkpoint(f"{output}.checkpoint") == {"a", "b", "c"}
@@ -0,0 +1,49 @@
+from models.batching import length_buckets, run_batched, token_lengths
+
+class EchoPipeline:
+    """Records each call's inputs and batch size; returns one dict per input."""
+
+    tokenizer = None
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs, *args, batch_size=1, **kwargs):
+        self.calls.append((list(inputs), batch_size))
+        return [{"text": text, "args": args} for text in inputs]
+
+def test_token_lengths_without_tokenizer_counts_words():
+    assert token_lengths(["one two three", ""], EchoPipeline()) == [5, 2]
+
+def test_buckets_respect_the_budget():
+    lengths = [10, 200, 12, 11, 190, 9]
+    buckets = length_buckets(lengths, token_budget=400)
+    assert sorted(i for bucket in buckets for i in bucket) == list(range(6))
+    for bucket in buckets:
+        assert len(bucket) * max(lengths[i] for i in bucket) <= 400
+    # Similar lengths end up together
+    assert {5, 0, 3, 2} <= set(buckets[0])
+
+def test_oversized_input_gets_its_own_bucket():
+    assert length_buckets([5, 1000, 5], token_budget=100) == [[0, 2], [1]]
+
+def test_pairs_per_input_scale_the_cost():
+    assert len(length_buckets([10] * 6, token_budget=60, pairs_per_input=3)) == 3
+
+def test_run_batched_keeps_input_order():
+    pipeline = EchoPipeline()
+    texts = ["a " * 50, "b", "c " * 20, "d"]
+    results = run_batched(pipeline, texts, "label", token_budget=64)
+    assert [r["text"] for r in results] == texts
+    assert all(r["args"] == ("label",) for r in results)
+    assert len(pipeline.calls) > 1
+
+def test_zero_budget_uses_fixed_batches():
+    pipeline = EchoPipeline()
+    run_batched(pipeline, ["a", "b", "c"], batch_size=2, token_budget=0)
+    assert pipeline.calls == [(["a", "b", "c"], 2)]
+
+def test_single_dict_output_is_wrapped():
+    single = lambda inputs, **kwargs: {"text": inputs[0]}
+    assert run_batched(single, ["only"], token_budget=100) == [{"text": "only"}]
+    assert run_batched(single, [], token_budget=100) == []
@@ -0,0 +1,47 @@
+from dedup import NearDuplicateIndex, minhash, similarity
+
+REPORT = ("Convoy of three trucks left the northern depot at dawn heading for the river crossing, "
+          "escort vehicles followed two kilometres behind and radio traffic stayed light all morning.")
+
+def test_signature_is_stable_and_case_insensitive():
+    assert minhash(REPORT) == minhash(REPORT.upper())
+    assert similarity(minhash(REPORT), minhash(REPORT)) == 1.0
+
+def test_finds_near_duplicate_above_threshold():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("a", REPORT, {"risk": "Benign"})
+    score, entry = index.find("FWD: " + REPORT)
+    assert score >= 0.8 and entry["key"] == "a" and entry["result"] == {"risk": "Benign"}
+    assert index.find("Market prices rose slightly across the city while the weather stayed dry.") is None
+    assert index.stats["lookups"] == 2 and index.stats["hits"] == 1
+
+def test_scopes_are_kept_apart():
+    index = NearDuplicateIndex()
+    index.add("a", REPORT, {}, scope="model-a")
+    assert index.find(REPORT, scope="model-b") is None
+    assert index.find(REPORT, scope="model-a") is not None
+
+def test_rule_hits_must_match():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add("a", REPORT, {"risk": "Benign"})
+    assert index.find(REPORT + " bomb") is None
+    assert index.stats["rule_mismatches"] == 1
+
+def test_evicts_least_recently_matched():
+    index = NearDuplicateIndex(max_entries=2)
+    texts = {key: f"Report {key}: " + " ".join(f"{key}{i}" for i in range(20)) for key in "abc"}
+    index.add("a", texts["a"], {})
+    index.add("b", texts["b"], {})
+    assert index.find(texts["a"]) is not None
+    index.add("c", texts["c"], {})
+    assert list(index.entries) == ["a", "c"]
+    assert index.find(texts["b"]) is None
+    assert all("b" not in keys for keys in index.buckets.values())
+
+def test_set_log_id():
+    index = NearDuplicateIndex()
+    index.add("a", REPORT, {})
+    assert index.find(REPORT)[1]["log_id"] is None
+    index.set_log_id("a", 42)
+    index.set_log_id("missing", 7)
+    assert index.find(REPORT)[1]["log_id"] == 42
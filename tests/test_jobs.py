@@ -0,0 +1,117 @@
+import time
+import sqlite3
+
+import pytest
+
+from jobs import JobCancelled, JobQueue, JobStore
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"), aging_seconds=0)
+
+def wait_finished(store, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_identical_uploads_share_a_job(store):
+    first = store.submit("report", priority=1, role="analyst", cache_key="k", submitter="alice")
+    second = store.submit("report", priority=3, role="director", cache_key="k", submitter="bob")
+    assert first == second
+    job = store.get(first)
+    assert (job["priority"], job["role"], job["submitter"]) == (3, "director", "alice")
+    assert store.submit("report", priority=0, cache_key="k") == first
+    assert store.get(first)["priority"] == 3
+
+def test_cancel_waits_for_every_submitter(store):
+    job_id = store.submit("report", cache_key="k", submitter="alice")
+    store.submit("report", cache_key="k", submitter="bob")
+    assert not store.cancel(job_id, "alice")
+    assert store.get(job_id)["status"] == "queued"
+    assert store.cancel(job_id, "bob")
+    assert store.get(job_id)["status"] == "cancelled"
+
+def test_claims_highest_priority_first(store):
+    low = store.submit("low", priority=0)
+    high = store.submit("high", priority=5)
+    assert store.position(low) == 1 and store.position(high) == 0
+    assert store.claim()["id"] == high
+    assert store.claim()["id"] == low
+    assert store.claim() is None
+
+def test_aging_lets_old_jobs_overtake(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), aging_seconds=10)
+    old = store.submit("old", priority=0)
+    store._execute("UPDATE jobs SET submitted_at = submitted_at - 60 WHERE id = ?", (old,))
+    store.submit("new", priority=3)
+    assert store.claim()["id"] == old
+
+def test_negative_aging_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        JobStore(str(tmp_path / "jobs.db"), aging_seconds=-1)
+
+def test_running_jobs_are_requeued_on_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    job_id = JobStore(path).submit("report")
+    JobStore(path).claim()
+    job = JobStore(path).get(job_id)
+    assert job["status"] == "queued" and job["started_at"] is None
+
+def test_old_database_gains_submitter_column(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, role TEXT, "
+                 "cache_key TEXT, text TEXT NOT NULL, submitted_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+                 "progress REAL NOT NULL DEFAULT 0, partial TEXT, result TEXT, error TEXT, "
+                 "cancel_requested INTEGER NOT NULL DEFAULT 0)")
+    conn.commit()
+    conn.close()
+    store = JobStore(path)
+    assert store.get(store.submit("report", submitter="alice"))["submitter"] == "alice"
+
+def test_queue_runs_handler_and_reports_progress(store):
+    def handler(text, report):
+        report(0.5, {"seen": text})
+        if text == "bad":
+            raise RuntimeError("model crashed")
+        return {"length": len(text)}
+    queue = JobQueue(store, handler, workers=1, poll_interval=0.05)
+    try:
+        job = wait_finished(store, queue.submit("report"))
+        failed = wait_finished(store, queue.submit("bad"))
+    finally:
+        queue.close()
+    assert job["status"] == "done" and job["result"] == {"length": 6} and job["progress"] == 1
+    assert job["partial"] == {"seen": "report"}
+    assert failed["status"] == "failed" and failed["error"] == "RuntimeError: model crashed"
+
+def test_running_job_stops_at_next_report(store):
+    started = []
+    def handler(text, report):
+        started.append(text)
+        for i in range(200):
+            report(i / 200)
+            time.sleep(0.01)
+        return {"finished": True}
+    queue = JobQueue(store, handler, workers=1, poll_interval=0.05)
+    try:
+        job_id = queue.submit("long report", submitter="alice")
+        while not started:
+            time.sleep(0.01)
+        assert queue.cancel(job_id, "alice")
+        job = wait_finished(store, job_id)
+    finally:
+        queue.close()
+    assert job["status"] == "cancelled" and job["result"] is None
+
+def test_report_raises_once_cancelled(store):
+    job_id = store.submit("report")
+    store.claim()
+    store.report(job_id, 0.1)
+    store.cancel(job_id)
+    with pytest.raises(JobCancelled):
+        store.report(job_id, 0.2)
@@ -0,0 +1,36 @@
+import random
+
+from models.prefilter import Cascade
+
+class ConstantModel:
+    meta = {}
+
+    def __init__(self, p_benign: float):
+        self.p_benign = p_benign
+
+    def predict_proba(self, text: str) -> float:
+        return self.p_benign
+
+def test_audited_texts_are_not_counted_as_skipped():
+    random.seed(3)
+    cascade = Cascade(ConstantModel(0.99), threshold=0.9, audit_rate=0.25)
+    outcomes = [cascade.decide("all quiet tonight")[0] for _ in range(200)]
+    stats = cascade.summary()
+    assert set(outcomes) == {"skip", "audit"}
+    assert stats["skipped"] == outcomes.count("skip")
+    assert stats["audited"] == outcomes.count("audit")
+    assert stats["skip_rate"] == stats["skipped"] / 200
+
+def test_audit_agreement():
+    cascade = Cascade(ConstantModel(0.99), threshold=0.9, audit_rate=1.0)
+    assert cascade.decide("all quiet tonight")[0] == "audit"
+    assert cascade.decide("nothing to report")[0] == "audit"
+    cascade.record_audit(True)
+    cascade.record_audit(False)
+    assert cascade.summary()["agreement"] == 0.5
+
+def test_rule_hits_and_uncertain_texts_escalate():
+    cascade = Cascade(ConstantModel(0.7), threshold=0.9, audit_rate=0.0)
+    assert cascade.decide("they plan to bomb the bridge")[0] == "rule_hit"
+    assert cascade.decide("meet at the market")[0] == "uncertain"
+    assert cascade.summary()["skipped"] == 0
@@ -0,0 +1,52 @@
+import pytest
+
+from models.rules import RuleEngine
+
+CONFIG = {
+    "critical_keywords": ["bomb", "hostage", "ied", "bus"],
+    "custom_entities": {
+        "WEAPON": ["AK-47", "RPG", "IED"],
+        "CALLSIGN": ["Bravo Six", "Ghost"],
+    },
+    "label_corrections": {"Viper": "PER"},
+}
+
+@pytest.fixture
+def engine():
+    return RuleEngine(CONFIG)
+
+@pytest.mark.parametrize("text", ["a bomb", "two bombs", "the hostages", "BOMBS", "three buses"])
+def test_keywords_match_singular_and_plural(engine, text):
+    assert engine.is_critical(text)
+
+@pytest.mark.parametrize("text", ["bombes", "bombed", "busses", "hostageses", "targeted"])
+def test_keywords_match_whole_words_only(engine, text):
+    assert not engine.is_critical(text)
+
+@pytest.mark.parametrize("text", ["Ghosts at the gate", "Bravo sixes", "rpges", "RPGs"])
+def test_entities_do_not_match_plurals(engine, text):
+    assert engine.custom_entities(text) == ()
+
+def test_entities_report_the_rules_spelling(engine):
+    matches = engine.custom_entities("ghost and bravo   SIX sighted")
+    assert matches == (("Ghost", "CALLSIGN", 0, 5), ("Bravo Six", "CALLSIGN", 10, 21))
+
+def test_plural_keyword_that_is_an_entity_reports_its_term(engine):
+    # "ied" is both a critical keyword and a WEAPON entity
+    text = "Two IEDs found"
+    assert engine.is_critical(text)
+    assert engine.custom_entities(text) == (("IED", "WEAPON", 4, 8),)
+
+def test_longer_term_wins():
+    engine = RuleEngine({"critical_keywords": ["bomb"], "custom_entities": {"WEAPON": ["car bomb"]}})
+    assert engine.custom_entities("a car bomb") == (("car bomb", "WEAPON", 2, 10),)
+    # A term containing a keyword is critical itself
+    assert engine.is_critical("a car bomb")
+
+def test_label_corrections(engine):
+    assert engine.correct_label(" Viper ", "ORG") == "PER"
+    assert engine.correct_label("Eagle", "ORG") == "ORG"
+
+def test_empty_rules():
+    engine = RuleEngine({})
+    assert engine.scan("anything at all") == (False, ())
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+import server
+from fakes import FakeClassifier, FakeNER
+
+LONG_TEXT = "Viper moves the package at dawn. " * 40
+
+def test_batch_failure_falls_back_to_single_items():
+    def process(items):
+        if "bad" in items:
+            raise ValueError("bad input")
+        return [item.upper() for item in items]
+
+    async def scenario():
+        batcher = server.MicroBatcher(process, max_batch_size=3, max_wait_ms=50)
+        batcher.start()
+        results = await asyncio.gather(*(batcher.submit(item) for item in ("a", "bad", "c")), return_exceptions=True)
+        await batcher.stop()
+        return results, batcher.stats
+
+    (first, bad, last), stats = asyncio.run(scenario())
+    assert (first, last) == ("A", "C")
+    assert isinstance(bad, ValueError)
+    assert stats["fallbacks"] == 1
+
+@pytest.fixture
+def client(monkeypatch):
+    classifier = FakeClassifier()
+    monkeypatch.setattr(server, "load_classifier_pipeline", lambda: classifier)
+    monkeypatch.setattr(server, "load_ner_pipeline", FakeNER)
+    app = server.create_app(max_wait_ms=1, risk_mode="full", stream_threshold=200)
+    with TestClient(app) as test_client:
+        yield test_client
+
+def test_analyze_uses_request_risk_settings(client, monkeypatch):
+    calls = []
+    original = server.get_risk_assessments
+    monkeypatch.setattr(server, "get_risk_assessments",
+                        lambda texts, pipeline, **kwargs: calls.append(kwargs) or original(texts, pipeline, **kwargs))
+
+    response = client.post("/analyze", json={"text": "Viper meets Ghost at the river.", "risk_mode": "segmented",
+                                             "aggregation": "mean"})
+    assert response.status_code == 200
+    assert ["Viper", "PER"] in response.json()["entities"]
+    assert (calls[0]["mode"], calls[0]["aggregation"]) == ("segmented", "mean")
+
+    client.post("/classify", json={"text": "All quiet tonight."})
+    assert calls[1]["mode"] == "full"
+
+    assert client.post("/classify", json={"text": "All quiet.", "risk_mode": "fast"}).status_code == 422
+
+def test_long_documents_are_streamed(client):
+    response = client.post("/analyze", json={"text": LONG_TEXT})
+    assert response.status_code == 200
+    assert response.json()["entities"] == [["Viper", "PER"]]
+    # The window-by-window path never goes through the micro-batchers
+    assert client.get("/health").json()["batches"]["classify"]["items"] == 0
@@ -0,0 +1,53 @@
+import pytest
+
+from storage import create_store
+
+@pytest.fixture
+def store(tmp_path):
+    return create_store("sqlite", path=str(tmp_path / "presto.db"))
+
+def test_save_returns_ids_in_order(store):
+    first = store.save_log("first report", "Benign", [["Viper", "PER"]])
+    ids = store.save_logs([{"text": f"report {i}", "analysis": "Suspicious", "entities": []} for i in range(3)])
+    assert ids == [first + 1, first + 2, first + 3]
+    assert store.count_logs() == 4
+    assert store.load_log_text(first) == "first report"
+    assert store.load_log_text(9999) is None
+
+def test_history_pages_without_full_text(store):
+    store.save_logs([{"text": f"report {i} " + "x" * 300, "analysis": "Benign", "entities": []} for i in range(5)])
+    first_page = store.load_history(limit=2)
+    assert "text" not in first_page[0]
+    assert len(first_page[0]["preview"]) == 200 and first_page[0]["truncated"]
+    second_page = store.load_history(limit=2, before=(first_page[-1]["created_at"], first_page[-1]["id"]))
+    third_page = store.load_history(limit=2, before=(second_page[-1]["created_at"], second_page[-1]["id"]))
+    ids = [row["id"] for row in first_page + second_page + third_page]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 5
+
+def test_search_by_text_entity_and_label(store):
+    store.save_log("Convoy leaves at dawn", "Benign", [["Viper", "PER"]])
+    store.save_log("Viper moves the package", "Critical", [["VIPER ", "PER"], ["AK-47", "WEAPON"]])
+    store.save_log("Market is quiet", "Benign", [])
+    assert [r["analysis"] for r in store.search_logs(query="package")] == ["Critical"]
+    assert len(store.search_logs(entity="viper")) == 2
+    assert len(store.search_logs(label="WEAPON")) == 1
+    assert [r["analysis"] for r in store.search_logs(query="convoy", entity="Viper")] == ["Benign"]
+    assert store.search_logs(query='"unbalanced') == []
+
+def test_dashboard_stats(store):
+    store.save_log("a", "Benign", [["Viper", "PER"]])
+    store.save_log("b", "Critical", [["AK-47", "WEAPON"], ["Ghost", "CALLSIGN"]])
+    stats = store.dashboard_stats()
+    assert stats["total"] == 2 and stats["latest"]
+    assert stats["by_risk"] == {"Benign": 1, "Critical": 1}
+    assert stats["entity_types"] == {"PER": 1, "WEAPON": 1, "CALLSIGN": 1}
+
+def test_delete_and_backfill(store):
+    keep = store.save_log("keep me", "Benign", [["Viper", "PER"]])
+    drop = store.save_log("drop me", "Benign", [["Ghost", "CALLSIGN"]])
+    store.delete_log(drop)
+    assert store.count_logs() == 1
+    assert store.backfill_index() == 1
+    assert [r["id"] for r in store.search_logs(entity="Viper")] == [keep]
+    store.delete_all_logs()
+    assert store.count_logs() == 0
@@ -0,0 +1,67 @@
+import pytest
+
+import models.streaming as streaming
+from models.streaming import EntityMerger, analyze_chunked, iter_chunks, needs_streaming, unique_entities
+from fakes import FakeClassifier, FakeNER
+
+def words(n: int) -> str:
+    return " ".join(f"w{i}" for i in range(n))
+
+def test_short_text_is_one_window():
+    text = words(50)
+    assert list(iter_chunks(text, max_tokens=100, stride=10)) == [(0, len(text), text)]
+    assert list(iter_chunks("", max_tokens=100, stride=10)) == []
+
+def test_windows_cover_the_text_and_overlap():
+    text = words(1000)
+    chunks = list(iter_chunks(text, max_tokens=100, stride=10))
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(text)
+    for (start, end, chunk), (next_start, _, _) in zip(chunks, chunks[1:]):
+        assert chunk == text[start:end]
+        assert len(chunk.split()) <= 100
+        # About stride words are shared, and windows end on word boundaries
+        assert len(text[next_start:end].split()) == 10
+        assert text[end] == " " or text[end - 1] == " "
+
+def test_stride_must_be_below_window():
+    with pytest.raises(ValueError):
+        list(iter_chunks(words(10), max_tokens=10, stride=10))
+
+def test_look_ahead_resets_after_sparse_text(monkeypatch):
+    # One long run of characters forces the look-ahead to grow; later windows start small again
+    sizes = []
+    original = streaming._token_offsets
+    monkeypatch.setattr(streaming, "_token_offsets", lambda window, tokenizer: sizes.append(len(window)) or original(window, tokenizer))
+    text = "x" * 3000 + " " + words(2000)
+    list(iter_chunks(text, max_tokens=100, stride=10))
+    initial = 100 * streaming.CHARS_PER_TOKEN_GUESS
+    later = sizes[sizes.index(max(sizes)) + 1:]
+    assert max(sizes) > initial and len(later) > 5
+    assert all(size <= initial for size in later)
+
+def test_merger_keeps_longest_overlapping_span():
+    merger = EntityMerger()
+    merger.add([{"word": "Bravo", "label": "PER", "start": 10, "end": 15}])
+    merger.add([{"word": "Bravo Six", "label": "CALLSIGN", "start": 10, "end": 19},
+                {"word": "Viper", "label": "PER", "start": 40, "end": 45}])
+    assert [s["word"] for s in merger.commit(20)] == ["Bravo Six"]
+    assert [s["word"] for s in merger.commit()] == ["Viper"]
+
+def test_unique_entities_keeps_first_occurrence_order():
+    spans = [{"word": w, "label": l} for w, l in [("Viper", "PER"), ("Ghost", "CALLSIGN"), ("Viper", "PER"), ("Viper", "ORG")]]
+    assert unique_entities(spans) == [("Viper", "PER"), ("Ghost", "CALLSIGN"), ("Viper", "ORG")]
+
+def test_needs_streaming_uses_word_count_without_tokenizer():
+    assert not needs_streaming(words(50), threshold=100)
+    assert needs_streaming(words(150), threshold=100)
+    # Longer than the threshold in characters, not in words
+    assert not needs_streaming("x" * 500, threshold=100)
+
+def test_analyze_chunked_merges_windows():
+    text = "Viper met Ghost at the river. " * 200
+    result = analyze_chunked(text, FakeNER(), FakeClassifier(), max_tokens=100, stride=10)
+    assert result["entities"] == [("Viper", "PER"), ("Ghost", "PER")]
+    assert len(result["entity_spans"]) == 400
+    starts = [span["start"] for span in result["entity_spans"]]
+    assert starts == sorted(starts)
+    assert result["risk_level"] in ("Benign", "Suspicious", "Critical")
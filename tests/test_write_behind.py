@@ -0,0 +1,71 @@
+import os
+import threading
+
+import pytest
+
+from storage import create_store
+from storage.write_behind import WriteBehindQueue
+
+class FlakyStore:
+    """Wraps a store; save_logs raises while failing is set."""
+
+    def __init__(self, store):
+        self.store = store
+        self.failing = True
+        self.batches = []
+
+    def save_logs(self, records):
+        if self.failing:
+            raise ConnectionError("store unavailable")
+        self.batches.append(len(records))
+        return self.store.save_logs(records)
+
+@pytest.fixture
+def store(tmp_path):
+    return create_store("sqlite", path=str(tmp_path / "presto.db"))
+
+def test_bulk_flush_and_on_saved_ids(store):
+    writer = WriteBehindQueue(store, max_batch=50, flush_interval=0.05)
+    saved = {}
+    done = threading.Event()
+    def remember(i):
+        return lambda log_id: (saved.__setitem__(i, log_id), len(saved) == 10 and done.set())
+    for i in range(10):
+        assert writer.put(f"report {i}", "Benign", [("Viper", "PER")], on_saved=remember(i))
+    assert writer.flush() and done.wait(5)
+    writer.close()
+    assert store.count_logs() == 10
+    assert all(store.load_log_text(saved[i]) == f"report {i}" for i in range(10))
+    stats = writer.stats()
+    assert stats["written"] == 10 and stats["flushes"] < 10 and not writer.callbacks
+
+def test_spills_then_replays_without_duplicates(store, tmp_path):
+    flaky = FlakyStore(store)
+    spill = str(tmp_path / "spill.jsonl")
+    writer = WriteBehindQueue(flaky, max_batch=10, flush_interval=0.01, spill_path=spill, max_retries=1, backoff=0.01)
+    for i in range(3):
+        writer.put(f"report {i}", "Benign", [])
+    assert writer.flush()
+    assert os.path.exists(spill) and writer.stats()["spilled"] == 3
+    flaky.failing = False
+    writer.put("report 3", "Benign", [])
+    writer.close()
+    assert store.count_logs() == 4
+    assert sorted(row["preview"] for row in store.load_history(limit=10)) == [f"report {i}" for i in range(4)]
+    assert writer.stats()["replayed"] == 3
+    assert not os.path.exists(spill) and not os.path.exists(spill + ".replay")
+
+def test_drops_without_spill_file(store):
+    writer = WriteBehindQueue(FlakyStore(store), flush_interval=0.01, max_retries=0)
+    writer.put("lost", "Benign", [])
+    writer.close()
+    assert writer.stats()["dropped"] == 1 and writer.stats()["failed_flushes"] == 1
+    assert not writer.put("after close", "Benign", [])
+    assert store.count_logs() == 0
+
+def test_close_flushes_pending_records(store):
+    writer = WriteBehindQueue(store, max_batch=1000, flush_interval=0.5)
+    for i in range(25):
+        writer.put(f"report {i}", "Benign", [])
+    writer.close()
+    assert store.count_logs() == 25 and writer.stats()["queue_depth"] == 0